@@ -26,12 +26,14 @@ INSTALLED_APPS = [
     'django.contrib.contenttypes',
     'django.contrib.sessions',
     'django.contrib.messages',
-    'django.contrib.staticfiles',
+    'acaciaapp.apps.StaticAssetsConfig',
     'acaciaapp'
 ]
 
 MIDDLEWARE = [
+    'acaciaapp.metrics.MetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    'acaciaapp.middleware.PrecompressedStaticMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -44,7 +46,8 @@ ROOT_URLCONF = 'Restaurant.urls'
 
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        # Stock Django templates, timed for the /metrics render histograms
+        'BACKEND': 'acaciaapp.metrics.TimedDjangoTemplates',
         'DIRS': ['templates'],
         'APP_DIRS': True,
         'OPTIONS': {
@@ -63,12 +66,73 @@ WSGI_APPLICATION = 'Restaurant.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+# Database profile, chosen by environment:
+#   DB_ENGINE=sqlite (default) or postgresql
+#   DB_NAME, DB_USER, DB_PASSWORD, DB_HOST, DB_PORT
+#   DB_CONN_MAX_AGE   seconds to keep connections open between requests
+#   DB_POOL=1         psycopg 3 connection pool (PostgreSQL only)
+#   SQLITE_TUNED=0    plain SQLite defaults, e.g. for comparison runs
+DB_ENGINE = os.environ.get('DB_ENGINE', 'sqlite')
+DB_CONN_MAX_AGE = int(os.environ.get('DB_CONN_MAX_AGE', '60'))
+
+if DB_ENGINE == 'postgresql':
+    DB_POOL = os.environ.get('DB_POOL', '0') == '1'
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.postgresql',
+            'NAME': os.environ.get('DB_NAME', 'acacia'),
+            'USER': os.environ.get('DB_USER', 'acacia'),
+            'PASSWORD': os.environ.get('DB_PASSWORD', ''),
+            'HOST': os.environ.get('DB_HOST', 'localhost'),
+            'PORT': os.environ.get('DB_PORT', '5432'),
+            # The pool manages connection lifetime itself and needs CONN_MAX_AGE=0
+            'CONN_MAX_AGE': 0 if DB_POOL else DB_CONN_MAX_AGE,
+            'CONN_HEALTH_CHECKS': True,
+            'OPTIONS': {
+                'pool': {
+                    'min_size': int(os.environ.get('DB_POOL_MIN', '2')),
+                    'max_size': int(os.environ.get('DB_POOL_MAX', '10')),
+                    'timeout': 10,
+                },
+            } if DB_POOL else {},
+        }
     }
-}
+else:
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': os.environ.get('DB_NAME', BASE_DIR / 'db.sqlite3'),
+            'CONN_MAX_AGE': DB_CONN_MAX_AGE,
+            'CONN_HEALTH_CHECKS': True,
+            'OPTIONS': {},
+            # A file, not the default shared-cache memory database, so the
+            # concurrency tests lock and wait the way the real database does
+            'TEST': {'NAME': os.environ.get('DB_TEST_NAME', BASE_DIR / 'test_db.sqlite3')},
+        }
+    }
+    if os.environ.get('SQLITE_TUNED', '1') == '1':
+        DATABASES['default']['OPTIONS'] = {
+            # Seconds a writer waits on a locked database before giving up
+            'timeout': 20,
+            # Take the write lock at BEGIN, so read-then-write transactions
+            # queue on busy_timeout instead of failing to upgrade their lock
+            'transaction_mode': 'IMMEDIATE',
+            # Run on every new connection
+            'init_command': (
+                'PRAGMA busy_timeout=20000;'
+                'PRAGMA cache_size=-20000;'
+                'PRAGMA temp_store=MEMORY;'
+            ),
+        }
+        # WAL lets readers proceed alongside the single writer; NORMAL sync is
+        # durable across app crashes in WAL. The journal mode is stored in the
+        # file header, so leave the sample db.sqlite3 in the repo alone.
+        if Path(DATABASES['default']['NAME']).resolve() != (BASE_DIR / 'db.sqlite3').resolve():
+            DATABASES['default']['OPTIONS']['init_command'] = (
+                'PRAGMA journal_mode=WAL;'
+                'PRAGMA synchronous=NORMAL;'
+                + DATABASES['default']['OPTIONS']['init_command']
+            )
 
 
 # Password validation
@@ -107,12 +171,93 @@ USE_TZ = True
 
 STATIC_URL = 'static/'
 STATICFILES_DIRS = [
-    BASE_DIR, 'static'
+    BASE_DIR / 'static',
 ]
+STATIC_ROOT = BASE_DIR / 'staticfiles'
+
+# collectstatic fingerprints assets and writes .gz/.br siblings, which
+# PrecompressedStaticMiddleware serves with far-future caching. DEBUG keeps
+# plain storage so runserver works without a collectstatic step.
+STORAGES = {
+    'default': {
+        'BACKEND': 'django.core.files.storage.FileSystemStorage',
+    },
+    'staticfiles': {
+        'BACKEND': (
+            'django.contrib.staticfiles.storage.StaticFilesStorage' if DEBUG
+            else 'acaciaapp.storage.PrecompressedManifestStaticFilesStorage'
+        ),
+    },
+}
 
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+# Ticket PDFs are rendered on first download and kept in a bounded LRU cache
+TICKET_PDF_CACHE_DIR = os.path.join(BASE_DIR, 'cache', 'tickets')
+TICKET_PDF_CACHE_MAX_BYTES = 200 * 1024 * 1024
+
+# Media and ticket downloads are authorised in Django, then handed to the
+# front server: 'nginx' (X-Accel-Redirect to an internal location mapped
+# below), 'apache' (mod_xsendfile) or unset to stream from Python.
+#   location /protected/media/ { internal; alias /srv/acacia/media/; }
+#   location /protected/tickets/ { internal; alias /srv/acacia/cache/tickets/; }
+SENDFILE_BACKEND = os.environ.get('SENDFILE_BACKEND') or None
+SENDFILE_ROOTS = {
+    MEDIA_ROOT: '/protected/media/',
+    TICKET_PDF_CACHE_DIR: '/protected/tickets/',
+}
+
+# Table reservations are counted in slots of this many minutes. Each slot
+# seats RESERVATION_DEFAULT_SEATS guests unless a SeatingCapacity rule
+# (Django admin) covers it.
+RESERVATION_SLOT_MINUTES = 30
+RESERVATION_DEFAULT_SEATS = int(os.environ.get('RESERVATION_DEFAULT_SEATS', '40'))
+
+# Event types that book the whole venue for the day
+EXCLUSIVE_EVENT_TYPES = ['Wedding', 'Corporate Event']
+
+# Addresses allowed to scrape /metrics without a staff login, e.g.
+# METRICS_ALLOWED_IPS="10.0.0.5". Behind a local reverse proxy every request
+# comes from 127.0.0.1, so only list it if the proxy blocks /metrics.
+METRICS_ALLOWED_IPS = os.environ.get('METRICS_ALLOWED_IPS', '').split()
+
+# Background commands such as process_ticket_jobs write their metrics here
+# for /metrics to merge in, so it must be shared with the web workers.
+METRICS_EXPORT_DIR = os.environ.get('METRICS_EXPORT_DIR', os.path.join(BASE_DIR, 'cache', 'metrics'))
+
+# Cache backends. Set PAGE_CACHE_BACKEND / PAGE_CACHE_LOCATION to point the
+# page cache at a shared store (e.g. django.core.cache.backends.redis.RedisCache).
+# 'bookings' holds per-user timelines and room calendars, which every worker
+# must see invalidated, so it defaults to files on disk rather than memory;
+# BOOKING_CACHE_BACKEND / BOOKING_CACHE_LOCATION move it to Redis or similar.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'pages': {
+        'BACKEND': os.environ.get('PAGE_CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.environ.get('PAGE_CACHE_LOCATION', 'pages'),
+    },
+    'bookings': {
+        'BACKEND': os.environ.get('BOOKING_CACHE_BACKEND', 'django.core.cache.backends.filebased.FileBasedCache'),
+        'LOCATION': os.environ.get('BOOKING_CACHE_LOCATION', os.path.join(BASE_DIR, 'cache', 'bookings')),
+        'OPTIONS': {'MAX_ENTRIES': 20000},
+    },
+}
+BOOKING_CACHE_ALIAS = 'bookings'
+
+# Rendered HTML for the marketing pages, cached per auth state (seconds)
+PAGE_CACHE_ALIAS = 'pages'
+PAGE_CACHE_TIMEOUTS = {
+    'index': 300,
+    'menu': 600,
+    'about': 3600,
+    'terms': 3600,
+    'privacy': 3600,
+    'error': 3600,
+}
+
 
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
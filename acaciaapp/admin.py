@@ -1,22 +1,99 @@
+from django import forms
 from django.contrib import admin
-from .models import Room, RoomBooking, Reservation, EventBooking
+from .models import Room, RoomBooking, Reservation, EventBooking, SeatingCapacity, Venue, RoomUnavailable, check_room_nights
+from .seating import SlotFull, check_seats
+from .venues import VenueFull, check_venue
 
 @admin.register(Room)
 class RoomAdmin(admin.ModelAdmin):
     list_display = ('room_number', 'capacity', 'price', 'available')
     list_editable = ('available',)  # only fields that exist in the model
 
+class RoomBookingAdminForm(forms.ModelForm):
+    """Reports taken nights on the form instead of failing in save()."""
+
+    class Meta:
+        model = RoomBooking
+        fields = '__all__'
+
+    def clean(self):
+        cleaned_data = super().clean()
+        room, check_in, check_out = (cleaned_data.get(f) for f in ('room', 'check_in', 'check_out'))
+        if not (room and check_in and check_out):
+            return cleaned_data
+        if check_out <= check_in:
+            self.add_error('check_out', "Check-out must be after check-in.")
+        elif not cleaned_data.get('is_cleared'):
+            try:
+                check_room_nights(room, check_in, check_out, self.instance)
+            except RoomUnavailable as e:
+                raise forms.ValidationError(str(e))
+        return cleaned_data
+
 @admin.register(RoomBooking)
 class RoomBookingAdmin(admin.ModelAdmin):
+    form = RoomBookingAdminForm
     list_display = ('customer_name', 'room', 'check_in', 'check_out', 'email', 'phone')
     list_editable = ()  # you can choose fields, but only existing ones
 
+class ReservationAdminForm(forms.ModelForm):
+    """Reports a full slot on the form instead of failing in save()."""
+
+    class Meta:
+        model = Reservation
+        fields = '__all__'
+
+    def clean(self):
+        cleaned_data = super().clean()
+        day, time, people = (cleaned_data.get(f) for f in ('date', 'time', 'people'))
+        if day and time and people:
+            held = getattr(self.instance, '_stored_seats', None) if self.instance.pk else None
+            try:
+                check_seats(day, time, people, held)
+            except SlotFull as e:
+                raise forms.ValidationError(str(e))
+        return cleaned_data
+
 @admin.register(Reservation)
 class ReservationAdmin(admin.ModelAdmin):
+    form = ReservationAdminForm
     list_display = ('reserved_name', 'people', 'date', 'time', 'user')
 
+@admin.register(SeatingCapacity)
+class SeatingCapacityAdmin(admin.ModelAdmin):
+    list_display = ('weekday', 'start', 'end', 'seats')
+    list_filter = ('weekday',)
+
+class EventBookingAdminForm(forms.ModelForm):
+    """Reports a missing or full venue on the form instead of failing in save()."""
+
+    class Meta:
+        model = EventBooking
+        fields = '__all__'
+
+    def clean(self):
+        cleaned_data = super().clean()
+        if cleaned_data.get('is_canceled'):
+            return cleaned_data
+        venue, day, attendees = (cleaned_data.get(f) for f in ('venue', 'date', 'attendees'))
+        if venue is None:
+            self.add_error('venue', "Event bookings need a venue.")
+        elif day and attendees:
+            held = getattr(self.instance, '_stored_hold', None) if self.instance.pk else None
+            try:
+                check_venue(venue, day, attendees, cleaned_data.get('exclusive', False), held)
+            except VenueFull as e:
+                raise forms.ValidationError(str(e))
+        return cleaned_data
+
 @admin.register(EventBooking)
 class EventBookingAdmin(admin.ModelAdmin):
-    list_display = ("customer_name", "event_name", "date", "attendees", "email", "is_canceled", "created_at")
-    list_filter = ("date", "is_canceled")
+    form = EventBookingAdminForm
+    list_display = ("customer_name", "event_name", "venue", "date", "attendees", "exclusive", "email", "is_canceled", "created_at")
+    list_filter = ("date", "venue", "is_canceled")
     search_fields = ("customer_name", "email", "phone", "event_name")
+
+@admin.register(Venue)
+class VenueAdmin(admin.ModelAdmin):
+    list_display = ('name', 'capacity', 'is_active')
+    list_editable = ('capacity', 'is_active')
@@ -1,6 +1,24 @@
 from django.apps import AppConfig
+from django.contrib.staticfiles.apps import StaticFilesConfig
 
 
 class AcaciaappConfig(AppConfig):
+    # StaticAssetsConfig below lives in this module too, so mark the default
+    default = True
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'acaciaapp'
+
+    def ready(self):
+        from . import signals  # noqa: F401
+
+
+class StaticAssetsConfig(StaticFilesConfig):
+    # Keep collectstatic to the assets the templates use: no SCSS sources,
+    # source maps, RTL builds or the unminified/partial Bootstrap bundles
+    ignore_patterns = StaticFilesConfig.ignore_patterns + [
+        'scss', '*.scss', '*.map', '*.rtl.*',
+        'bootstrap-grid.*', 'bootstrap-reboot.*', 'bootstrap-utilities.*',
+        'bootstrap.css', 'bootstrap.js', 'bootstrap.esm.*', 'bootstrap.min.js', 'bootstrap.bundle.js',
+        'aos.cjs.js', 'aos.esm.js', 'bootstrap-icons.json',
+        'glightbox.css', 'glightbox.js', 'isotope.pkgd.js',
+    ]
@@ -0,0 +1,95 @@
+"""
+Per-room availability calendars for the rooms page.
+
+A calendar covers `days` nights from `start`. Each room's booked nights are
+one integer bitmask (bit i set = night start + i is taken), built in a single
+pass over the active bookings that overlap the window and sent as a
+zero-padded hex string (most significant digit first, so night 0 is the
+lowest bit of the last digit). Calendars are cached per window in the
+shared booking cache, under a global version that any booking or room change
+bumps once its transaction commits.
+"""
+import datetime
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+
+from .models import Room, RoomBooking
+
+AVAILABILITY_CACHE_TIMEOUT = 60 * 60
+AVAILABILITY_DEFAULT_DAYS = 31
+AVAILABILITY_MAX_DAYS = 180
+# How far from today a calendar may start, either way
+AVAILABILITY_HORIZON_DAYS = 5 * 366
+
+_VERSION_KEY = "availability:version"
+
+
+def booked_masks(start, days):
+    """{room_id: bitmask} of nights held by active bookings in the window."""
+    end = start + datetime.timedelta(days=days)
+    masks = {}
+    bookings = RoomBooking.objects.filter(
+        is_cleared=False, check_in__lt=end, check_out__gt=start
+    ).values_list('room_id', 'check_in', 'check_out')
+    for room_id, check_in, check_out in bookings.iterator():
+        first = max((check_in - start).days, 0)
+        last = min((check_out - start).days, days)
+        masks[room_id] = masks.get(room_id, 0) | (((1 << (last - first)) - 1) << first)
+    return masks
+
+
+def build_calendar(start, days):
+    masks = booked_masks(start, days)
+    width = (days + 3) // 4
+    rooms = [
+        {
+            'id': pk,
+            'room_number': room_number,
+            'capacity': capacity,
+            'price': price,
+            'bookable': available,
+            'booked': format(masks.get(pk, 0), f'0{width}x'),
+        }
+        for pk, room_number, capacity, price, available in Room.objects.order_by('room_number').values_list(
+            'pk', 'room_number', 'capacity', 'price', 'available'
+        )
+    ]
+    return {'start': start.isoformat(), 'days': days, 'rooms': rooms}
+
+
+def _cache():
+    return caches[settings.BOOKING_CACHE_ALIAS]
+
+
+def _new_version():
+    # From the clock, so an evicted version key never revives old entries
+    return time.time_ns() // 1000
+
+
+def get_calendar(start, days=AVAILABILITY_DEFAULT_DAYS):
+    """Cached build_calendar()."""
+    cache = _cache()
+    version = cache.get_or_set(_VERSION_KEY, _new_version, None)
+    key = f"availability:{version}:{start.isoformat()}:{days}"
+
+    calendar = cache.get(key)
+    if calendar is None:
+        calendar = build_calendar(start, days)
+        cache.set(key, calendar, AVAILABILITY_CACHE_TIMEOUT)
+    return calendar
+
+
+def invalidate_availability():
+    """Bump the version once the current transaction commits."""
+    transaction.on_commit(_bump)
+
+
+def _bump():
+    try:
+        _cache().incr(_VERSION_KEY)
+    except ValueError:
+        # No version yet, so nothing cached
+        pass
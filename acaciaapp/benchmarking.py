@@ -0,0 +1,60 @@
+"""Shared helpers for the benchmark and load-test management commands."""
+from contextlib import contextmanager
+import subprocess
+
+from django.conf import settings
+from django.db import connection
+from django.test.utils import override_settings
+
+
+def percentile(samples, pct):
+    """Nearest-rank percentile of `samples` (any order); 0.0 when empty."""
+    if not samples:
+        return 0.0
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(len(samples) * pct / 100))]
+
+
+def latency_summary(seconds):
+    """Millisecond latency stats for a list of durations in seconds."""
+    return {
+        "count": len(seconds),
+        "mean_ms": round(sum(seconds) / len(seconds) * 1000, 3) if seconds else 0.0,
+        "p50_ms": round(percentile(seconds, 50) * 1000, 3),
+        "p90_ms": round(percentile(seconds, 90) * 1000, 3),
+        "p99_ms": round(percentile(seconds, 99) * 1000, 3),
+        "max_ms": round(max(seconds) * 1000, 3) if seconds else 0.0,
+    }
+
+
+def git_revision():
+    """Short commit hash of the working tree, so results can be compared across commits."""
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True, timeout=5,
+        ).stdout.strip()
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+@contextmanager
+def scratch_database(verbosity=0):
+    """
+    Run the block against a freshly migrated throwaway database (the test
+    database, so the same engine and options), dropped afterwards; seeded
+    rows can be committed for driver threads without touching real data.
+    Caches are swapped for empty per-process ones so nothing seeded leaks
+    into the shared booking or page caches.
+    """
+    caches = {
+        alias: {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': f'scratch-{alias}'}
+        for alias in settings.CACHES
+    }
+    old_name = connection.creation.create_test_db(
+        verbosity=verbosity, autoclobber=True, serialize=False, keepdb=False
+    )
+    try:
+        with override_settings(CACHES=caches):
+            yield connection.settings_dict['NAME']
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=verbosity, keepdb=False)
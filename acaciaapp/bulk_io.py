@@ -0,0 +1,195 @@
+"""
+Streaming CSV/JSONL export and batched import of booking data.
+
+Exports read with QuerySet.iterator() and write row by row, so memory stays
+flat however large the table. Imports parse the file lazily and insert with
+bulk_create() one batch (and one transaction) at a time.
+"""
+import csv
+import json
+from contextlib import contextmanager
+import datetime
+
+from django.core.management.color import no_style
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connection, transaction
+
+from .availability import invalidate_availability
+from .models import EventBooking, Reservation, Room, RoomBooking, RoomNight, Ticket
+from .reports import record_bookings
+from .seating import recount as recount_seating
+from .venues import recount as recount_venues
+from .timeline import invalidate_timeline
+
+EXPORT_MODELS = {
+    "roombookings": RoomBooking,
+    "reservations": Reservation,
+    "eventbookings": EventBooking,
+    "tickets": Ticket,
+}
+FORMATS = ("csv", "jsonl")
+
+
+def export_fields(model):
+    """Column names: concrete field attnames, so foreign keys export as ids."""
+    return [field.attname for field in model._meta.concrete_fields]
+
+
+def _plain(value):
+    if isinstance(value, (datetime.date, datetime.time)):
+        return value.isoformat()  # full precision, unlike DjangoJSONEncoder
+    if hasattr(value, "name") and not isinstance(value, str):  # FieldFile
+        return value.name or None
+    return value
+
+
+def export_rows(model, out, fmt, chunk_size=2000, queryset=None):
+    """Write every row of `model` to the text stream `out`. Returns the row count."""
+    columns = export_fields(model)
+    queryset = queryset if queryset is not None else model.objects.all()
+    rows = queryset.order_by("pk").values_list(*columns).iterator(chunk_size=chunk_size)
+
+    count = 0
+    if fmt == "csv":
+        writer = csv.writer(out)
+        writer.writerow(columns)
+        for row in rows:
+            writer.writerow(["" if v is None else _plain(v) for v in row])
+            count += 1
+    else:
+        encoder = DjangoJSONEncoder(ensure_ascii=False)
+        for row in rows:
+            out.write(encoder.encode({c: _plain(v) for c, v in zip(columns, row)}))
+            out.write("\n")
+            count += 1
+    return count
+
+
+def read_rows(stream, fmt):
+    """Yield (line_number, dict) pairs from a CSV or JSONL text stream."""
+    if fmt == "csv":
+        reader = csv.DictReader(stream)
+        for row in reader:
+            yield reader.line_num, row
+    else:
+        for line_number, line in enumerate(stream, start=1):
+            if line.strip():
+                yield line_number, json.loads(line)
+
+
+def build_instance(model, row, keep_ids=True):
+    """A model instance from one row, with every value run through field.to_python()."""
+    kwargs = {}
+    for field in model._meta.concrete_fields:
+        if field.attname not in row:
+            continue
+        if field.primary_key and not keep_ids:
+            continue
+        value = row[field.attname]
+        if value == "" and (field.null or field.primary_key):
+            value = None  # CSV has no null
+        if value is None and field.primary_key:
+            continue
+        kwargs[field.attname] = field.to_python(value)
+    return model(**kwargs)
+
+
+@contextmanager
+def preserve_timestamps(model):
+    """Keep imported created_at/booked_at values instead of stamping import time."""
+    fields = [f for f in model._meta.concrete_fields if getattr(f, "auto_now_add", False)]
+    for field in fields:
+        field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field in fields:
+            field.auto_now_add = True
+
+
+def _claim_room_nights(bookings):
+    """
+    bulk_create() skips RoomBooking.save(), so claim inventory here. Returns
+    how many nights were already held by another booking and left alone.
+    """
+    nights = []
+    for booking in bookings:
+        if booking.is_cleared:
+            continue
+        day = booking.check_in
+        while day < booking.check_out:
+            nights.append(RoomNight(room_id=booking.room_id, night=day, booking_id=booking.pk))
+            day += datetime.timedelta(days=1)
+    if not nights:
+        return 0
+    RoomNight.objects.bulk_create(nights, ignore_conflicts=True)
+    claimed = RoomNight.objects.filter(booking_id__in=[b.pk for b in bookings]).count()
+    return len(nights) - claimed
+
+
+def _price_bookings(bookings):
+    """Exports from before nightly_rate existed: price them at today's room price."""
+    unpriced = [booking for booking in bookings if booking.nightly_rate is None]
+    if unpriced:
+        prices = dict(Room.objects.filter(pk__in={b.room_id for b in unpriced}).values_list('pk', 'price'))
+        for booking in unpriced:
+            booking.nightly_rate = prices.get(booking.room_id)
+
+
+def import_rows(model, rows, batch_size=1000, keep_ids=True, on_batch=None):
+    """
+    Insert rows from read_rows() in batches of `batch_size`, each batch in its
+    own transaction. Returns a stats dict; a bad row raises ValueError naming
+    its line, with earlier batches already committed.
+    """
+    stats = {"rows": 0, "batches": 0, "night_conflicts": 0}
+    user_ids, room_ids, dates = set(), set(), set()
+
+    def flush(batch):
+        with transaction.atomic():
+            if model is RoomBooking:
+                _price_bookings(batch)
+            created = model.objects.bulk_create(batch)
+            if model is RoomBooking:
+                stats["night_conflicts"] += _claim_room_nights(created)
+                record_bookings(created)
+        stats["rows"] += len(batch)
+        stats["batches"] += 1
+        for obj in batch:
+            user_ids.add(getattr(obj, "user_id", None))
+            room_ids.add(getattr(obj, "room_id", None))
+            dates.add(getattr(obj, "date", None))
+        if on_batch:
+            on_batch(stats)
+
+    batch = []
+    with preserve_timestamps(model):
+        for line_number, row in rows:
+            try:
+                batch.append(build_instance(model, row, keep_ids))
+            except Exception as exc:
+                raise ValueError(f"line {line_number}: {exc}") from exc
+            if len(batch) >= batch_size:
+                flush(batch)
+                batch = []
+        if batch:
+            flush(batch)
+
+    if keep_ids:
+        # Explicit ids leave PostgreSQL sequences behind; a no-op on SQLite
+        statements = connection.ops.sequence_reset_sql(no_style(), [model])
+        if statements:
+            with connection.cursor() as cursor:
+                for sql in statements:
+                    cursor.execute(sql)
+
+    if model is RoomBooking:
+        Room.objects.filter(pk__in=room_ids - {None}).refresh_occupancy()
+        invalidate_availability()
+    if model is Reservation:
+        recount_seating(dates - {None})
+    if model is EventBooking:
+        recount_venues(dates - {None})
+    for user_id in user_ids - {None}:
+        invalidate_timeline(user_id)
+    return stats
@@ -0,0 +1,260 @@
+import json
+import os
+import random
+import shutil
+import tempfile
+import threading
+import time
+from datetime import date, timedelta
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from acaciaapp.benchmarking import git_revision, latency_summary, scratch_database
+from acaciaapp.bulk_io import _claim_room_nights
+from acaciaapp.models import EventBooking, Reservation, Room, RoomBooking, Ticket
+from acaciaapp.reports import record_bookings
+from acaciaapp.seating import recount as recount_seating
+from acaciaapp.ticket_cache import get_ticket_pdf_cache
+
+BENCH_PREFIX = "BENCH-"
+SCENARIOS = ("ticket_pdf", "rooms_search", "book_room", "admin_dashboard", "profile")
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark the booking hot paths against a seeded database: latency "
+        "percentiles, throughput and SQL queries per operation, single-threaded "
+        "and from a multi-threaded driver. Seeds and runs in a throwaway "
+        "database that is dropped afterwards; ticket PDFs go to a temporary "
+        "directory."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rooms", type=int, default=20)
+        parser.add_argument("--bookings", type=int, default=1000, help="Rows seeded per booking table.")
+        parser.add_argument("--users", type=int, default=20)
+        parser.add_argument("--iterations", type=int, default=30, help="Single-threaded samples per scenario.")
+        parser.add_argument("--threads", type=int, default=4, help="Driver threads for the throughput phase (0 to skip).")
+        parser.add_argument("--thread-iterations", type=int, default=10, help="Operations per driver thread.")
+        parser.add_argument("--only", help=f"Comma-separated subset of: {', '.join(SCENARIOS)}.")
+        parser.add_argument("--output", "-o", help="Also write the JSON report to this file.")
+
+    # ==========================
+    # SEED
+    # ==========================
+
+    def seed(self, options):
+        staff = User.objects.create_user(f"{BENCH_PREFIX}staff", is_staff=True)
+        guest = User.objects.create_user(f"{BENCH_PREFIX}guest")
+        users = [staff, guest] + User.objects.bulk_create(
+            User(username=f"{BENCH_PREFIX}user-{i}") for i in range(options["users"])
+        )
+        rooms = Room.objects.bulk_create(
+            Room(room_number=f"{BENCH_PREFIX}{i:04d}"[:10], capacity=1 + i % 4, price=3000 + 500 * (i % 6),
+                 description="Wifi, AC", image="rooms/economy.jpg")
+            for i in range(options["rooms"])
+        )
+
+        rows = options["bookings"]
+        start = date.today() - timedelta(days=rows // 10)
+        bookings = RoomBooking.objects.bulk_create(
+            RoomBooking(
+                user=users[i % len(users)], room=rooms[i % len(rooms)],
+                customer_name=f"Guest {i}", email="guest@example.com", phone="0700000000",
+                age=30, id_number=str(i), people=2,
+                check_in=start + timedelta(days=i // len(rooms) * 3),
+                check_out=start + timedelta(days=i // len(rooms) * 3 + 2),
+                is_cleared=i % 3 == 0, nightly_rate=rooms[i % len(rooms)].price,
+            )
+            for i in range(rows)
+        )
+        _claim_room_nights(bookings)
+        # bulk_create() skips save(), so count the seed data in the running totals
+        record_bookings(bookings)
+        Reservation.objects.bulk_create(
+            Reservation(
+                user=users[i % len(users)], reserved_name=f"Guest {i}", phone="0700000000",
+                email="guest@example.com", people=2 + i % 6,
+                date=start + timedelta(days=i // 20), time=f"{12 + i % 9}:00",
+            )
+            for i in range(rows)
+        )
+        EventBooking.objects.bulk_create(
+            EventBooking(
+                user=users[i % len(users)], customer_name=f"Guest {i}", email="guest@example.com",
+                phone="0700000000", date=start + timedelta(days=i // 5), attendees=50,
+                is_canceled=i % 7 == 0,
+            )
+            for i in range(rows)
+        )
+        recount_seating({start + timedelta(days=i // 20) for i in range(rows)})
+        tickets = Ticket.objects.bulk_create(
+            Ticket(user=b.user, ticket_number=f"BENCH{i:06d}", booking_type="room", room_booking=b)
+            for i, b in enumerate(bookings[:200])
+        )
+        return {"staff": staff, "guest": guest, "rooms": rooms, "tickets": tickets}
+
+    # ==========================
+    # SCENARIOS
+    # ==========================
+
+    def make_operation(self, name, data):
+        """A zero-argument callable performing one operation; returns False on an unexpected result."""
+        rng = random.Random()
+
+        if name == "ticket_pdf":
+            tickets = list(Ticket.objects.filter(pk__in=[t.pk for t in data["tickets"]])
+                           .select_related("room_booking__room"))
+
+            cache = get_ticket_pdf_cache()
+
+            def op():
+                return os.path.exists(cache.render(rng.choice(tickets)))
+            return op
+
+        client = Client(raise_request_exception=False)
+        client.force_login(data["staff"] if name == "admin_dashboard" else data["guest"])
+
+        if name == "rooms_search":
+            url = reverse("rooms")
+
+            def op():
+                check_in = date.today() + timedelta(days=rng.randrange(1, 60))
+                check_out = check_in + timedelta(days=rng.randint(1, 5))
+                response = client.get(url, {"check_in": check_in, "check_out": check_out, "capacity": 2})
+                return response.status_code == 200
+            return op
+
+        if name == "book_room":
+            rooms = data["rooms"]
+
+            def op():
+                # Far enough ahead not to collide with seeded stays; a clash
+                # between benchmark bookings is still a valid (redirect) outcome
+                check_in = date.today() + timedelta(days=rng.randrange(400, 4000))
+                response = client.post(reverse("book_room", args=[rng.choice(rooms).pk]), {
+                    "customer_name": "Bench Guest", "email": "bench@example.com", "phone": "0700000000",
+                    "age": 30, "id_number": "0", "people": 1, "message": "",
+                    "check_in": check_in, "check_out": check_in + timedelta(days=rng.randint(1, 3)),
+                })
+                return response.status_code in (200, 302)
+            return op
+
+        url = reverse("admin_dashboard" if name == "admin_dashboard" else "profile")
+
+        def op():
+            return client.get(url).status_code == 200
+        return op
+
+    def run_single(self, name, data, iterations):
+        op = self.make_operation(name, data)
+        op()  # warm-up: imports, template loading, first cache fill
+        latencies, queries, errors = [], [], 0
+        for _ in range(iterations):
+            with CaptureQueriesContext(connection) as captured:
+                started = time.perf_counter()
+                ok = op()
+                latencies.append(time.perf_counter() - started)
+            queries.append(len(captured.captured_queries))
+            errors += not ok
+        total = sum(latencies)
+        return {
+            "latency": latency_summary(latencies),
+            "ops_per_second": round(len(latencies) / total, 1) if total else 0.0,
+            "queries_mean": round(sum(queries) / len(queries), 2) if queries else 0,
+            "queries_max": max(queries) if queries else 0,
+            "errors": errors,
+        }
+
+    def run_threaded(self, name, data, threads, iterations):
+        latencies, errors = [], [0]
+        lock = threading.Lock()
+        gate = threading.Barrier(threads)
+
+        def worker():
+            local, failed = [], 0
+            try:
+                op = self.make_operation(name, data)
+                gate.wait()
+                for _ in range(iterations):
+                    started = time.perf_counter()
+                    try:
+                        ok = op()
+                    except Exception:
+                        ok = False
+                    local.append(time.perf_counter() - started)
+                    failed += not ok
+            finally:
+                connection.close()
+            with lock:
+                latencies.extend(local)
+                errors[0] += failed
+
+        pool = [threading.Thread(target=worker) for _ in range(threads)]
+        started = time.perf_counter()
+        for t in pool:
+            t.start()
+        for t in pool:
+            t.join()
+        elapsed = time.perf_counter() - started
+        return {
+            "threads": threads,
+            "latency": latency_summary(latencies),
+            "ops_per_second": round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+            "errors": errors[0],
+        }
+
+    def handle(self, *args, **options):
+        scenarios = SCENARIOS
+        if options["only"]:
+            scenarios = [s.strip() for s in options["only"].split(",")]
+            unknown = set(scenarios) - set(SCENARIOS)
+            if unknown:
+                raise CommandError(f"Unknown scenario(s): {', '.join(sorted(unknown))}")
+
+        report = {
+            "revision": git_revision(),
+            "timestamp": timezone.now().isoformat(),
+            "database": connection.vendor,
+            "seed": {k: options[k] for k in ("rooms", "bookings", "users")},
+            "scenarios": {},
+        }
+
+        pdf_dir = tempfile.mkdtemp(prefix="bench-tickets-")
+        get_ticket_pdf_cache.cache_clear()
+        try:
+            with scratch_database(), override_settings(ALLOWED_HOSTS=["testserver"], TICKET_PDF_CACHE_DIR=pdf_dir):
+                seed_started = time.perf_counter()
+                data = self.seed(options)
+                report["seed"]["seconds"] = round(time.perf_counter() - seed_started, 2)
+
+                for name in scenarios:
+                    result = self.run_single(name, data, options["iterations"])
+                    if options["threads"]:
+                        result["threaded"] = self.run_threaded(
+                            name, data, options["threads"], options["thread_iterations"]
+                        )
+                    report["scenarios"][name] = result
+                    self.stderr.write(
+                        f"{name:16} p50 {result['latency']['p50_ms']:8.2f} ms  "
+                        f"p99 {result['latency']['p99_ms']:8.2f} ms  "
+                        f"{result['ops_per_second']:7.1f} ops/s  "
+                        f"{result['queries_mean']:6.1f} queries"
+                        + (f"  | {result['threaded']['ops_per_second']:7.1f} ops/s x{options['threads']}"
+                           if options["threads"] else "")
+                    )
+        finally:
+            get_ticket_pdf_cache.cache_clear()
+            shutil.rmtree(pdf_dir, ignore_errors=True)
+
+        output = json.dumps(report, indent=2)
+        if options["output"]:
+            with open(options["output"], "w") as f:
+                f.write(output + "\n")
+        self.stdout.write(output)
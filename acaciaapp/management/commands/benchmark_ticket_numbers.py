@@ -0,0 +1,67 @@
+import random
+import string
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from acaciaapp.benchmarking import scratch_database
+from acaciaapp.models import Ticket
+from acaciaapp.ticket_numbers import TicketNumberAllocator
+
+BENCHMARK_TYPE = "benchmark"
+
+
+def legacy_generate_ticket_number():
+    """The old allocator: random code plus an exists() check per attempt."""
+    while True:
+        code = ''.join(random.choices(string.ascii_uppercase + string.digits, k=8))
+        if not Ticket.objects.filter(ticket_number=code).exists():
+            return code
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare ticket number allocation cost as the ticket table grows. "
+        "Runs in a throwaway database that is dropped afterwards."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--sizes", default="0,1000,10000",
+                            help="Comma-separated ticket table sizes to measure at, e.g. 0,100000,1000000.")
+        parser.add_argument("--samples", type=int, default=1000, help="Allocations per measurement.")
+
+    def measure(self, allocate, samples):
+        with CaptureQueriesContext(connection) as queries:
+            start = time.perf_counter()
+            for _ in range(samples):
+                allocate()
+            elapsed = time.perf_counter() - start
+        return elapsed / samples * 1e6, len(queries) / samples
+
+    def seed(self, count, batch_size=10000):
+        base = Ticket.objects.filter(booking_type=BENCHMARK_TYPE).count()
+        for offset in range(0, count, batch_size):
+            n = min(batch_size, count - offset)
+            Ticket.objects.bulk_create(
+                Ticket(ticket_number=f"BENCH-{base + offset + i}", booking_type=BENCHMARK_TYPE)
+                for i in range(n)
+            )
+
+    def handle(self, *args, **options):
+        sizes = sorted(int(s) for s in options["sizes"].split(","))
+        samples = options["samples"]
+
+        with scratch_database():
+            allocator = TicketNumberAllocator(name=BENCHMARK_TYPE)
+            self.stdout.write(f"{'rows':>10}  {'legacy us':>10}  {'legacy q':>8}  {'seq us':>8}  {'seq q':>6}")
+            for size in sizes:
+                rows = Ticket.objects.count()
+                if size > rows:
+                    self.seed(size - rows)
+                    rows = size
+
+                legacy_us, legacy_q = self.measure(legacy_generate_ticket_number, samples)
+                seq_us, seq_q = self.measure(allocator.allocate, samples)
+                self.stdout.write(f"{rows:>10}  {legacy_us:>10.1f}  {legacy_q:>8.2f}  {seq_us:>8.1f}  {seq_q:>6.2f}")
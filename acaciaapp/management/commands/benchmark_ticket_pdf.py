@@ -0,0 +1,50 @@
+import io
+import time
+from datetime import date, time as dtime
+
+from django.core.management.base import BaseCommand
+
+from acaciaapp.models import EventBooking, Reservation, Room, RoomBooking, Ticket
+from acaciaapp.utils import TicketTemplate, get_ticket_template, render_ticket_pdf
+
+
+def sample_tickets():
+    """Unsaved tickets of every booking type; nothing touches the database."""
+    room = Room(room_number="101", capacity=2, price=5000, description="Wifi, AC")
+    return [
+        Ticket(ticket_number="BENCH001", booking_type="room", room_booking=RoomBooking(
+            room=room, customer_name="Jane Wanjiku", people=2,
+            check_in=date(2026, 1, 10), check_out=date(2026, 1, 14))),
+        Ticket(ticket_number="BENCH002", booking_type="reservation", reservation_booking=Reservation(
+            reserved_name="Jane Wanjiku", people=4, date=date(2026, 1, 10), time=dtime(19, 30))),
+        Ticket(ticket_number="BENCH003", booking_type="event", event_booking=EventBooking(
+            customer_name="Jane Wanjiku", event_name="Wedding", attendees=120, date=date(2026, 2, 14))),
+    ]
+
+
+class Command(BaseCommand):
+    help = "Measure ticket PDF throughput with and without the cached ticket template."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--count", type=int, default=200, help="Tickets to render per run.")
+
+    def run(self, count, make_template):
+        tickets = sample_tickets()
+        start = time.perf_counter()
+        for i in range(count):
+            render_ticket_pdf(tickets[i % len(tickets)], io.BytesIO(), template=make_template())
+        return count / (time.perf_counter() - start)
+
+    def handle(self, *args, **options):
+        count = options["count"]
+
+        # Before: static artwork rebuilt for every ticket (the old behaviour)
+        before = self.run(count, TicketTemplate)
+
+        # After: template built once per process
+        get_ticket_template()
+        after = self.run(count, get_ticket_template)
+
+        self.stdout.write(f"uncached template: {before:8.1f} tickets/s")
+        self.stdout.write(f"cached template:   {after:8.1f} tickets/s")
+        self.stdout.write(f"speedup:           {after / before:8.2f}x")
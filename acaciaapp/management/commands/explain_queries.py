@@ -0,0 +1,172 @@
+import json
+import shutil
+import tempfile
+from datetime import date, time, timedelta
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import reverse
+
+from acaciaapp.benchmarking import scratch_database
+from acaciaapp.models import EventBooking, Reservation, Room, RoomBooking, RoomNight, Ticket
+from acaciaapp.ticket_cache import get_ticket_pdf_cache
+
+
+def is_full_scan(plan_line):
+    """A plan step that reads a whole table rather than an index range."""
+    if connection.vendor == "postgresql":
+        return "Seq Scan" in plan_line
+    # SQLite: "SCAN t" is a table scan, "SCAN t USING [COVERING] INDEX i" walks an index
+    detail = plan_line.strip()
+    return detail.startswith("SCAN ") and " USING " not in detail
+
+
+def explain(sql):
+    prefix = "EXPLAIN QUERY PLAN " if connection.vendor == "sqlite" else "EXPLAIN "
+    with connection.cursor() as cursor:
+        cursor.execute(prefix + sql)
+        rows = cursor.fetchall()
+    # SQLite returns (id, parent, notused, detail); PostgreSQL one text column
+    return [row[-1] for row in rows]
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed booking data, request the hot views and run EXPLAIN on every "
+        "query they issue. Fails when a booking table is read with a full "
+        "scan. Runs in a throwaway database (with empty caches and a temporary "
+        "ticket PDF directory) that is dropped afterwards."
+    )
+
+    # Tables small or read in full by design, where a scan is not a regression
+    ALLOWED_SCANS = ("django_session", "auth_user", "django_content_type")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=2000, help="Bookings to seed per booking table.")
+        parser.add_argument("--rooms", type=int, default=100)
+        parser.add_argument("--json", action="store_true", help="Print a machine-readable report.")
+
+    def seed(self, rows, room_count):
+        staff = User.objects.create_user("plan-staff", "staff@example.com", "x", is_staff=True)
+        guest = User.objects.create_user("plan-guest", "guest@example.com", "x")
+        users = [staff, guest] + User.objects.bulk_create(
+            User(username=f"plan-user-{i}", email=f"user{i}@example.com") for i in range(50)
+        )
+
+        rooms = Room.objects.bulk_create(
+            Room(room_number=f"P{i:04d}", capacity=1 + i % 4, price=3000 + 500 * (i % 6),
+                 description="Wifi, AC", image="rooms/economy.jpg")
+            for i in range(room_count)
+        )
+
+        start = date.today() - timedelta(days=rows // 10)
+        bookings = RoomBooking.objects.bulk_create(
+            RoomBooking(
+                user=users[i % len(users)], room=rooms[i % len(rooms)],
+                customer_name=f"Guest {i}", email="guest@example.com", phone="0700000000",
+                age=30, id_number=str(i), people=2,
+                check_in=start + timedelta(days=i // len(rooms) * 3),
+                check_out=start + timedelta(days=i // len(rooms) * 3 + 2),
+                is_cleared=i % 3 == 0, nightly_rate=rooms[i % len(rooms)].price,
+            )
+            for i in range(rows)
+        )
+        # bulk_create skips RoomBooking.save(), so hold the nights explicitly
+        RoomNight.objects.bulk_create(
+            (RoomNight(room=b.room, night=night, booking=b) for b in bookings if not b.is_cleared for night in b.nights()),
+            ignore_conflicts=True
+        )
+        Reservation.objects.bulk_create(
+            Reservation(
+                user=users[i % len(users)], reserved_name=f"Guest {i}", phone="0700000000",
+                email="guest@example.com", people=2 + i % 6,
+                date=start + timedelta(days=i // 20), time=time(12 + i % 9),
+            )
+            for i in range(rows)
+        )
+        EventBooking.objects.bulk_create(
+            EventBooking(
+                user=users[i % len(users)], customer_name=f"Guest {i}", email="guest@example.com",
+                phone="0700000000", date=start + timedelta(days=i // 5), attendees=50,
+                is_canceled=i % 7 == 0,
+            )
+            for i in range(rows)
+        )
+        tickets = Ticket.objects.bulk_create(
+            Ticket(user=b.user, ticket_number=f"PLAN{i:06d}", booking_type="room", room_booking=b)
+            for i, b in enumerate(bookings)
+        )
+        return staff, guest, rooms[0], tickets[1]
+
+    def views(self, room, ticket):
+        check_in = date.today() + timedelta(days=7)
+        check_out = check_in + timedelta(days=3)
+        return [
+            ("rooms (search)", "get", f"{reverse('rooms')}?check_in={check_in}&check_out={check_out}&capacity=2", None),
+            ("book_room", "get", reverse("book_room", args=[room.id]), None),
+            ("profile", "get", reverse("profile"), None),
+            ("admin_dashboard", "get", reverse("admin_dashboard"), None),
+            ("ticket_view", "get", reverse("ticket_download", args=[ticket.id]), None),
+            ("ticket_scan", "post", reverse("ticket_scan"), {"ticket_numbers": [ticket.ticket_number, "NOTATICKET"]}),
+        ]
+
+    def run_views(self, options, report):
+        staff, guest, room, ticket = self.seed(options["rows"], options["rooms"])
+        ticket.user = staff
+        ticket.save(update_fields=["user"])
+
+        client = Client(raise_request_exception=False)
+        client.force_login(staff)
+
+        for name, method, url, payload in self.views(room, ticket):
+            with CaptureQueriesContext(connection) as captured:
+                if method == "post":
+                    response = client.post(url, json.dumps(payload), content_type="application/json")
+                else:
+                    response = client.get(url)
+
+            queries = []
+            for query in captured.captured_queries:
+                sql = query["sql"]
+                if not sql.lstrip().upper().startswith("SELECT"):
+                    continue
+                plan = explain(sql)
+                scans = [
+                    line for line in plan
+                    if is_full_scan(line) and not any(t in line for t in self.ALLOWED_SCANS)
+                ]
+                queries.append({"sql": sql, "plan": plan, "full_scans": scans})
+
+            report.append({"view": name, "status": response.status_code, "queries": queries})
+
+    def handle(self, *args, **options):
+        report = []
+        pdf_dir = tempfile.mkdtemp(prefix="plan-tickets-")
+        get_ticket_pdf_cache.cache_clear()
+        try:
+            with scratch_database(), override_settings(ALLOWED_HOSTS=["testserver"], TICKET_PDF_CACHE_DIR=pdf_dir):
+                self.run_views(options, report)
+        finally:
+            get_ticket_pdf_cache.cache_clear()
+            shutil.rmtree(pdf_dir, ignore_errors=True)
+
+        regressions = [(v["view"], q) for v in report for q in v["queries"] if q["full_scans"]]
+
+        if options["json"]:
+            self.stdout.write(json.dumps(report, indent=2))
+        else:
+            for view in report:
+                self.stdout.write(f"\n== {view['view']} (HTTP {view['status']}, {len(view['queries'])} selects)")
+                for q in view["queries"]:
+                    flag = "FULL SCAN" if q["full_scans"] else "ok"
+                    self.stdout.write(f"  [{flag}] {q['sql'][:150]}")
+                    for line in q["plan"]:
+                        self.stdout.write(f"      {line}")
+
+        if regressions:
+            names = sorted({view for view, _ in regressions})
+            raise CommandError(f"{len(regressions)} queries use full table scans in: {', '.join(names)}")
+        self.stdout.write(self.style.SUCCESS("\nNo full table scans on booking tables."))
@@ -0,0 +1,41 @@
+import os
+import sys
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from acaciaapp.bulk_io import EXPORT_MODELS, FORMATS, export_rows
+
+
+class Command(BaseCommand):
+    help = "Stream room bookings, reservations, event bookings or tickets to CSV or JSONL in constant memory."
+
+    def add_arguments(self, parser):
+        parser.add_argument("model", choices=sorted(EXPORT_MODELS))
+        parser.add_argument("--output", "-o", default="-", help="File to write (default: stdout).")
+        parser.add_argument("--format", choices=FORMATS, help="Default: from the output extension, else csv.")
+        parser.add_argument("--chunk-size", type=int, default=2000, help="Rows fetched per database round trip.")
+
+    def handle(self, *args, **options):
+        model = EXPORT_MODELS[options["model"]]
+        output = options["output"]
+        fmt = options["format"] or ("jsonl" if output.endswith(".jsonl") else "csv")
+
+        started = time.perf_counter()
+        if output == "-":
+            count = export_rows(model, sys.stdout, fmt, options["chunk_size"])
+        else:
+            tmp_path = f"{output}.tmp"
+            try:
+                with open(tmp_path, "w", newline="", encoding="utf-8") as out:
+                    count = export_rows(model, out, fmt, options["chunk_size"])
+                os.replace(tmp_path, output)
+            except OSError as exc:
+                raise CommandError(f"Could not write {output}: {exc}")
+            finally:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+
+        self.stderr.write(self.style.SUCCESS(
+            f"Exported {count} {options['model']} as {fmt} in {time.perf_counter() - started:.1f}s."
+        ))
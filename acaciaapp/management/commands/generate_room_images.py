@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+
+from acaciaapp.models import Room
+from acaciaapp.room_images import generate_derivatives
+
+
+class Command(BaseCommand):
+    help = "Generate thumb/card/hero WebP and JPEG derivatives for room images."
+
+    def add_arguments(self, parser):
+        parser.add_argument("room_numbers", nargs="*", help="Limit to these rooms (default: all).")
+        parser.add_argument("--force", action="store_true", help="Regenerate derivatives that already exist.")
+
+    def handle(self, *args, **options):
+        rooms = Room.objects.exclude(image="")
+        if options["room_numbers"]:
+            rooms = rooms.filter(room_number__in=options["room_numbers"])
+
+        written = 0
+        for room in rooms.only("id", "room_number", "image"):
+            try:
+                written += len(generate_derivatives(room.image.name, force=options["force"]))
+            except (OSError, ValueError) as exc:
+                self.stderr.write(f"Room {room.room_number}: {exc}")
+        self.stdout.write(self.style.SUCCESS(f"{written} derivative(s) written."))
@@ -0,0 +1,54 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DatabaseError
+
+from acaciaapp.bulk_io import EXPORT_MODELS, FORMATS, import_rows, read_rows
+
+
+class Command(BaseCommand):
+    help = (
+        "Bulk import room bookings, reservations, event bookings or tickets from CSV or JSONL "
+        "(as written by export_bookings). Rows are inserted with bulk_create, one transaction per batch."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("model", choices=sorted(EXPORT_MODELS))
+        parser.add_argument("path")
+        parser.add_argument("--format", choices=FORMATS, help="Default: from the file extension, else csv.")
+        parser.add_argument("--batch-size", type=int, default=1000)
+        parser.add_argument("--no-ids", action="store_true",
+                            help="Ignore the id column and let the database assign new ids.")
+
+    def handle(self, *args, **options):
+        model = EXPORT_MODELS[options["model"]]
+        path = options["path"]
+        fmt = options["format"] or ("jsonl" if path.endswith(".jsonl") else "csv")
+        started = time.perf_counter()
+
+        def progress(stats):
+            if options["verbosity"] > 1:
+                self.stdout.write(f"  {stats['rows']} rows ({stats['batches']} batches)")
+
+        try:
+            with open(path, newline="", encoding="utf-8") as stream:
+                stats = import_rows(
+                    model, read_rows(stream, fmt),
+                    batch_size=options["batch_size"],
+                    keep_ids=not options["no_ids"],
+                    on_batch=progress,
+                )
+        except OSError as exc:
+            raise CommandError(f"Could not read {path}: {exc}")
+        except (ValueError, DatabaseError) as exc:
+            raise CommandError(f"Import stopped, earlier batches were committed: {exc}")
+
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {stats['rows']} {options['model']} in {stats['batches']} batches, "
+            f"{elapsed:.1f}s ({stats['rows'] / elapsed if elapsed else 0:.0f} rows/s)."
+        ))
+        if stats["night_conflicts"]:
+            self.stdout.write(self.style.WARNING(
+                f"{stats['night_conflicts']} room-nights were already held by other bookings and were not claimed."
+            ))
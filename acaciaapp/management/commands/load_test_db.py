@@ -0,0 +1,121 @@
+import json
+import threading
+import time
+from collections import Counter
+from datetime import date, timedelta
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import OperationalError, connection, transaction
+
+from acaciaapp.benchmarking import percentile, scratch_database
+from acaciaapp.models import Reservation
+from acaciaapp.seating import SlotFull
+
+LOAD_TEST_NAME = "LOADTEST"
+
+
+class Command(BaseCommand):
+    help = (
+        "Concurrent write load test against the configured database profile. "
+        "Each operation is a booking-shaped transaction (count, claim a seat, insert), "
+        "spread over the day's reservation slots, in a throwaway database dropped afterwards. "
+        "Compare profiles by re-running with e.g. SQLITE_TUNED=0 or DB_ENGINE=postgresql."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--threads", type=int, default=8)
+        parser.add_argument("--writes", type=int, default=25, help="Transactions per thread.")
+        parser.add_argument("--json", action="store_true", help="Print the result as JSON.")
+
+    def describe_profile(self):
+        db = settings.DATABASES["default"]
+        profile = {
+            "vendor": connection.vendor,
+            "conn_max_age": db.get("CONN_MAX_AGE", 0),
+            "pool": bool(db.get("OPTIONS", {}).get("pool")),
+        }
+        if connection.vendor == "sqlite":
+            with connection.cursor() as cursor:
+                for pragma in ("journal_mode", "synchronous", "busy_timeout"):
+                    cursor.execute(f"PRAGMA {pragma}")
+                    profile[pragma] = cursor.fetchone()[0]
+            profile["transaction_mode"] = db.get("OPTIONS", {}).get("transaction_mode", "DEFERRED")
+        return profile
+
+    def worker(self, user, options, start_gate, latencies, stats, lock):
+        day = date.today() + timedelta(days=365)
+        local = []
+        outcomes = Counter()
+        start_gate.wait()
+        try:
+            for n in range(options["writes"]):
+                slot = n * settings.RESERVATION_SLOT_MINUTES % (24 * 60)
+                started = time.perf_counter()
+                try:
+                    with transaction.atomic():
+                        Reservation.objects.filter(date=day).count()
+                        Reservation.objects.create(
+                            user=user, reserved_name=LOAD_TEST_NAME, phone="0700000000",
+                            email="load@example.com", people=1, date=day,
+                            time=f"{slot // 60:02d}:{slot % 60:02d}",
+                        )
+                    outcomes["ok"] += 1
+                    local.append(time.perf_counter() - started)
+                except SlotFull:
+                    outcomes["slot_full"] += 1
+                except OperationalError:
+                    # SQLite "database is locked" once busy_timeout runs out
+                    outcomes["db_busy"] += 1
+        finally:
+            connection.close()
+        with lock:
+            latencies.extend(local)
+            stats.update(outcomes)
+
+    def handle(self, *args, **options):
+        with scratch_database():
+            profile = self.describe_profile()
+            user = User.objects.create(username="loadtest-user")
+
+            latencies, stats = [], Counter()
+            lock = threading.Lock()
+            start_gate = threading.Barrier(options["threads"])
+            threads = [
+                threading.Thread(target=self.worker, args=(user, options, start_gate, latencies, stats, lock))
+                for _ in range(options["threads"])
+            ]
+
+            started = time.perf_counter()
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+            elapsed = time.perf_counter() - started
+
+        result = {
+            "profile": profile,
+            "threads": options["threads"],
+            "attempted": options["threads"] * options["writes"],
+            "committed": stats["ok"],
+            "db_busy": stats["db_busy"],
+            "slot_full": stats["slot_full"],
+            "seconds": round(elapsed, 3),
+            "writes_per_second": round(stats["ok"] / elapsed, 1) if elapsed else 0.0,
+            "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+            "p95_ms": round(percentile(latencies, 95) * 1000, 2),
+            "p99_ms": round(percentile(latencies, 99) * 1000, 2),
+        }
+
+        if options["json"]:
+            self.stdout.write(json.dumps(result, indent=2))
+            return
+
+        self.stdout.write(f"Profile: {', '.join(f'{k}={v}' for k, v in profile.items())}")
+        self.stdout.write(
+            f"{result['committed']}/{result['attempted']} writes committed in {result['seconds']}s "
+            f"({result['writes_per_second']}/s) from {result['threads']} threads, "
+            f"{result['db_busy']} failed as database busy, {result['slot_full']} turned away as slot full"
+        )
+        self.stdout.write(f"Latency p50 {result['p50_ms']} ms, p95 {result['p95_ms']} ms, p99 {result['p99_ms']} ms")
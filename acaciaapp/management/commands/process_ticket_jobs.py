@@ -0,0 +1,94 @@
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+from django.utils import timezone
+
+from acaciaapp import metrics
+from acaciaapp.models import Ticket, TicketJob
+from acaciaapp.utils import fulfil_ticket
+
+
+class Command(BaseCommand):
+    help = "Render and email queued tickets (run alongside the web server)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--once", action="store_true", help="Process one batch and exit.")
+        parser.add_argument("--batch-size", type=int, default=20)
+        parser.add_argument("--poll-interval", type=float, default=2.0, help="Seconds to sleep when idle.")
+        parser.add_argument("--backoff", type=float, default=30.0, help="Base retry delay in seconds.")
+        parser.add_argument("--lock-timeout", type=int, default=300,
+                            help="Seconds after which a job claimed by a dead worker is retried.")
+
+    def handle(self, *args, **options):
+        while True:
+            processed = self.run_batch(options)
+            if processed:
+                metrics.export("process_ticket_jobs")
+            if options["once"]:
+                break
+            if not processed:
+                time.sleep(options["poll_interval"])
+
+    def claimable(self, now, lock_timeout):
+        stale = now - timedelta(seconds=lock_timeout)
+        return TicketJob.objects.filter(
+            finished_at__isnull=True
+        ).filter(
+            Q(locked_at__isnull=True) | Q(locked_at__lt=stale)
+        )
+
+    def run_batch(self, options):
+        now = timezone.now()
+        job_ids = list(
+            self.claimable(now, options["lock_timeout"])
+            .filter(run_after__lte=now)
+            .order_by("run_after")
+            .values_list("id", flat=True)[:options["batch_size"]]
+        )
+
+        processed = 0
+        for job_id in job_ids:
+            # Conditional UPDATE: only one worker wins the claim
+            claimed = self.claimable(now, options["lock_timeout"]).filter(id=job_id).update(locked_at=now)
+            if not claimed:
+                continue
+
+            job = TicketJob.objects.select_related(
+                "ticket__user",
+                "ticket__room_booking__room",
+                "ticket__reservation_booking",
+                "ticket__event_booking",
+            ).get(id=job_id)
+            self.run_job(job, options["backoff"])
+            processed += 1
+
+        return processed
+
+    def run_job(self, job, backoff):
+        ticket = job.ticket
+        try:
+            fulfil_ticket(ticket)
+        except Exception as exc:
+            job.attempts += 1
+            job.last_error = f"{type(exc).__name__}: {exc}"
+            job.locked_at = None
+
+            if job.attempts >= job.max_attempts:
+                job.finished_at = timezone.now()
+                ticket.fulfilment_status = Ticket.STATUS_FAILED
+                ticket.save(update_fields=["fulfilment_status"])
+                self.stderr.write(f"{ticket}: giving up after {job.attempts} attempts ({job.last_error})")
+            else:
+                delay = backoff * (2 ** (job.attempts - 1))
+                job.run_after = timezone.now() + timedelta(seconds=delay)
+                self.stderr.write(f"{ticket}: attempt {job.attempts} failed, retrying in {delay:.0f}s")
+
+            job.save()
+            return
+
+        job.finished_at = timezone.now()
+        job.locked_at = None
+        job.save(update_fields=["finished_at", "locked_at"])
+        self.stdout.write(f"{ticket}: {ticket.fulfilment_status}")
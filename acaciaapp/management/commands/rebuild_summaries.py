@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from acaciaapp.reports import rebuild
+
+
+class Command(BaseCommand):
+    help = "Recompute the daily and monthly occupancy/revenue summaries from the bookings table."
+
+    def handle(self, *args, **options):
+        days, room_months = rebuild()
+        self.stdout.write(self.style.SUCCESS(
+            f"Summaries rebuilt: {days} day(s), {room_months} room-month(s)."
+        ))
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from acaciaapp.seating import recount
+
+
+class Command(BaseCommand):
+    help = "Rebuild the per-slot reservation seat counters from the Reservation table."
+
+    def handle(self, *args, **options):
+        slots = recount()
+        self.stdout.write(self.style.SUCCESS(f"{slots} slot(s) recounted."))
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from acaciaapp.venues import recount
+
+
+class Command(BaseCommand):
+    help = "Rebuild the per-day venue capacity counters from the EventBooking table."
+
+    def handle(self, *args, **options):
+        days = recount()
+        self.stdout.write(self.style.SUCCESS(f"{days} venue-day(s) recounted."))
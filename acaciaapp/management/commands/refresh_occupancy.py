@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from acaciaapp.models import Room
+
+
+class Command(BaseCommand):
+    help = "Recompute Room.is_occupied from active bookings, writing only rooms that are wrong."
+
+    def add_arguments(self, parser):
+        parser.add_argument("room_numbers", nargs="*", help="Limit to these rooms (default: all).")
+
+    def handle(self, *args, **options):
+        rooms = Room.objects.all()
+        if options["room_numbers"]:
+            rooms = rooms.filter(room_number__in=options["room_numbers"])
+
+        changed = rooms.refresh_occupancy()
+        self.stdout.write(self.style.SUCCESS(f"{changed} room(s) updated."))
@@ -0,0 +1,132 @@
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from datetime import datetime
+
+import django
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from acaciaapp.models import Ticket
+from acaciaapp.ticket_cache import get_ticket_pdf_cache
+
+
+def render_chunk(tickets, force=False):
+    """Worker: cache each ticket's PDF. Returns (ticket ids written, [(number, error)])."""
+    cache = get_ticket_pdf_cache()
+    written, errors = [], []
+    for ticket in tickets:
+        try:
+            if force:
+                cache.render(ticket)
+            else:
+                cache.get_or_render(ticket)
+            written.append(ticket.id)
+        except Exception as exc:
+            errors.append((ticket.ticket_number, f"{type(exc).__name__}: {exc}"))
+    return written, errors
+
+
+def parse_date(value):
+    try:
+        return datetime.strptime(value, "%Y-%m-%d").date()
+    except ValueError:
+        raise CommandError(f"Invalid date {value!r}, expected YYYY-MM-DD.")
+
+
+class Command(BaseCommand):
+    help = (
+        "Render ticket PDFs into the download cache (TICKET_PDF_CACHE_DIR) in a process "
+        "pool, e.g. to warm it after bumping TicketTemplate.VERSION. By default only "
+        "active tickets, and only those not cached yet."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--ticket", action="append", default=[], metavar="NUMBER",
+                            help="Only this ticket number (repeatable).")
+        parser.add_argument("--type", action="append", default=[], choices=["room", "reservation", "event"],
+                            help="Only this booking type (repeatable).")
+        parser.add_argument("--since", help="Only tickets created on or after YYYY-MM-DD.")
+        parser.add_argument("--until", help="Only tickets created on or before YYYY-MM-DD.")
+        parser.add_argument("--all", action="store_true", help="Include cleared (inactive) tickets.")
+        parser.add_argument("--force", action="store_true",
+                            help="Re-render tickets that are already cached, replacing their PDFs.")
+        parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+        parser.add_argument("--chunk-size", type=int, default=50, help="Tickets per worker task.")
+        parser.add_argument("--dry-run", action="store_true", help="Only count the matching tickets.")
+
+    def selected(self, options):
+        tickets = Ticket.objects.all()
+        if options["ticket"]:
+            tickets = tickets.filter(ticket_number__in=options["ticket"])
+        if options["type"]:
+            tickets = tickets.filter(booking_type__in=options["type"])
+        if options["since"]:
+            tickets = tickets.filter(created_at__date__gte=parse_date(options["since"]))
+        if options["until"]:
+            tickets = tickets.filter(created_at__date__lte=parse_date(options["until"]))
+        if not options["all"]:
+            tickets = tickets.filter(is_active=True)
+        return tickets
+
+    def chunks(self, tickets, size):
+        chunk = []
+        for ticket in tickets.select_related(
+            "room_booking__room", "reservation_booking", "event_booking",
+        ).order_by("id").iterator(chunk_size=size * 4):
+            chunk.append(ticket)
+            if len(chunk) == size:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+
+    def handle(self, *args, **options):
+        tickets = self.selected(options)
+        total = tickets.count()
+        if options["dry_run"] or not total:
+            self.stdout.write(f"{total} ticket(s) match.")
+            return
+
+        workers = max(1, options["workers"])
+        # Forked workers must not share the parent's database connection
+        connections.close_all()
+
+        done = failed = 0
+        errors = []
+        started = time.perf_counter()
+        with ProcessPoolExecutor(max_workers=workers, initializer=django.setup) as pool:
+            pending = set()
+            chunks = self.chunks(tickets, options["chunk_size"])
+            exhausted = False
+            while pending or not exhausted:
+                # Keep a bounded number of chunks in flight so memory stays flat
+                while not exhausted and len(pending) < workers * 2:
+                    chunk = next(chunks, None)
+                    if chunk is None:
+                        exhausted = True
+                    else:
+                        pending.add(pool.submit(render_chunk, chunk, options["force"]))
+                if not pending:
+                    break
+
+                finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    written, chunk_errors = future.result()
+                    done += len(written)
+                    failed += len(chunk_errors)
+                    errors.extend(chunk_errors)
+
+                elapsed = time.perf_counter() - started
+                self.stdout.write(
+                    f"{done + failed}/{total} ({(done + failed) / total:.0%}), "
+                    f"{done / elapsed:.0f} tickets/s"
+                )
+
+        elapsed = time.perf_counter() - started
+        for number, error in errors[:20]:
+            self.stderr.write(f"Ticket {number}: {error}")
+        self.stdout.write(self.style.SUCCESS(
+            f"Regenerated {done} ticket(s) in {elapsed:.1f}s ({done / elapsed:.0f}/s) "
+            f"with {workers} worker(s); {failed} failed."
+        ))
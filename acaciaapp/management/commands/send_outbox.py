@@ -0,0 +1,62 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from acaciaapp import metrics
+from acaciaapp.outbox import OutboxSender
+
+
+class Command(BaseCommand):
+    help = "Send queued outbox emails in batches over one mail connection (run alongside the web server)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--once", action="store_true", help="Send one batch and exit.")
+        parser.add_argument("--drain", action="store_true", help="Send until the outbox is empty, then exit.")
+        parser.add_argument("--batch-size", type=int, default=100)
+        parser.add_argument("--poll-interval", type=float, default=2.0, help="Seconds to sleep when idle.")
+        parser.add_argument("--backoff", type=float, default=30.0, help="Base retry delay in seconds.")
+        parser.add_argument("--lock-timeout", type=int, default=300,
+                            help="Seconds after which an email claimed by a dead sender is retried.")
+        parser.add_argument("--file-backend", metavar="DIR",
+                            help="Write messages to DIR with Django's file backend instead of EMAIL_BACKEND "
+                                 "(for offline throughput tests).")
+
+    def handle(self, *args, **options):
+        backend_kwargs = {}
+        backend = None
+        if options["file_backend"]:
+            backend = "django.core.mail.backends.filebased.EmailBackend"
+            backend_kwargs["file_path"] = options["file_backend"]
+
+        sender = OutboxSender(
+            batch_size=options["batch_size"],
+            backoff=options["backoff"],
+            lock_timeout=options["lock_timeout"],
+            backend=backend,
+            **backend_kwargs,
+        )
+
+        total_sent = total_failed = 0
+        started = time.perf_counter()
+        try:
+            while True:
+                batch_started = time.perf_counter()
+                sent, failed = sender.send_batch()
+                total_sent += sent
+                total_failed += failed
+                if sent or failed:
+                    elapsed = time.perf_counter() - batch_started
+                    self.stdout.write(f"Sent {sent}, failed {failed} in {elapsed:.2f}s ({sent / elapsed:.0f}/s)")
+                    metrics.export("send_outbox")
+                if options["once"] or (options["drain"] and not (sent or failed)):
+                    break
+                if not (sent or failed):
+                    time.sleep(options["poll_interval"])
+        finally:
+            sender.close()
+
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f"{total_sent} sent, {total_failed} failed in {elapsed:.2f}s"
+            + (f" ({total_sent / elapsed:.0f}/s)" if elapsed else "")
+        ))
@@ -0,0 +1,100 @@
+import random
+import threading
+import time
+from collections import Counter
+from datetime import date, timedelta
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import OperationalError, connection
+
+from acaciaapp.benchmarking import scratch_database
+from acaciaapp.models import Room, RoomBooking, RoomNight, RoomUnavailable
+
+class Command(BaseCommand):
+    help = (
+        "Hammer RoomBooking creation from many threads at once and verify that "
+        "no room is ever double-booked. Runs in a throwaway database that is dropped afterwards."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--threads", type=int, default=16)
+        parser.add_argument("--attempts", type=int, default=50, help="Booking attempts per thread.")
+        parser.add_argument("--rooms", type=int, default=4)
+        parser.add_argument("--days", type=int, default=20, help="Width of the date window being fought over.")
+
+    def worker(self, user, rooms, options, start_gate, stats, lock):
+        rng = random.Random()
+        first_night = date.today() + timedelta(days=30)
+        start_gate.wait()
+        try:
+            for _ in range(options["attempts"]):
+                check_in = first_night + timedelta(days=rng.randrange(options["days"]))
+                check_out = check_in + timedelta(days=rng.randint(1, 3))
+                try:
+                    RoomBooking.objects.create(
+                        user=user, room=rng.choice(rooms), customer_name="Stress Test",
+                        email="stress@example.com", phone="0700000000", age=30,
+                        id_number="0", people=1, check_in=check_in, check_out=check_out,
+                    )
+                    outcome = "booked"
+                except RoomUnavailable:
+                    outcome = "rejected"
+                except OperationalError:
+                    # e.g. SQLite "database is locked" under write contention
+                    outcome = "db_busy"
+                with lock:
+                    stats[outcome] += 1
+        finally:
+            connection.close()
+
+    def double_bookings(self, rooms):
+        """Pairs of active bookings on the same room whose nights overlap."""
+        clashes = []
+        for room in rooms:
+            taken = {}
+            for booking in RoomBooking.objects.filter(room=room, is_cleared=False).order_by("id"):
+                for night in booking.nights():
+                    if night in taken:
+                        clashes.append((taken[night], booking.id, night))
+                    taken[night] = booking.id
+        return clashes
+
+    def handle(self, *args, **options):
+        with scratch_database():
+            user = User.objects.create(username="stress-user")
+            rooms = [
+                Room.objects.create(
+                    room_number=f"STRESS-{i}", capacity=2, price=1000, description="Stress test room",
+                )
+                for i in range(options["rooms"])
+            ]
+
+            stats = Counter()
+            lock = threading.Lock()
+            start_gate = threading.Barrier(options["threads"])
+            threads = [
+                threading.Thread(target=self.worker, args=(user, rooms, options, start_gate, stats, lock))
+                for _ in range(options["threads"])
+            ]
+
+            started = time.perf_counter()
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+            elapsed = time.perf_counter() - started
+
+            clashes = self.double_bookings(rooms)
+            nights = RoomNight.objects.filter(room__in=rooms).count()
+            total = sum(stats.values())
+
+            self.stdout.write(
+                f"{total} attempts in {elapsed:.2f}s ({total / elapsed:.0f}/s) from {options['threads']} threads: "
+                f"{stats['booked']} booked, {stats['rejected']} rejected as taken, {stats['db_busy']} db busy"
+            )
+            self.stdout.write(f"{nights} room-nights held across {len(rooms)} rooms")
+
+        if clashes:
+            raise CommandError(f"{len(clashes)} double-booked nights, e.g. bookings {clashes[0]}")
+        self.stdout.write(self.style.SUCCESS("No double bookings."))
@@ -0,0 +1,288 @@
+"""
+In-process request metrics in the Prometheus text format.
+
+MetricsMiddleware times every request and, through a per-request
+accumulator, the SQL, template rendering, ticket PDF and email work done
+while serving it. Everything is aggregated per URL name. Each worker
+process keeps its own registry, so scrape every worker (or run a single
+multi-threaded process) when serving with several.
+
+Background commands such as the ticket worker have no endpoint of their
+own: they export() their registry to a file under METRICS_EXPORT_DIR,
+which /metrics merges in with a `source` label, like node_exporter's
+textfile collector.
+"""
+import contextvars
+import os
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from functools import wraps
+
+from django.conf import settings
+from django.template.backends.django import DjangoTemplates, Template
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200, 500)
+INF_LABEL = 'le="+Inf"'
+# Anything else is counted as "other", so made-up methods can't mint series
+HTTP_METHODS = frozenset({"GET", "HEAD", "POST", "PUT", "PATCH", "DELETE", "OPTIONS", "TRACE", "CONNECT"})
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(names, values, extra=()):
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)] + list(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    def __init__(self, name, documentation, labelnames=()):
+        self.name, self.documentation, self.labelnames = name, documentation, tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = tuple(labels[n] for n in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def collect(self, extra=()):
+        with self._lock:
+            values = dict(self._values)
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        for key, value in sorted(values.items()):
+            lines.append(f"{self.name}{_labels(self.labelnames, key, extra)} {_format(value)}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        self.name, self.documentation, self.labelnames = name, documentation, tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self._values = {}  # label values -> [per-bucket counts..., sum, count]
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = tuple(labels[n] for n in self.labelnames)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [0] * len(self.buckets) + [0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state[i] += 1
+            state[-2] += value
+            state[-1] += 1
+
+    def collect(self, extra=()):
+        with self._lock:
+            values = {key: list(state) for key, state in self._values.items()}
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        for key, state in sorted(values.items()):
+            for bound, count in zip(self.buckets, state):
+                le = f'le="{_format(float(bound))}"'
+                lines.append(f"{self.name}_bucket{_labels(self.labelnames, key, [*extra, le])} {count}")
+            lines.append(f"{self.name}_bucket{_labels(self.labelnames, key, [*extra, INF_LABEL])} {state[-1]}")
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, key, extra)} {_format(state[-2])}")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, key, extra)} {state[-1]}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self.metrics = []
+
+    def register(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def render(self, extra=(), exported=None):
+        """
+        The text exposition of every metric. `extra` labels are added to each
+        sample; `exported` maps metric names to sample lines from other
+        processes, appended to the matching family.
+        """
+        lines = []
+        for metric in self.metrics:
+            lines.extend(metric.collect(extra))
+            lines.extend((exported or {}).get(metric.name, ()))
+        return "\n".join(lines) + "\n"
+
+    def family(self, sample):
+        """The registered metric a sample line belongs to, or None."""
+        name = sample.split("{", 1)[0].split(" ", 1)[0]
+        for metric in self.metrics:
+            if name == metric.name or (
+                isinstance(metric, Histogram) and name in (f"{metric.name}_bucket", f"{metric.name}_sum",
+                                                          f"{metric.name}_count")
+            ):
+                return metric.name
+        return None
+
+
+registry = Registry()
+
+REQUESTS = registry.register(Counter(
+    "acacia_requests_total", "Requests served, by URL name, method and status code.",
+    ("view", "method", "status"),
+))
+REQUEST_SECONDS = registry.register(Histogram(
+    "acacia_request_duration_seconds", "Request latency by URL name.", ("view", "method"),
+))
+SQL_QUERIES = registry.register(Histogram(
+    "acacia_request_sql_queries", "SQL queries per request by URL name.", ("view",), buckets=COUNT_BUCKETS,
+))
+SQL_SECONDS = registry.register(Histogram(
+    "acacia_request_sql_seconds", "Time spent in SQL per request by URL name.", ("view",),
+))
+RENDER_SECONDS = registry.register(Histogram(
+    "acacia_request_render_seconds", "Template rendering time per request by URL name.", ("view",),
+))
+PDF_SECONDS = registry.register(Histogram(
+    "acacia_ticket_pdf_seconds", "Time to render one ticket PDF with reportlab.", ("view",),
+))
+EMAIL_SECONDS = registry.register(Histogram(
+    "acacia_email_send_seconds", "Time to send one outbox email over the shared connection.", ("view",),
+))
+
+
+def export(source):
+    """
+    Write this process's metrics, labelled source=<source>, for metrics_view
+    to serve. Called by background commands after each batch of work. There
+    is one file per source, so a second copy of the same command running at
+    once overwrites the first's numbers.
+    """
+    os.makedirs(settings.METRICS_EXPORT_DIR, exist_ok=True)
+    text = registry.render(extra=[f'source="{_escape(source)}"'])
+    fd, tmp = tempfile.mkstemp(dir=settings.METRICS_EXPORT_DIR, suffix=".tmp")
+    with os.fdopen(fd, "w") as f:
+        f.write(text)
+    # Scrapes never see a half-written file
+    os.replace(tmp, os.path.join(settings.METRICS_EXPORT_DIR, f"{source}.prom"))
+
+
+def exported_samples():
+    """Sample lines from every exported file, grouped by metric name."""
+    samples = {}
+    try:
+        names = sorted(os.listdir(settings.METRICS_EXPORT_DIR))
+    except FileNotFoundError:
+        return samples
+    for name in names:
+        if not name.endswith(".prom"):
+            continue
+        try:
+            with open(os.path.join(settings.METRICS_EXPORT_DIR, name)) as f:
+                lines = f.read().splitlines()
+        except FileNotFoundError:
+            continue
+        for line in lines:
+            family = registry.family(line) if line and not line.startswith("#") else None
+            if family:
+                samples.setdefault(family, []).append(line)
+    return samples
+
+
+# Work attributed to the request being served on this thread, if any
+_request_stats = contextvars.ContextVar("acacia_request_stats", default=None)
+UNMATCHED = "<unmatched>"
+BACKGROUND = "<background>"
+
+
+def _current_view():
+    stats = _request_stats.get()
+    return stats["view"] if stats else BACKGROUND
+
+
+@contextmanager
+def timed(histogram):
+    """Observe the block's duration on `histogram`, labelled with the current view."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        histogram.observe(time.perf_counter() - started, view=_current_view())
+
+
+def timed_function(histogram):
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            with timed(histogram):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+class TimedTemplate(Template):
+    def render(self, context=None, request=None):
+        started = time.perf_counter()
+        try:
+            return super().render(context, request)
+        finally:
+            stats = _request_stats.get()
+            if stats is not None:
+                stats["render"] += time.perf_counter() - started
+
+
+class TimedDjangoTemplates(DjangoTemplates):
+    """The stock Django template backend, timing each top-level render."""
+
+    def from_string(self, template_code):
+        return TimedTemplate(self.engine.from_string(template_code), self)
+
+    def get_template(self, template_name):
+        template = super().get_template(template_name)
+        return TimedTemplate(template.template, self)
+
+
+class MetricsMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        from django.db import connection
+
+        stats = {"view": UNMATCHED, "sql_count": 0, "sql": 0.0, "render": 0.0}
+        token = _request_stats.set(stats)
+
+        def sql_timer(execute, sql, params, many, context):
+            started = time.perf_counter()
+            try:
+                return execute(sql, params, many, context)
+            finally:
+                stats["sql_count"] += 1
+                stats["sql"] += time.perf_counter() - started
+
+        started = time.perf_counter()
+        try:
+            with connection.execute_wrapper(sql_timer):
+                response = self.get_response(request)
+        finally:
+            elapsed = time.perf_counter() - started
+            _request_stats.reset(token)
+
+        match = getattr(request, "resolver_match", None)
+        view = (match.url_name or match.view_name) if match else UNMATCHED
+        method = request.method if request.method in HTTP_METHODS else "other"
+        REQUESTS.inc(view=view, method=method, status=str(response.status_code))
+        REQUEST_SECONDS.observe(elapsed, view=view, method=method)
+        SQL_QUERIES.observe(stats["sql_count"], view=view)
+        SQL_SECONDS.observe(stats["sql"], view=view)
+        RENDER_SECONDS.observe(stats["render"], view=view)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        # Label PDF/email timings recorded while the view runs
+        stats = _request_stats.get()
+        if stats is not None and request.resolver_match:
+            stats["view"] = request.resolver_match.url_name or request.resolver_match.view_name
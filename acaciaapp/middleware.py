@@ -0,0 +1,97 @@
+import mimetypes
+import os
+import re
+
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import FileResponse
+from django.utils._os import safe_join
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import http_date
+
+# ManifestStaticFilesStorage inserts a 12 character md5 prefix: main.3f2a9c1b7d4e.css
+HASHED_NAME = re.compile(r"\.[0-9a-f]{12}\.[^/]+$")
+IMMUTABLE_MAX_AGE = 365 * 24 * 60 * 60
+DEFAULT_MAX_AGE = 60
+
+ENCODINGS = (("br", ".br"), ("gzip", ".gz"))
+
+
+def accepted_encodings(header):
+    accepted = set()
+    for part in header.split(","):
+        token, _, params = part.strip().partition(";")
+        q = params.strip()
+        if q.startswith("q="):
+            try:
+                if float(q[2:]) == 0:
+                    continue
+            except ValueError:
+                continue
+        if token:
+            accepted.add(token.strip().lower())
+    return accepted
+
+
+class PrecompressedStaticMiddleware:
+    """
+    Serve files from STATIC_ROOT directly, preferring the .br/.gz variants
+    written by collectstatic when the client accepts them. Hashed names get
+    far-future immutable caching.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.static_url = "/" + settings.STATIC_URL.lstrip("/")
+        self.static_root = getattr(settings, "STATIC_ROOT", None)
+
+    def __call__(self, request):
+        if (
+            self.static_root
+            and request.method in ("GET", "HEAD")
+            and request.path.startswith(self.static_url)
+        ):
+            response = self.serve(request, request.path[len(self.static_url):])
+            if response is not None:
+                return response
+        return self.get_response(request)
+
+    def serve(self, request, name):
+        try:
+            path = safe_join(self.static_root, name)
+        except SuspiciousFileOperation:
+            return None
+        if not os.path.isfile(path):
+            return None
+
+        content_type, _ = mimetypes.guess_type(path)
+        accepted = accepted_encodings(request.META.get("HTTP_ACCEPT_ENCODING", ""))
+        served_path, encoding = path, None
+        for coding, suffix in ENCODINGS:
+            if coding in accepted and os.path.isfile(path + suffix):
+                served_path, encoding = path + suffix, coding
+                break
+
+        stat = os.stat(path)
+        etag = '"%x-%x%s"' % (int(stat.st_mtime), stat.st_size, f"-{encoding}" if encoding else "")
+        last_modified = int(stat.st_mtime)
+
+        response = FileResponse(
+            open(served_path, "rb"),
+            content_type=content_type or "application/octet-stream",
+            filename=os.path.basename(path),
+        )
+        if encoding:
+            response["Content-Encoding"] = encoding
+        patch_vary_headers(response, ["Accept-Encoding"])
+        response["ETag"] = etag
+        response["Last-Modified"] = http_date(last_modified)
+        if HASHED_NAME.search(name):
+            response["Cache-Control"] = f"public, max-age={IMMUTABLE_MAX_AGE}, immutable"
+        else:
+            response["Cache-Control"] = f"public, max-age={DEFAULT_MAX_AGE}"
+
+        conditional = get_conditional_response(request, etag=etag, last_modified=last_modified, response=response)
+        if conditional is not response:
+            response.close()
+        return conditional
@@ -0,0 +1,44 @@
+# Generated by Django 5.2.8 on 2026-10-18 02:51
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+def mark_existing_emailed(apps, schema_editor):
+    # Tickets created before the queue were rendered and emailed inline
+    Ticket = apps.get_model('acaciaapp', 'Ticket')
+    Ticket.objects.exclude(pdf_file='').exclude(pdf_file__isnull=True).update(fulfilment_status='emailed')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('acaciaapp', '0011_ticket_cleared_at_ticket_is_active'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='ticket',
+            name='fulfilment_status',
+            field=models.CharField(choices=[('pending', 'Pending'), ('rendered', 'Rendered'), ('emailed', 'Emailed'), ('failed', 'Failed')], default='pending', max_length=10),
+        ),
+        migrations.CreateModel(
+            name='TicketJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('attempts', models.PositiveIntegerField(default=0)),
+                ('max_attempts', models.PositiveIntegerField(default=5)),
+                ('run_after', models.DateTimeField(default=django.utils.timezone.now)),
+                ('locked_at', models.DateTimeField(blank=True, null=True)),
+                ('last_error', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('ticket', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='jobs', to='acaciaapp.ticket')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['finished_at', 'run_after'], name='acaciaapp_t_finishe_e0db7b_idx')],
+            },
+        ),
+        migrations.RunPython(mark_existing_emailed, migrations.RunPython.noop),
+    ]
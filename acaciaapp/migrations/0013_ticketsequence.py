@@ -0,0 +1,23 @@
+# Generated by Django 5.2.8 on 2026-10-18 02:56
+
+import acaciaapp.models
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('acaciaapp', '0012_ticket_fulfilment'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TicketSequence',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=50, unique=True)),
+                ('next_value', models.BigIntegerField(default=0)),
+                ('key', models.CharField(default=acaciaapp.models.generate_sequence_key, editable=False, max_length=64)),
+            ],
+        ),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 5.2.8 on 2026-10-18 03:01
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('acaciaapp', '0013_ticketsequence'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='eventbooking',
+            index=models.Index(fields=['user', 'date', 'is_canceled'], name='eventbooking_user_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='eventbooking',
+            index=models.Index(fields=['-date', '-created_at', '-id'], name='eventbooking_recent_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='reservation',
+            index=models.Index(fields=['user', 'date'], name='reservation_user_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='reservation',
+            index=models.Index(fields=['-date', '-time', '-id'], name='reservation_recent_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='roombooking',
+            index=models.Index(condition=models.Q(('is_cleared', False)), fields=['room', 'check_in', 'check_out'], name='roombooking_active_range_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='roombooking',
+            index=models.Index(condition=models.Q(('is_cleared', False)), fields=['-check_in', '-id'], name='roombooking_active_recent_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='roombooking',
+            index=models.Index(fields=['user', 'check_in'], name='roombooking_user_checkin_idx'),
+        ),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 5.2.8 on 2026-10-18 03:02
+
+import django.db.models.deletion
+from datetime import timedelta
+
+from django.db import migrations, models
+
+
+def backfill_room_nights(apps, schema_editor):
+    # Hold the nights of every active booking. Bookings that already overlap
+    # keep whichever claimed the night first.
+    RoomBooking = apps.get_model('acaciaapp', 'RoomBooking')
+    RoomNight = apps.get_model('acaciaapp', 'RoomNight')
+    nights = []
+    for booking in RoomBooking.objects.filter(is_cleared=False).order_by('booked_at', 'id').iterator():
+        for i in range((booking.check_out - booking.check_in).days):
+            nights.append(RoomNight(room_id=booking.room_id, night=booking.check_in + timedelta(days=i), booking=booking))
+    RoomNight.objects.bulk_create(nights, batch_size=500, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('acaciaapp', '0014_booking_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RoomNight',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('night', models.DateField()),
+                ('booking', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='booked_nights', to='acaciaapp.roombooking')),
+                ('room', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='booked_nights', to='acaciaapp.room')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('room', 'night'), name='unique_room_night')],
+            },
+        ),
+        migrations.RunPython(backfill_room_nights, migrations.RunPython.noop),
+    ]
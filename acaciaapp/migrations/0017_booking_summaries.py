@@ -0,0 +1,83 @@
+# Generated by Django 5.2.8 on 2026-10-18 03:27
+
+from collections import defaultdict
+from datetime import timedelta
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def backfill_summaries(apps, schema_editor):
+    RoomBooking = apps.get_model('acaciaapp', 'RoomBooking')
+    Room = apps.get_model('acaciaapp', 'Room')
+    DailySummary = apps.get_model('acaciaapp', 'DailySummary')
+    MonthlyRoomSummary = apps.get_model('acaciaapp', 'MonthlyRoomSummary')
+    # Existing bookings never recorded their rate; price them at today's
+    # room price, which is also what the summaries below are built from
+    RoomBooking.objects.update(
+        nightly_rate=models.Subquery(Room.objects.filter(pk=models.OuterRef('room_id')).values('price')[:1])
+    )
+    # Every existing booking counts for its whole stay (no cleared_on yet)
+    daily = defaultdict(lambda: [0, 0])
+    monthly = defaultdict(lambda: [0, 0])
+    for room_id, check_in, check_out, price in RoomBooking.objects.values_list(
+        'room_id', 'check_in', 'check_out', 'nightly_rate'
+    ).iterator():
+        for i in range((check_out - check_in).days):
+            night = check_in + timedelta(days=i)
+            for totals in (daily[night], monthly[(room_id, night.replace(day=1))]):
+                totals[0] += 1
+                totals[1] += price
+    DailySummary.objects.bulk_create(
+        [DailySummary(day=day, nights_sold=n, revenue=r) for day, (n, r) in daily.items()],
+        batch_size=500
+    )
+    MonthlyRoomSummary.objects.bulk_create(
+        [MonthlyRoomSummary(room_id=room_id, month=month, nights_sold=n, revenue=r)
+         for (room_id, month), (n, r) in monthly.items()],
+        batch_size=500
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('acaciaapp', '0016_outboxemail'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailySummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField(unique=True)),
+                ('nights_sold', models.IntegerField(default=0)),
+                ('revenue', models.BigIntegerField(default=0, help_text='KES')),
+            ],
+        ),
+        migrations.AddField(
+            model_name='roombooking',
+            name='cleared_on',
+            field=models.DateField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='roombooking',
+            name='nightly_rate',
+            field=models.PositiveIntegerField(blank=True, help_text='KES per night, as booked', null=True),
+        ),
+        migrations.CreateModel(
+            name='MonthlyRoomSummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('month', models.DateField()),
+                ('nights_sold', models.IntegerField(default=0)),
+                ('revenue', models.BigIntegerField(default=0, help_text='KES')),
+                ('room', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='monthly_summaries', to='acaciaapp.room')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['month'], name='monthlysummary_month_idx')],
+                'constraints': [models.UniqueConstraint(fields=('room', 'month'), name='unique_room_month_summary')],
+            },
+        ),
+        migrations.RunPython(backfill_summaries, migrations.RunPython.noop),
+    ]
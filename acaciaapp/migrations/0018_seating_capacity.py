@@ -0,0 +1,59 @@
+# Generated by Django 5.2.8 on 2026-10-18 03:31
+
+import datetime
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def backfill_seating_slots(apps, schema_editor):
+    # Count the guests already booked into each slot
+    Reservation = apps.get_model('acaciaapp', 'Reservation')
+    SeatingSlot = apps.get_model('acaciaapp', 'SeatingSlot')
+    totals = {}
+    for day, time, people in Reservation.objects.values_list('date', 'time', 'people').iterator():
+        minutes = time.hour * 60 + time.minute
+        minutes -= minutes % settings.RESERVATION_SLOT_MINUTES
+        key = (day, datetime.time(minutes // 60, minutes % 60))
+        totals[key] = totals.get(key, 0) + max(people, 0)
+    SeatingSlot.objects.bulk_create(
+        [SeatingSlot(date=day, slot=slot, booked=booked) for (day, slot), booked in totals.items()],
+        batch_size=500
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('acaciaapp', '0017_booking_summaries'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SeatingCapacity',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('weekday', models.PositiveSmallIntegerField(blank=True, choices=[(0, 'Monday'), (1, 'Tuesday'), (2, 'Wednesday'), (3, 'Thursday'), (4, 'Friday'), (5, 'Saturday'), (6, 'Sunday')], null=True)),
+                ('start', models.TimeField()),
+                ('end', models.TimeField()),
+                ('seats', models.PositiveIntegerField()),
+            ],
+            options={
+                'verbose_name_plural': 'seating capacities',
+                'ordering': ['weekday', 'start'],
+            },
+        ),
+        migrations.CreateModel(
+            name='SeatingSlot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('slot', models.TimeField()),
+                ('booked', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('date', 'slot'), name='unique_seating_slot')],
+            },
+        ),
+        migrations.RunPython(backfill_seating_slots, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,71 @@
+# Generated by Django 5.2.8 on 2026-10-18 03:32
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def create_main_hall(apps, schema_editor):
+    # One hall to start with (staff adjust it in the admin); existing events
+    # move into it and its counters start from what they already booked
+    Venue = apps.get_model('acaciaapp', 'Venue')
+    VenueDay = apps.get_model('acaciaapp', 'VenueDay')
+    EventBooking = apps.get_model('acaciaapp', 'EventBooking')
+    hall = Venue.objects.create(name='Main Hall', capacity=200)
+    EventBooking.objects.update(venue=hall)
+    EventBooking.objects.filter(event_name__in=settings.EXCLUSIVE_EVENT_TYPES).update(exclusive=True)
+
+    totals = {}
+    for day, attendees, exclusive in EventBooking.objects.filter(is_canceled=False).values_list(
+        'date', 'attendees', 'exclusive'
+    ).iterator():
+        booked, held = totals.get(day, (0, False))
+        totals[day] = (booked + attendees, held or exclusive)
+    VenueDay.objects.bulk_create(
+        [VenueDay(venue=hall, date=day, booked=booked, exclusive=exclusive)
+         for day, (booked, exclusive) in totals.items()],
+        batch_size=500
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('acaciaapp', '0018_seating_capacity'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Venue',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, unique=True)),
+                ('capacity', models.PositiveIntegerField(help_text='Guests per day across all events')),
+                ('is_active', models.BooleanField(default=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='eventbooking',
+            name='exclusive',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddField(
+            model_name='eventbooking',
+            name='venue',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='bookings', to='acaciaapp.venue'),
+        ),
+        migrations.CreateModel(
+            name='VenueDay',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('booked', models.PositiveIntegerField(default=0)),
+                ('exclusive', models.BooleanField(default=False)),
+                ('venue', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='days', to='acaciaapp.venue')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('venue', 'date'), name='unique_venue_day')],
+            },
+        ),
+        migrations.RunPython(create_main_hall, migrations.RunPython.noop),
+    ]
@@ -1,10 +1,9 @@
-from django.db import models
+from django.db import models, transaction, IntegrityError
 from django.contrib.auth.models import User
-from datetime import datetime
+from django.core.exceptions import ValidationError
+from datetime import datetime, timedelta
 from django.utils import timezone
-import uuid
-import random
-import string
+import secrets
 
 
 class Reservation(models.Model):
@@ -18,9 +17,125 @@ class Reservation(models.Model):
     message = models.TextField(blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            # profile_view: a guest's upcoming / past reservations
+            models.Index(fields=['user', 'date'], name='reservation_user_date_idx'),
+            # staff lists ordered newest first
+            models.Index(fields=['-date', '-time', '-id'], name='reservation_recent_idx'),
+        ]
+
     def __str__(self):
         return f"{self.user.username} - {self.date} {self.time}"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        reservation = super().from_db(db, field_names, values)
+        # Remember the seats held, so an edit can give them back
+        if not reservation.get_deferred_fields():
+            reservation._stored_seats = (reservation.date, reservation.time, reservation.people)
+        return reservation
+
+    def save(self, *args, **kwargs):
+        # Form values arrive as strings
+        for name in ('date', 'time', 'people'):
+            setattr(self, name, self._meta.get_field(name).to_python(getattr(self, name)))
+
+        # Seats are claimed in the same transaction as the row; raises
+        # SlotFull before anything is written if the slot has no room
+        from .seating import claim_seats, release_seats
+        seats = (self.date, self.time, self.people)
+        old_seats = None if self._state.adding else getattr(self, '_stored_seats', None)
+        with transaction.atomic():
+            if not self._state.adding and old_seats is None:
+                stored = Reservation.objects.get(pk=self.pk)
+                old_seats = (stored.date, stored.time, stored.people)
+            if seats != old_seats:
+                if old_seats:
+                    release_seats(*old_seats)
+                claim_seats(*seats)
+            super().save(*args, **kwargs)
+        self._stored_seats = seats
+
+
+class SeatingCapacity(models.Model):
+    """
+    Seats available per reservation slot between `start` and `end`, on one
+    weekday or (weekday blank) every day. A weekday rule beats an every-day
+    one; slots no rule covers get settings.RESERVATION_DEFAULT_SEATS.
+    """
+    WEEKDAY_CHOICES = [
+        (0, "Monday"), (1, "Tuesday"), (2, "Wednesday"), (3, "Thursday"),
+        (4, "Friday"), (5, "Saturday"), (6, "Sunday"),
+    ]
+
+    weekday = models.PositiveSmallIntegerField(choices=WEEKDAY_CHOICES, null=True, blank=True)
+    start = models.TimeField()
+    end = models.TimeField()
+    seats = models.PositiveIntegerField()
+
+    class Meta:
+        ordering = ['weekday', 'start']
+        verbose_name_plural = "seating capacities"
+
+    def __str__(self):
+        day = self.get_weekday_display() if self.weekday is not None else "Every day"
+        return f"{day} {self.start:%H:%M}-{self.end:%H:%M}: {self.seats} seats"
+
+
+class SeatingSlot(models.Model):
+    """
+    Guests booked into one reservation slot. The counter, not a scan of
+    Reservation, decides whether a slot still has room.
+    """
+    date = models.DateField()
+    slot = models.TimeField()
+    booked = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['date', 'slot'], name='unique_seating_slot'),
+        ]
+
+    def __str__(self):
+        return f"{self.date} {self.slot:%H:%M}: {self.booked} booked"
+
+class RoomQuerySet(models.QuerySet):
+
+    def available_between(self, check_in, check_out, capacity=None, min_price=None, max_price=None):
+        """
+        Rooms that can be booked for the given dates, in a single query.
+
+        A room is free when it is marked available and none of the nights
+        from check_in up to (not including) check_out is held by an uncleared
+        booking. Capacity and price filters are optional.
+        """
+        conflicts = RoomNight.objects.filter(
+            room=models.OuterRef('pk'),
+            night__gte=check_in,
+            night__lt=check_out
+        )
+        rooms = self.filter(available=True).exclude(models.Exists(conflicts))
+
+        if capacity:
+            rooms = rooms.filter(capacity__gte=capacity)
+        if min_price is not None:
+            rooms = rooms.filter(price__gte=min_price)
+        if max_price is not None:
+            rooms = rooms.filter(price__lte=max_price)
+        return rooms
+
+    def refresh_occupancy(self):
+        """
+        Recompute is_occupied (room has an uncleared booking) for these rooms.
+        Only rooms whose flag is wrong are written; returns how many changed.
+        """
+        active = RoomBooking.objects.filter(room=models.OuterRef('pk'), is_cleared=False)
+        occupied = self.filter(is_occupied=False).filter(models.Exists(active)).update(is_occupied=True)
+        vacated = self.filter(is_occupied=True).exclude(models.Exists(active)).update(is_occupied=False)
+        return occupied + vacated
+
+
 class Room(models.Model):
     room_number = models.CharField(max_length=10, unique=True)
     is_occupied = models.BooleanField(default=False)
@@ -30,6 +145,8 @@ class Room(models.Model):
     description = models.TextField(help_text="E.g., Wifi, AC, Swimming Pool, etc.")
     available = models.BooleanField(default=True)
 
+    objects = RoomQuerySet.as_manager()
+
     def __str__(self):
         return f"Room {self.room_number}"
 
@@ -48,10 +165,86 @@ class RoomBooking(models.Model):
     message = models.TextField(blank=True, null=True)
     booked_at = models.DateTimeField(auto_now_add=True)
     is_cleared = models.BooleanField(default=False)
+    # day the guest was checked out; nights from here on count as unsold
+    cleared_on = models.DateField(null=True, blank=True)
+    # the room's price when booked, so later price changes leave revenue alone
+    nightly_rate = models.PositiveIntegerField(null=True, blank=True, help_text="KES per night, as booked")
+
+    class Meta:
+        indexes = [
+            # availability / conflict checks only ever look at active bookings
+            models.Index(
+                fields=['room', 'check_in', 'check_out'],
+                condition=models.Q(is_cleared=False),
+                name='roombooking_active_range_idx'
+            ),
+            # dashboard: active bookings, latest check-in first
+            models.Index(
+                fields=['-check_in', '-id'],
+                condition=models.Q(is_cleared=False),
+                name='roombooking_active_recent_idx'
+            ),
+            # profile_view: a guest's stays in check-in order (is_cleared is
+            # compared as a bare boolean, so it can't be an index key column)
+            models.Index(fields=['user', 'check_in'], name='roombooking_user_checkin_idx'),
+        ]
 
     def __str__(self):
         return f"{self.customer_name} - Room {self.room.room_number}"
 
+    def nights(self):
+        """Every night of the stay: check_in up to, not including, check_out."""
+        return [self.check_in + timedelta(days=i) for i in range((self.check_out - self.check_in).days)]
+
+    def sold_span(self):
+        """
+        (room_id, first, end, nightly_rate) of the nights this booking sells,
+        end excluded. Clearing early releases the nights from cleared_on
+        onwards; bookings cleared before this field existed keep their whole
+        stay.
+        """
+        end = self.check_out
+        if self.is_cleared and self.cleared_on is not None:
+            end = max(self.check_in, min(end, self.cleared_on))
+        return (self.room_id, self.check_in, end, self.nightly_rate)
+
+    def sync_nights(self, adding=False):
+        """
+        Make this booking's RoomNight rows match its room and dates (none
+        once cleared). Raises RoomUnavailable if another booking holds one
+        of the nights; the unique (room, night) constraint decides, so two
+        concurrent bookings can never both win.
+        """
+        held = RoomNight.objects.filter(booking=self)
+        if self.is_cleared:
+            held.delete()
+            return
+
+        wanted = set(self.nights())
+        existing = set()
+        if not adding:
+            held.exclude(room=self.room, night__in=wanted).delete()
+            existing = set(held.values_list('night', flat=True))
+
+        try:
+            with transaction.atomic():
+                RoomNight.objects.bulk_create([
+                    RoomNight(room=self.room, night=night, booking=self)
+                    for night in sorted(wanted - existing)
+                ])
+        except IntegrityError:
+            raise RoomUnavailable(f"Room {self.room.room_number} is already booked for some of these nights.")
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        booking = super().from_db(db, field_names, values)
+        # Remember the stored room so a move can refresh the old one too
+        booking._stored_room_id = booking.__dict__.get('room_id')
+        # ...and the nights it sold, so an edit moves the report summaries
+        if not booking.get_deferred_fields():
+            booking._stored_span = booking.sold_span()
+        return booking
+
     def save(self, *args, **kwargs):
         # Convert string dates to proper date objects
         if isinstance(self.check_in, str):
@@ -59,17 +252,146 @@ class RoomBooking(models.Model):
         if isinstance(self.check_out, str):
             self.check_out = datetime.strptime(self.check_out, "%Y-%m-%d").date()
 
-        super().save(*args, **kwargs)
+        if self.is_cleared and self.cleared_on is None:
+            self.cleared_on = timezone.localdate()
+            if kwargs.get('update_fields') is not None:
+                kwargs['update_fields'] = {*kwargs['update_fields'], 'cleared_on'}
+        # Price the stay when it is booked, and again if it moves room
+        stored_room_id = getattr(self, '_stored_room_id', None)
+        if self.nightly_rate is None or (stored_room_id is not None and stored_room_id != self.room_id):
+            self.nightly_rate = self.room.price
+            if kwargs.get('update_fields') is not None:
+                kwargs['update_fields'] = {*kwargs['update_fields'], 'nightly_rate'}
+
+        # Booking row, its nights and the report summaries commit together
+        adding = self._state.adding
+        with transaction.atomic():
+            old_span = None
+            if not adding:
+                old_span = getattr(self, '_stored_span', None)
+                if old_span is None:
+                    old_span = RoomBooking.objects.get(pk=self.pk).sold_span()
+            super().save(*args, **kwargs)
+            self.sync_nights(adding=adding)
+
+            new_span = self.sold_span()
+            if new_span != old_span:
+                from .reports import record_spans
+                record_spans(sold=[new_span], unsold=[old_span] if old_span else [])
+            self._stored_span = new_span
+
+            # AFTER saving → keep room status in step, writing only on change
+            if not self.is_cleared:
+                Room.objects.filter(pk=self.room_id, is_occupied=False).update(is_occupied=True)
+            else:
+                # Free the room only if no other active booking still holds it
+                Room.objects.filter(pk=self.room_id, is_occupied=True).exclude(
+                    models.Exists(RoomBooking.objects.filter(room=models.OuterRef('pk'), is_cleared=False))
+                ).update(is_occupied=False)
+
+            stored_room_id = getattr(self, '_stored_room_id', None)
+            if stored_room_id is not None and stored_room_id != self.room_id:
+                Room.objects.filter(pk=stored_room_id).refresh_occupancy()
+            self._stored_room_id = self.room_id
+
+
+class DailySummary(models.Model):
+    """
+    Room-nights sold and their revenue across the whole hotel for one night.
+    Maintained by RoomBooking.save(); rebuild_summaries recomputes it.
+    """
+    day = models.DateField(unique=True)
+    nights_sold = models.IntegerField(default=0)
+    revenue = models.BigIntegerField(default=0, help_text="KES")
+
+    def __str__(self):
+        return f"{self.day}: {self.nights_sold} nights"
+
+
+class MonthlyRoomSummary(models.Model):
+    """Room-nights sold and revenue of one room in one month (month = its 1st)."""
+    room = models.ForeignKey(Room, on_delete=models.CASCADE, related_name='monthly_summaries')
+    month = models.DateField()
+    nights_sold = models.IntegerField(default=0)
+    revenue = models.BigIntegerField(default=0, help_text="KES")
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['room', 'month'], name='unique_room_month_summary'),
+        ]
+        indexes = [
+            models.Index(fields=['month'], name='monthlysummary_month_idx'),
+        ]
+
+    def __str__(self):
+        return f"Room {self.room_id} in {self.month:%Y-%m}: {self.nights_sold} nights"
+
+
+class RoomUnavailable(Exception):
+    """The room is already booked for at least one of the requested nights."""
+
+
+class RoomNight(models.Model):
+    """
+    One sold night of one room. The unique (room, night) pair is the booking
+    inventory: overlapping bookings fail in the database instead of racing
+    a check-then-insert.
+    """
+    room = models.ForeignKey(Room, on_delete=models.CASCADE, related_name='booked_nights')
+    night = models.DateField()
+    booking = models.ForeignKey(RoomBooking, on_delete=models.CASCADE, related_name='booked_nights')
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['room', 'night'], name='unique_room_night'),
+        ]
+
+    def __str__(self):
+        return f"Room {self.room.room_number} on {self.night}"
+
+
+def check_room_nights(room, check_in, check_out, booking=None):
+    """
+    Raise RoomUnavailable if another booking holds any night of `room` from
+    check_in up to check_out. `booking` is the one being edited, whose own
+    nights don't count. Only a pre-check for forms: sync_nights() is what
+    enforces it.
+    """
+    taken = RoomNight.objects.filter(room=room, night__gte=check_in, night__lt=check_out)
+    if booking is not None and booking.pk:
+        taken = taken.exclude(booking=booking)
+    if taken.exists():
+        raise RoomUnavailable(f"Room {room.room_number} is already booked for some of these nights.")
+
+
+class Venue(models.Model):
+    """A hall that hosts events, seating up to `capacity` guests per day."""
+    name = models.CharField(max_length=100, unique=True)
+    capacity = models.PositiveIntegerField(help_text="Guests per day across all events")
+    is_active = models.BooleanField(default=True)
+
+    def __str__(self):
+        return self.name
 
-        # AFTER saving → auto-update room status
-        if not self.is_cleared:
-            # If booking is active, room must be marked occupied
-            self.room.is_occupied = True
-        else:
-            # If booking cleared, free the room
-            self.room.is_occupied = False
 
-        self.room.save()
+class VenueDay(models.Model):
+    """
+    Guests booked into one venue on one date. `exclusive` is set while a
+    private event holds the whole venue. Bookings claim capacity with a
+    conditional UPDATE on this row, never by counting EventBooking.
+    """
+    venue = models.ForeignKey(Venue, on_delete=models.CASCADE, related_name='days')
+    date = models.DateField()
+    booked = models.PositiveIntegerField(default=0)
+    exclusive = models.BooleanField(default=False)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['venue', 'date'], name='unique_venue_day'),
+        ]
+
+    def __str__(self):
+        return f"{self.venue} on {self.date}: {self.booked} booked"
 
 
 # Event booking model
@@ -85,16 +407,83 @@ class EventBooking(models.Model):
     message = models.TextField(blank=True, null=True)
     created_at = models.DateTimeField(auto_now_add=True)
     is_canceled = models.BooleanField(default=False)
+    venue = models.ForeignKey(Venue, on_delete=models.PROTECT, null=True, blank=True, related_name='bookings')
+    # private events take the whole venue for the day
+    exclusive = models.BooleanField(default=False)
+
+    class Meta:
+        indexes = [
+            # profile_view: a guest's upcoming / past events
+            models.Index(fields=['user', 'date', 'is_canceled'], name='eventbooking_user_date_idx'),
+            # staff lists ordered newest first
+            models.Index(fields=['-date', '-created_at', '-id'], name='eventbooking_recent_idx'),
+        ]
 
     def __str__(self):
         return f"{self.customer_name} - {self.event_name or 'Event'} on {self.date}"
 
+    def venue_hold(self):
+        """(venue_id, date, attendees, exclusive) this booking holds, or None."""
+        if self.is_canceled or self.venue_id is None:
+            return None
+        return (self.venue_id, self.date, self.attendees, self.exclusive)
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        booking = super().from_db(db, field_names, values)
+        # Remember what the booking holds, so an edit can give it back
+        if not booking.get_deferred_fields():
+            booking._stored_hold = booking.venue_hold()
+        return booking
+
+    def save(self, *args, **kwargs):
+        if isinstance(self.date, str):
+            self.date = datetime.strptime(self.date, "%Y-%m-%d").date()
+        # Without a venue nothing would hold capacity, so nothing would limit it
+        if self.venue_id is None and not self.is_canceled:
+            raise ValidationError({'venue': "Event bookings need a venue."})
+
+        # Capacity is claimed in the same transaction as the row; raises
+        # VenueFull before anything is written if the venue has no room
+        from .venues import claim_venue, release_venue
+        hold = self.venue_hold()
+        with transaction.atomic():
+            if self._state.adding:
+                old_hold = None
+            elif hasattr(self, '_stored_hold'):
+                old_hold = self._stored_hold
+            else:
+                old_hold = EventBooking.objects.get(pk=self.pk).venue_hold()
+            if hold != old_hold:
+                if old_hold:
+                    release_venue(*old_hold)
+                if hold:
+                    claim_venue(*hold)
+            super().save(*args, **kwargs)
+        self._stored_hold = hold
+
 
 def generate_ticket_number():
-    while True:
-        code = ''.join(random.choices(string.ascii_uppercase + string.digits, k=8))
-        if not Ticket.objects.filter(ticket_number=code).exists():
-            return code
+    # Sequence-backed, so no lookup against existing tickets is needed
+    from .ticket_numbers import allocator
+    return allocator.allocate()
+
+
+def generate_sequence_key():
+    return secrets.token_hex(32)
+
+
+class TicketSequence(models.Model):
+    """
+    Counter behind ticket numbers. `key` seeds the permutation that turns
+    counter values into codes and must never change once tickets exist.
+    """
+    name = models.CharField(max_length=50, unique=True)
+    next_value = models.BigIntegerField(default=0)
+    key = models.CharField(max_length=64, default=generate_sequence_key, editable=False)
+
+    def __str__(self):
+        return f"{self.name} sequence at {self.next_value}"
 
 class Ticket(models.Model):
     user = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True)
@@ -134,6 +523,25 @@ class Ticket(models.Model):
     # Store the timestamp when a ticket was validated/checked-in.
     cleared_at = models.DateTimeField(null=True, blank=True)
 
+    # Background fulfilment progress (PDF render + email), see TicketJob.
+    STATUS_PENDING = "pending"
+    STATUS_RENDERED = "rendered"
+    STATUS_EMAILED = "emailed"
+    STATUS_FAILED = "failed"
+    STATUS_QUEUED = "queued"
+    FULFILMENT_CHOICES = [
+        (STATUS_PENDING, "Pending"),
+        (STATUS_RENDERED, "Rendered"),
+        (STATUS_QUEUED, "Email queued"),
+        (STATUS_EMAILED, "Emailed"),
+        (STATUS_FAILED, "Failed"),
+    ]
+    fulfilment_status = models.CharField(
+        max_length=10,
+        choices=FULFILMENT_CHOICES,
+        default=STATUS_PENDING
+    )
+
     # ===========================
     # HELPER METHOD
     # ===========================
@@ -151,3 +559,60 @@ class Ticket(models.Model):
         return f"Ticket {self.ticket_number}"
 
 
+
+
+class TicketJob(models.Model):
+    """
+    Queued fulfilment run for a ticket: render the PDF, then email it.
+    Picked up by `manage.py process_ticket_jobs`.
+    """
+    ticket = models.ForeignKey(Ticket, on_delete=models.CASCADE, related_name="jobs")
+    attempts = models.PositiveIntegerField(default=0)
+    max_attempts = models.PositiveIntegerField(default=5)
+    run_after = models.DateTimeField(default=timezone.now)
+    locked_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["finished_at", "run_after"]),
+        ]
+
+    def __str__(self):
+        return f"Job for {self.ticket}"
+
+
+class OutboxEmail(models.Model):
+    """
+    An email waiting to be sent. Drained in batches over one SMTP
+    connection by `manage.py send_outbox`, with retries and backoff like
+    TicketJob. Ticket emails attach the ticket's PDF at send time.
+    """
+    ticket = models.ForeignKey(Ticket, on_delete=models.CASCADE, null=True, blank=True, related_name="emails")
+    to = models.EmailField()
+    from_email = models.CharField(max_length=255)
+    subject = models.CharField(max_length=255)
+    body = models.TextField()
+    attempts = models.PositiveIntegerField(default=0)
+    max_attempts = models.PositiveIntegerField(default=5)
+    run_after = models.DateTimeField(default=timezone.now)
+    locked_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+    failed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            # The sender only ever scans unsent, unfailed rows
+            models.Index(
+                fields=["run_after"],
+                name="outbox_pending_idx",
+                condition=models.Q(sent_at__isnull=True, failed_at__isnull=True),
+            ),
+        ]
+
+    def __str__(self):
+        return f"Email to {self.to}: {self.subject}"
@@ -0,0 +1,119 @@
+from datetime import timedelta
+
+from django.core.mail import EmailMessage, get_connection
+from django.db.models import Q
+from django.utils import timezone
+
+from .metrics import EMAIL_SECONDS, timed
+from .models import OutboxEmail, Ticket
+
+
+class OutboxSender:
+    """
+    Drains OutboxEmail in batches over a single mail connection, kept open
+    while there is work and closed once the outbox is empty. Each message is
+    handed to send_messages() on that shared connection, so one bad address
+    only fails its own row; failed rows are retried with exponential backoff.
+    """
+
+    def __init__(self, batch_size=100, backoff=30.0, lock_timeout=300, backend=None, **backend_kwargs):
+        self.batch_size = batch_size
+        self.backoff = backoff
+        self.lock_timeout = lock_timeout
+        self.backend = backend
+        self.backend_kwargs = backend_kwargs
+        self.connection = None
+
+    def pending(self, now):
+        stale = now - timedelta(seconds=self.lock_timeout)
+        return OutboxEmail.objects.filter(
+            sent_at__isnull=True, failed_at__isnull=True
+        ).filter(
+            Q(locked_at__isnull=True) | Q(locked_at__lt=stale)
+        )
+
+    def claim(self):
+        """Lock up to batch_size due emails for this sender with one conditional UPDATE."""
+        now = timezone.now()
+        ids = list(
+            self.pending(now).filter(run_after__lte=now)
+            .order_by("run_after")
+            .values_list("id", flat=True)[:self.batch_size]
+        )
+        if not ids:
+            return []
+        self.pending(now).filter(id__in=ids).update(locked_at=now)
+        return list(
+            OutboxEmail.objects.filter(id__in=ids, locked_at=now).select_related(
+                "ticket__room_booking__room",
+                "ticket__reservation_booking",
+                "ticket__event_booking",
+            )
+        )
+
+    def open(self):
+        if self.connection is None:
+            self.connection = get_connection(self.backend, fail_silently=False, **self.backend_kwargs)
+            self.connection.open()
+        return self.connection
+
+    def close(self):
+        if self.connection is not None:
+            try:
+                self.connection.close()
+            finally:
+                self.connection = None
+
+    def build_message(self, email):
+        message = EmailMessage(email.subject, email.body, email.from_email, [email.to])
+        if email.ticket_id:
+            from .ticket_cache import get_ticket_pdf_cache
+
+            # Re-rendered if the cache evicted it since fulfilment
+            pdf_path, _ = get_ticket_pdf_cache().get_or_render(email.ticket)
+            with open(pdf_path, "rb") as f:
+                message.attach(f"Ticket_{email.ticket.ticket_number}.pdf", f.read(), "application/pdf")
+        return message
+
+    def retry_later(self, email, exc):
+        now = timezone.now()
+        email.attempts += 1
+        email.last_error = f"{type(exc).__name__}: {exc}"
+        email.locked_at = None
+        if email.attempts >= email.max_attempts:
+            email.failed_at = now
+            if email.ticket_id:
+                Ticket.objects.filter(id=email.ticket_id).update(fulfilment_status=Ticket.STATUS_FAILED)
+        else:
+            email.run_after = now + timedelta(seconds=self.backoff * (2 ** (email.attempts - 1)))
+        email.save(update_fields=["attempts", "last_error", "locked_at", "failed_at", "run_after"])
+
+    def send_batch(self):
+        """Send one claimed batch. Returns (sent, failed) counts."""
+        emails = self.claim()
+        if not emails:
+            self.close()
+            return 0, 0
+
+        sent, failed = [], 0
+        for email in emails:
+            try:
+                message = self.build_message(email)
+                with timed(EMAIL_SECONDS):
+                    self.open().send_messages([message])
+            except Exception as exc:
+                self.retry_later(email, exc)
+                failed += 1
+                # The connection's state is unknown after an error; start afresh
+                self.close()
+                continue
+            sent.append(email)
+
+        if sent:
+            now = timezone.now()
+            OutboxEmail.objects.filter(id__in=[e.id for e in sent]).update(sent_at=now, locked_at=None)
+            Ticket.objects.filter(
+                id__in=[e.ticket_id for e in sent if e.ticket_id],
+                fulfilment_status=Ticket.STATUS_QUEUED,
+            ).update(fulfilment_status=Ticket.STATUS_EMAILED)
+        return len(sent), failed
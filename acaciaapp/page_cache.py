@@ -0,0 +1,78 @@
+import hashlib
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.contrib.messages import get_messages
+from django.core.cache import caches
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.http import http_date
+
+DEFAULT_TIMEOUT = 300
+
+
+def auth_variant(request):
+    """The navbar only distinguishes these three states."""
+    user = request.user
+    if not user.is_authenticated:
+        return "anon"
+    return "superuser" if user.is_superuser else "user"
+
+
+def _cache_key(name, variant, request):
+    path = hashlib.md5(request.get_full_path().encode()).hexdigest()
+    return f"page:{name}:{variant}:{path}"
+
+
+def _finish(request, response, etag, last_modified, variant, timeout):
+    response["ETag"] = etag
+    response["Last-Modified"] = http_date(last_modified)
+    patch_vary_headers(response, ["Cookie"])
+    if variant == "anon":
+        patch_cache_control(response, public=True, max_age=timeout)
+    else:
+        patch_cache_control(response, private=True, max_age=0, must_revalidate=True)
+    return get_conditional_response(request, etag=etag, last_modified=last_modified, response=response)
+
+
+def cached_page(name):
+    """
+    Cache a template-only view's HTML per auth variant and URL, with the TTL
+    from settings.PAGE_CACHE_TIMEOUTS[name]. Responses carry ETag and
+    Last-Modified so browsers revalidate with a 304 instead of a full body.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if request.method not in ("GET", "HEAD"):
+                return view(request, *args, **kwargs)
+
+            # Flash messages are per-user and one-shot; never cache around them
+            if len(get_messages(request)):
+                return view(request, *args, **kwargs)
+
+            cache = caches[getattr(settings, "PAGE_CACHE_ALIAS", "default")]
+            timeout = getattr(settings, "PAGE_CACHE_TIMEOUTS", {}).get(name, DEFAULT_TIMEOUT)
+            variant = auth_variant(request)
+            key = _cache_key(name, variant, request)
+
+            entry = cache.get(key)
+            if entry is None:
+                response = view(request, *args, **kwargs)
+                if response.status_code != 200 or response.streaming:
+                    return response
+                content = response.content
+                entry = {
+                    "content": content,
+                    "content_type": response["Content-Type"],
+                    "etag": '"%s"' % hashlib.md5(content).hexdigest(),
+                    "last_modified": int(time.time()),
+                }
+                cache.set(key, entry, timeout)
+            else:
+                response = HttpResponse(entry["content"], content_type=entry["content_type"])
+
+            return _finish(request, response, entry["etag"], entry["last_modified"], variant, timeout)
+        return wrapper
+    return decorator
@@ -0,0 +1,93 @@
+import base64
+import json
+from datetime import date, datetime, time
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+
+
+class KeysetPage:
+    """One page of a keyset-paginated list plus the cursor for the next page."""
+
+    def __init__(self, items, next_cursor, is_first=True):
+        self.items = items
+        self.next_cursor = next_cursor
+        self.is_first = is_first
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def __len__(self):
+        return len(self.items)
+
+
+def _encode_value(value):
+    if isinstance(value, (date, datetime, time)):
+        return value.isoformat()
+    return value
+
+
+def encode_cursor(values):
+    raw = json.dumps([_encode_value(v) for v in values], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor, fields):
+    """
+    Values from a cursor, converted for the model `fields` they belong to, or
+    None if it is missing or malformed; a bad cursor just means page one.
+    """
+    if not cursor:
+        return None
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+    except ValueError:
+        return None
+    if not isinstance(values, list) or len(values) != len(fields):
+        return None
+    try:
+        values = [field.to_python(value) for field, value in zip(fields, values)]
+    except (ValidationError, TypeError, ValueError):
+        return None
+    if any(value is None for value in values):
+        return None
+    return values
+
+
+def keyset_paginate(queryset, ordering, cursor=None, per_page=50):
+    """
+    Page through `queryset` in `ordering` (e.g. ["-date", "-time", "-id"])
+    starting after `cursor`. The last ordering field must be unique so every
+    row has a distinct position. Each page is one indexed range query,
+    however deep into the history it is.
+    """
+    fields = [f.lstrip("-") for f in ordering]
+    descending = [f.startswith("-") for f in ordering]
+
+    after = decode_cursor(cursor, [queryset.model._meta.get_field(f) for f in fields])
+    if after is not None:
+        # (a, b, c) after (va, vb, vc), honouring each column's direction:
+        # a > va OR (a = va AND b > vb) OR (a = va AND b = vb AND c > vc)
+        condition = Q()
+        for i, field in enumerate(fields):
+            lookup = "lt" if descending[i] else "gt"
+            term = Q(**{f"{field}__{lookup}": after[i]})
+            for prev in range(i):
+                term &= Q(**{fields[prev]: after[prev]})
+            condition |= term
+        queryset = queryset.filter(condition)
+
+    rows = list(queryset.order_by(*ordering)[:per_page + 1])
+    items = rows[:per_page]
+
+    next_cursor = None
+    if len(rows) > per_page:
+        last = items[-1]
+        next_cursor = encode_cursor([getattr(last, f) for f in fields])
+
+    return KeysetPage(items, next_cursor, is_first=after is None)
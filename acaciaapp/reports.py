@@ -0,0 +1,211 @@
+"""
+Occupancy and revenue summaries for the staff reports page.
+
+DailySummary (whole hotel, per night) and MonthlyRoomSummary (per room, per
+month) are kept current by RoomBooking.save() and the booking post_delete
+signal, which pass the nights a change sold or released to record_spans().
+Counters move with F() increments in the caller's transaction, so concurrent
+bookings never overwrite each other. Revenue is the booking's nightly_rate
+per night sold (the room's price when it was booked), so later price changes
+never rewrite past months. rebuild() recomputes everything from the bookings
+table and gives the same figures.
+"""
+import calendar
+from collections import defaultdict
+import datetime
+
+from django.db import transaction
+from django.db.models import F, Sum
+
+from .models import DailySummary, MonthlyRoomSummary, Room, RoomBooking
+
+REBUILD_BATCH_SIZE = 2000
+# Months the reports page will show
+REPORT_FIRST_YEAR = 2000
+REPORT_LAST_YEAR = 2100
+
+
+def month_start(day):
+    return day.replace(day=1)
+
+
+def days_in_month(month):
+    return calendar.monthrange(month.year, month.month)[1]
+
+
+def span_nights(first, end):
+    day = first
+    while day < end:
+        yield day
+        day += datetime.timedelta(days=1)
+
+
+def _night_deltas(sold, unsold):
+    """(room_id, night) -> [nights, revenue] change for every night in the given spans."""
+    spans = [(span, 1) for span in sold] + [(span, -1) for span in unsold]
+    prices = _fallback_prices(span for span, _ in spans)
+    deltas = defaultdict(lambda: [0, 0])
+    for (room_id, first, end, rate), sign in spans:
+        if rate is None:
+            rate = prices.get(room_id, 0)
+        for night in span_nights(first, end):
+            totals = deltas[(room_id, night)]
+            totals[0] += sign
+            totals[1] += sign * rate
+    return {key: totals for key, totals in deltas.items() if any(totals)}
+
+
+def _fallback_prices(spans):
+    """Current prices for rooms whose spans were never priced (bulk-created rows)."""
+    room_ids = {room_id for room_id, _, _, rate in spans if rate is None}
+    if not room_ids:
+        return {}
+    return dict(Room.objects.filter(pk__in=room_ids).values_list('pk', 'price'))
+
+
+def record_spans(sold=(), unsold=()):
+    """
+    Add the nights in `sold` and take away those in `unsold`; each span is a
+    (room_id, first_night, end, nightly_rate) tuple as returned by
+    RoomBooking.sold_span(). A handful of UPDATEs however many nights or
+    bookings are involved.
+    """
+    deltas = _night_deltas(sold, unsold)
+    if not deltas:
+        return
+
+    daily = defaultdict(lambda: [0, 0])
+    monthly = defaultdict(lambda: [0, 0])
+    for (room_id, night), (nights, revenue) in deltas.items():
+        for totals in (daily[night], monthly[(room_id, month_start(night))]):
+            totals[0] += nights
+            totals[1] += revenue
+
+    with transaction.atomic():
+        # Rows must exist before they can be incremented. Only growth needs
+        # new rows: a delete cascading from its room must not recreate them
+        DailySummary.objects.bulk_create(
+            [DailySummary(day=day) for day, totals in daily.items() if max(totals) > 0],
+            ignore_conflicts=True
+        )
+        MonthlyRoomSummary.objects.bulk_create(
+            [MonthlyRoomSummary(room_id=room_id, month=month)
+             for (room_id, month), totals in monthly.items() if max(totals) > 0],
+            ignore_conflicts=True
+        )
+
+        # One UPDATE per distinct change (and room) rather than one per row
+        for (nights, revenue), days in _group(daily).items():
+            DailySummary.objects.filter(day__in=days).update(
+                nights_sold=F('nights_sold') + nights, revenue=F('revenue') + revenue
+            )
+        for (nights, revenue), keys in _group(monthly).items():
+            by_room = defaultdict(list)
+            for room_id, month in keys:
+                by_room[room_id].append(month)
+            for room_id, months in by_room.items():
+                MonthlyRoomSummary.objects.filter(room_id=room_id, month__in=months).update(
+                    nights_sold=F('nights_sold') + nights, revenue=F('revenue') + revenue
+                )
+
+
+def _group(totals):
+    """{(nights, revenue): [keys]} for the keys whose totals actually change."""
+    groups = defaultdict(list)
+    for key, (nights, revenue) in totals.items():
+        if nights or revenue:
+            groups[(nights, revenue)].append(key)
+    return groups
+
+
+def record_bookings(bookings):
+    """Count bookings that were saved without RoomBooking.save(), e.g. bulk_create()."""
+    record_spans(sold=[booking.sold_span() for booking in bookings])
+
+
+def rebuild():
+    """
+    Recompute both summary tables from RoomBooking in one pass and swap them
+    in. Bookings are read in the same transaction as the swap, so the
+    tables match one consistent view of them. Returns (days, room_months)
+    written.
+    """
+    daily = defaultdict(lambda: [0, 0])
+    monthly = defaultdict(lambda: [0, 0])
+
+    with transaction.atomic():
+        prices = dict(Room.objects.values_list('pk', 'price'))
+        bookings = RoomBooking.objects.only(
+            'room_id', 'check_in', 'check_out', 'is_cleared', 'cleared_on', 'nightly_rate'
+        ).iterator(chunk_size=REBUILD_BATCH_SIZE)
+        for booking in bookings:
+            room_id, first, end, price = booking.sold_span()
+            if price is None:
+                price = prices.get(room_id, 0)
+            for night in span_nights(first, end):
+                for totals in (daily[night], monthly[(room_id, month_start(night))]):
+                    totals[0] += 1
+                    totals[1] += price
+
+        DailySummary.objects.all().delete()
+        MonthlyRoomSummary.objects.all().delete()
+        DailySummary.objects.bulk_create(
+            [DailySummary(day=day, nights_sold=n, revenue=r) for day, (n, r) in daily.items()],
+            batch_size=REBUILD_BATCH_SIZE
+        )
+        MonthlyRoomSummary.objects.bulk_create(
+            [MonthlyRoomSummary(room_id=room_id, month=month, nights_sold=n, revenue=r)
+             for (room_id, month), (n, r) in monthly.items()],
+            batch_size=REBUILD_BATCH_SIZE
+        )
+    return len(daily), len(monthly)
+
+
+def month_report(month, room_count):
+    """
+    Everything the reports page shows for one month, from the summary tables
+    only: per-room rows, per-day rows and the month's totals.
+    """
+    days = days_in_month(month)
+    end = month + datetime.timedelta(days=days)
+
+    rooms = []
+    for summary in MonthlyRoomSummary.objects.filter(month=month).select_related('room').order_by('room__room_number'):
+        rooms.append({
+            'room': summary.room,
+            'nights_sold': summary.nights_sold,
+            'revenue': summary.revenue,
+            'occupancy': summary.nights_sold / days,
+        })
+
+    stored = {s.day: s for s in DailySummary.objects.filter(day__gte=month, day__lt=end)}
+    daily = []
+    for day in span_nights(month, end):
+        summary = stored.get(day)
+        nights = summary.nights_sold if summary else 0
+        daily.append({
+            'day': day,
+            'nights_sold': nights,
+            'revenue': summary.revenue if summary else 0,
+            'occupancy': nights / room_count if room_count else 0,
+        })
+
+    nights_sold = sum(row['nights_sold'] for row in daily)
+    capacity = room_count * days
+    return {
+        'rooms': rooms,
+        'daily': daily,
+        'nights_sold': nights_sold,
+        'revenue': sum(row['revenue'] for row in daily),
+        'occupancy': nights_sold / capacity if capacity else 0,
+    }
+
+
+def monthly_totals(first_month, last_month):
+    """Hotel-wide nights sold and revenue per month, oldest first."""
+    return list(
+        MonthlyRoomSummary.objects.filter(month__gte=first_month, month__lte=last_month)
+        .values('month')
+        .annotate(nights_sold=Sum('nights_sold'), revenue=Sum('revenue'))
+        .order_by('month')
+    )
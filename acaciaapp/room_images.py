@@ -0,0 +1,146 @@
+import hashlib
+import json
+import os
+import tempfile
+
+from django.core.files.storage import default_storage
+from PIL import Image, ImageOps
+
+# Target widths in px; images are never upscaled
+SIZES = {
+    "thumb": 160,
+    "card": 480,
+    "hero": 1200,
+}
+FORMATS = {
+    "webp": ("WEBP", "webp", {"quality": 80, "method": 4}),
+    "jpeg": ("JPEG", "jpg", {"quality": 82, "optimize": True, "progressive": True}),
+}
+DERIVED_DIR = "rooms/derived"
+
+
+def derived_base(name):
+    """
+    Storage name prefix shared by all derivatives of `name`. The original's
+    size is part of the digest, so replacing a file under the same name
+    yields new derivatives.
+    """
+    try:
+        stamp = default_storage.size(name)
+    except OSError:
+        stamp = 0
+    digest = hashlib.sha1(f"{name}:{stamp}".encode("utf-8")).hexdigest()[:10]
+    stem = os.path.splitext(os.path.basename(name))[0]
+    return f"{DERIVED_DIR}/{stem}-{digest}"
+
+
+def derivative_name(name, size, fmt, base=None):
+    """Storage name of one derivative."""
+    return f"{base or derived_base(name)}-{size}.{FORMATS[fmt][1]}"
+
+
+def _write(path, save):
+    """Write through save(file) to a temp file and swap it in."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            save(f)
+        os.replace(tmp_path, path)  # concurrent generators race harmlessly
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def _write_image(image, path, fmt):
+    pil_format, _, options = FORMATS[fmt]
+    _write(path, lambda f: image.save(f, pil_format, **options))
+
+
+def generate_derivatives(name, force=False):
+    """
+    Write every size/format derivative of the image `name`, plus a manifest
+    of the widths they came out at. Returns the names written.
+    """
+    base = derived_base(name)
+    manifest = f"{base}.json"
+    wanted = {
+        (size, fmt): derivative_name(name, size, fmt, base)
+        for size in SIZES for fmt in FORMATS
+    }
+    if not force:
+        wanted = {key: out for key, out in wanted.items() if not default_storage.exists(out)}
+        if not wanted and default_storage.exists(manifest):
+            return []
+
+    with default_storage.open(name, "rb") as f:
+        original = Image.open(f)
+        original = ImageOps.exif_transpose(original)
+        original = original.convert("RGB")
+
+    written = []
+    widths = {}
+    for size in SIZES:
+        width = widths[size] = min(SIZES[size], original.width)
+        height = max(1, round(original.height * width / original.width))
+        if not any((size, fmt) in wanted for fmt in FORMATS):
+            continue
+        resized = original.resize((width, height), Image.LANCZOS)
+        for fmt in FORMATS:
+            out = wanted.get((size, fmt))
+            if out:
+                _write_image(resized, default_storage.path(out), fmt)
+                written.append(out)
+
+    _write(default_storage.path(manifest), lambda f: f.write(json.dumps(widths).encode("utf-8")))
+    _widths.pop(base, None)
+    return written
+
+
+# Manifest contents by derived_base(), so a warm process renders a room
+# picture with a single stat of the original
+_widths = {}
+
+
+def _read_widths(base):
+    widths = _widths.get(base)
+    if widths is None:
+        try:
+            with default_storage.open(f"{base}.json", "rb") as f:
+                widths = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if set(widths) != set(SIZES):
+            return None
+        _widths[base] = widths
+    return widths
+
+
+def derivative_urls(image):
+    """
+    {fmt: {size: (url, width)}} for an ImageField file, with the width each
+    derivative actually has (small originals are never upscaled). Missing
+    derivatives are generated on first use. Returns None if the original
+    can't be read, so callers fall back to the plain image URL.
+    """
+    if not image:
+        return None
+    base = derived_base(image.name)
+    widths = _read_widths(base)
+    if widths is None:
+        try:
+            generate_derivatives(image.name)
+        except (OSError, ValueError):
+            return None
+        widths = _read_widths(base)
+        if widths is None:
+            return None
+
+    return {
+        fmt: {
+            size: (default_storage.url(derivative_name(image.name, size, fmt, base)), widths[size])
+            for size in SIZES
+        }
+        for fmt in FORMATS
+    }
@@ -0,0 +1,111 @@
+"""
+Seating capacity for table reservations.
+
+Reservations are counted per slot (settings.RESERVATION_SLOT_MINUTES) in
+SeatingSlot rows. Claiming seats is one conditional UPDATE that only
+succeeds while the slot still has room, so concurrent reservations can never
+push a slot past its capacity and no Reservation rows are scanned.
+"""
+import datetime
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Q
+
+from .models import Reservation, SeatingCapacity, SeatingSlot
+
+
+class SlotFull(Exception):
+    """The reservation slot does not have enough seats left."""
+
+    def __init__(self, slot, remaining):
+        self.slot = slot
+        self.remaining = remaining
+        super().__init__(
+            f"Only {remaining} seat(s) left at {slot:%H:%M}." if remaining
+            else f"The {slot:%H:%M} slot is fully booked."
+        )
+
+
+def slot_start(time):
+    """The start of the slot `time` falls in."""
+    minutes = time.hour * 60 + time.minute
+    minutes -= minutes % settings.RESERVATION_SLOT_MINUTES
+    return datetime.time(minutes // 60, minutes % 60)
+
+
+def slot_capacity(day, slot):
+    """Seats in this slot: the best-matching SeatingCapacity rule or the default."""
+    rule = SeatingCapacity.objects.filter(
+        Q(weekday=day.weekday()) | Q(weekday__isnull=True), start__lte=slot, end__gt=slot
+    ).order_by(F('weekday').asc(nulls_last=True), '-start').values_list('seats', flat=True).first()
+    return settings.RESERVATION_DEFAULT_SEATS if rule is None else rule
+
+
+def claim_seats(day, time, people):
+    """Book `people` seats in the slot of `time`, or raise SlotFull."""
+    slot = slot_start(time)
+    capacity = slot_capacity(day, slot)
+    with transaction.atomic():
+        SeatingSlot.objects.bulk_create([SeatingSlot(date=day, slot=slot)], ignore_conflicts=True)
+        claimed = SeatingSlot.objects.filter(
+            date=day, slot=slot, booked__lte=capacity - people
+        ).update(booked=F('booked') + people)
+    if not claimed:
+        raise SlotFull(slot, remaining_seats(day, time))
+
+
+def release_seats(day, time, people):
+    SeatingSlot.objects.filter(
+        date=day, slot=slot_start(time), booked__gte=people
+    ).update(booked=F('booked') - people)
+
+
+def remaining_seats(day, time):
+    """Seats still free in the slot of `time`; two indexed lookups."""
+    slot = slot_start(time)
+    booked = SeatingSlot.objects.filter(date=day, slot=slot).values_list('booked', flat=True).first() or 0
+    return max(slot_capacity(day, slot) - booked, 0)
+
+
+def check_seats(day, time, people, held=None):
+    """
+    Raise SlotFull unless the slot of `time` can take `people` more. `held`
+    is the (date, time, people) an edited reservation already holds, which
+    it gives back if it stays in the same slot. Only a pre-check for forms:
+    claim_seats() is what enforces capacity.
+    """
+    slot = slot_start(time)
+    remaining = remaining_seats(day, time)
+    if held and held[0] == day and slot_start(held[1]) == slot:
+        remaining += held[2]
+    if people > remaining:
+        raise SlotFull(slot, remaining)
+
+
+def recount(days=None):
+    """
+    Rebuild the counters from Reservation, for the given dates or all of
+    them. For data written without Reservation.save(), e.g. bulk imports.
+    Returns the number of slots written.
+    """
+    reservations = Reservation.objects.all()
+    slots = SeatingSlot.objects.all()
+    if days is not None:
+        reservations = reservations.filter(date__in=days)
+        slots = slots.filter(date__in=days)
+
+    # Read and write in one transaction, so a reservation saved meanwhile is
+    # either counted here or claims against the rebuilt rows
+    with transaction.atomic():
+        totals = {}
+        for day, time, people in reservations.values_list('date', 'time', 'people').iterator():
+            key = (day, slot_start(time))
+            totals[key] = totals.get(key, 0) + people
+
+        slots.delete()
+        SeatingSlot.objects.bulk_create(
+            [SeatingSlot(date=day, slot=slot, booked=booked) for (day, slot), booked in totals.items()],
+            batch_size=1000
+        )
+    return len(totals)
@@ -0,0 +1,54 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .availability import invalidate_availability
+from .models import EventBooking, Reservation, Room, RoomBooking
+from .reports import record_spans
+from .room_images import generate_derivatives
+from .seating import release_seats
+from .venues import release_venue
+from .timeline import invalidate_timeline
+
+
+@receiver([post_save, post_delete], sender=RoomBooking)
+@receiver([post_save, post_delete], sender=Reservation)
+@receiver([post_save, post_delete], sender=EventBooking)
+def booking_changed(sender, instance, **kwargs):
+    invalidate_timeline(instance.user_id)
+    if sender is RoomBooking:
+        invalidate_availability()
+
+
+@receiver(post_delete, sender=RoomBooking)
+def room_booking_deleted(sender, instance, **kwargs):
+    # Saves update the summaries themselves; deletes land here
+    span = getattr(instance, '_stored_span', None) or instance.sold_span()
+    record_spans(unsold=[span])
+
+
+@receiver(post_delete, sender=Reservation)
+def reservation_deleted(sender, instance, **kwargs):
+    release_seats(instance.date, instance.time, instance.people)
+
+
+@receiver(post_delete, sender=EventBooking)
+def event_booking_deleted(sender, instance, **kwargs):
+    hold = getattr(instance, '_stored_hold', None) or instance.venue_hold()
+    if hold:
+        release_venue(*hold)
+
+
+@receiver(post_delete, sender=Room)
+def room_deleted(sender, instance, **kwargs):
+    invalidate_availability()
+
+
+@receiver(post_save, sender=Room)
+def room_saved(sender, instance, **kwargs):
+    invalidate_availability()
+    # Resize new uploads straight away; the template tag covers anything missed
+    if instance.image:
+        try:
+            generate_derivatives(instance.image.name)
+        except (OSError, ValueError):
+            pass
@@ -0,0 +1,73 @@
+import gzip
+import os
+
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+
+try:
+    import brotli
+except ImportError:  # brotli is optional; gzip variants are always written
+    brotli = None
+
+COMPRESSIBLE_EXTENSIONS = (".css", ".js", ".svg", ".json", ".txt", ".html", ".xml", ".map")
+MIN_COMPRESS_SIZE = 512
+
+
+def compress_file(path):
+    """
+    Write path.gz (and path.br when brotli is installed) next to path, keeping
+    only variants that are actually smaller. Returns the variants written.
+    """
+    with open(path, "rb") as f:
+        data = f.read()
+    if len(data) < MIN_COMPRESS_SIZE:
+        return []
+
+    variants = [(".gz", gzip.compress(data, compresslevel=9, mtime=0))]
+    if brotli is not None:
+        variants.append((".br", brotli.compress(data, quality=11)))
+
+    written = []
+    for suffix, compressed in variants:
+        if len(compressed) >= len(data):
+            continue
+        tmp_path = f"{path}{suffix}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(compressed)
+        os.replace(tmp_path, path + suffix)
+        written.append(path + suffix)
+    return written
+
+
+class PrecompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    """
+    Manifest (content-hashed) storage that also writes .gz/.br siblings for
+    text assets at collectstatic time, so they can be served as-is by
+    PrecompressedStaticMiddleware.
+    """
+    # Unknown names fall back to the unhashed file instead of a 500
+    manifest_strict = False
+
+    def stored_name(self, name):
+        # Some templates reference icons that were never added to static/;
+        # keep emitting the plain URL for those rather than failing the page
+        try:
+            return super().stored_name(name)
+        except ValueError:
+            return name
+
+    def url_converter(self, name, hashed_files, template=None):
+        # Source maps aren't collected (see StaticAssetsConfig), so drop the
+        # comments pointing at them instead of failing to hash a missing file
+        if template is not None and "sourceMappingURL" in template:
+            return lambda matchobj: ""
+        return super().url_converter(name, hashed_files, template)
+
+    def post_process(self, paths, dry_run=False, **options):
+        yield from super().post_process(paths, dry_run=dry_run, **options)
+        if dry_run:
+            return
+
+        names = set(paths) | set(self.hashed_files.values())
+        for name in sorted(names):
+            if name.endswith(COMPRESSIBLE_EXTENSIONS) and self.exists(name):
+                compress_file(self.path(name))
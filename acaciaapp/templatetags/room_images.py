@@ -0,0 +1,39 @@
+from django import template
+from django.utils.html import format_html
+
+from acaciaapp.room_images import derivative_urls
+
+register = template.Library()
+
+
+@register.simple_tag
+def room_picture(image, size="card", sizes="100vw", alt="", css_class="", loading="lazy"):
+    """
+    <picture> for a room image: WebP and JPEG srcsets over the thumb/card/hero
+    derivatives, with `size` as the fallback src. Falls back to the original
+    upload if derivatives can't be produced.
+
+        {% room_picture room.image "card" sizes="(max-width: 768px) 100vw, 33vw" alt="Room 4" %}
+    """
+    if not image:
+        return ""
+
+    urls = derivative_urls(image)
+    if urls is None:
+        return format_html('<img src="{}" class="{}" alt="{}" loading="{}">', image.url, css_class, alt, loading)
+
+    def srcset(fmt):
+        # Small originals give several derivatives of the same width; list each width once
+        by_width = {}
+        for url, width in urls[fmt].values():
+            by_width.setdefault(width, url)
+        return ", ".join(f"{url} {width}w" for width, url in by_width.items())
+
+    fallback = urls["jpeg"][size][0]
+    return format_html(
+        '<picture>'
+        '<source type="image/webp" srcset="{}" sizes="{}">'
+        '<img src="{}" srcset="{}" sizes="{}" class="{}" alt="{}" loading="{}" decoding="async">'
+        '</picture>',
+        srcset("webp"), sizes, fallback, srcset("jpeg"), sizes, css_class, alt, loading,
+    )
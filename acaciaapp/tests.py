@@ -1,3 +1,886 @@
-from django.test import TestCase
+import datetime
+import io
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+from smtplib import SMTPException
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.cache import caches
+from django.core import mail
+from django.core.mail.backends.base import BaseEmailBackend
+from django.core.management import call_command
+from django.db import transaction, connections
+from django.test import TransactionTestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from PIL import Image
+from reportlab import rl_config
+
+from .models import (
+    DailySummary, EventBooking, MonthlyRoomSummary, OutboxEmail, Reservation, Room, RoomBooking, RoomNight,
+    RoomUnavailable, SeatingCapacity, SeatingSlot, Ticket, TicketJob, TicketSequence, Venue, VenueDay,
+)
+from .bulk_io import export_fields
+from .management.commands.benchmark_ticket_pdf import sample_tickets
+from .management.commands.process_ticket_jobs import Command as ProcessTicketJobs
+from .metrics import BACKGROUND, PDF_SECONDS, export
+from .outbox import OutboxSender
+from .pagination import encode_cursor, keyset_paginate
+from . import room_images, ticket_numbers
+from .seating import SlotFull
+from .templatetags.room_images import room_picture
+from .ticket_cache import TicketPDFCache, get_ticket_pdf_cache
+from .ticket_numbers import TicketNumberAllocator
+from .timeline import get_timeline
+from .utils import TicketTemplate, queue_ticket_email, render_ticket_pdf
+from .venues import VenueFull
+
+
+# Files the tests write (media, PDF caches, exports) go under here, one
+# directory per setting, emptied around each test
+TEST_FILES = os.path.join(tempfile.gettempdir(), f"acaciaapp-tests-{os.getpid()}")
+
+
+def fresh_dir(test, path):
+    """Create `path` empty for this test and remove it again afterwards."""
+    shutil.rmtree(path, ignore_errors=True)
+    os.makedirs(path)
+    test.addCleanup(shutil.rmtree, path, True)
+
+
+# Keep the tests off whatever the shared booking cache points at
+TEST_CACHES = {
+    **settings.CACHES,
+    'bookings': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'tests'},
+}
+
+
+class BookingFixtures:
+    """A guest and a room, and a helper to book rooms, for TransactionTestCase classes."""
+
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user("guest", password="pw", email="guest@example.com")
+        self.room = self.make_room("101")
+
+    def make_room(self, number, capacity=2, price=5000):
+        return Room.objects.create(room_number=number, capacity=capacity, price=price, description="Double")
+
+    def book(self, check_in, check_out, room=None, **extra):
+        return RoomBooking.objects.create(
+            user=self.user, room=room or self.room, customer_name="Guest", email="g@example.com", phone="1",
+            age=30, id_number="1", people=2, check_in=check_in, check_out=check_out, **extra,
+        )
+
+
+def run_concurrently(attempt, refused, workers=6, tries=3):
+    """
+    Call attempt(worker, n) from `workers` threads at once, each on its own
+    connection. Returns (claimed, refused) counts, where a refusal is one of
+    the `refused` exceptions; any other error fails.
+    """
+    start = threading.Barrier(workers)
+    results, errors = [], []
+
+    def run(worker):
+        try:
+            start.wait()
+            for n in range(tries):
+                try:
+                    attempt(worker, n)
+                    results.append(True)
+                except refused:
+                    results.append(False)
+        except Exception as e:
+            errors.append(e)
+        finally:
+            connections.close_all()
+
+    threads = [threading.Thread(target=run, args=(worker,)) for worker in range(workers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    if errors:
+        raise errors[0]
+    return results.count(True), results.count(False)
+
+
+class RoomSearchTests(BookingFixtures, TransactionTestCase):
+    """Room.objects.available_between: booked rooms drop out, filters narrow the rest."""
+
+    def test_capacity_and_price_filters(self):
+        self.make_room("201", capacity=4, price=12000)
+        self.make_room("301", capacity=4, price=20000)
+        self.book(datetime.date(2030, 1, 1), datetime.date(2030, 1, 5))
+
+        def search(check_in, check_out, **filters):
+            rooms = Room.objects.available_between(check_in, check_out, **filters)
+            return sorted(rooms.values_list("room_number", flat=True))
+
+        stay = (datetime.date(2030, 1, 3), datetime.date(2030, 1, 6))
+        self.assertEqual(search(*stay), ["201", "301"])
+        self.assertEqual(search(*stay, capacity=3, max_price=15000), ["201"])
+        self.assertEqual(search(*stay, min_price=15000), ["301"])
+        self.assertEqual(search(datetime.date(2030, 1, 10), datetime.date(2030, 1, 12), capacity=2),
+                         ["101", "201", "301"])
+
+
+class TicketJobTests(BookingFixtures, TransactionTestCase):
+    """process_ticket_jobs: failed jobs back off, then give up and mark the ticket failed."""
+
+    def setUp(self):
+        super().setUp()
+        booking = self.book(datetime.date(2030, 1, 2), datetime.date(2030, 1, 4))
+        self.ticket = Ticket.objects.create(user=self.user, booking_type="room", room_booking=booking)
+        self.job = TicketJob.objects.create(ticket=self.ticket, max_attempts=2)
+        self.worker = ProcessTicketJobs(stdout=io.StringIO(), stderr=io.StringIO())
+
+    def run_batch(self):
+        return self.worker.run_batch({"batch_size": 10, "lock_timeout": 300, "backoff": 60})
+
+    @mock.patch("acaciaapp.management.commands.process_ticket_jobs.fulfil_ticket")
+    def test_retries_with_backoff_then_fails(self, fulfil):
+        fulfil.side_effect = OSError("disk full")
+        started = timezone.now()
+        self.assertEqual(self.run_batch(), 1)
+        self.job.refresh_from_db()
+        self.assertEqual(self.job.attempts, 1)
+        self.assertEqual(self.job.last_error, "OSError: disk full")
+        self.assertGreaterEqual(self.job.run_after, started + datetime.timedelta(seconds=60))
+        self.assertIsNone(self.job.finished_at)
+
+        # Not due yet
+        self.assertEqual(self.run_batch(), 0)
+
+        TicketJob.objects.filter(pk=self.job.pk).update(run_after=timezone.now())
+        self.assertEqual(self.run_batch(), 1)
+        self.job.refresh_from_db()
+        self.assertEqual(self.job.attempts, 2)
+        self.assertIsNotNone(self.job.finished_at)
+        self.ticket.refresh_from_db()
+        self.assertEqual(self.ticket.fulfilment_status, Ticket.STATUS_FAILED)
+        self.assertEqual(self.run_batch(), 0)
+
+    @mock.patch("acaciaapp.management.commands.process_ticket_jobs.fulfil_ticket")
+    def test_retry_that_succeeds_finishes_the_job(self, fulfil):
+        fulfil.side_effect = [OSError("disk full"), None]
+        self.run_batch()
+        TicketJob.objects.filter(pk=self.job.pk).update(run_after=timezone.now())
+        self.run_batch()
+        self.job.refresh_from_db()
+        self.assertEqual((self.job.attempts, fulfil.call_count), (1, 2))
+        self.assertIsNotNone(self.job.finished_at)
+        self.assertIsNone(self.job.locked_at)
+
+
+class TicketRenderTests(TransactionTestCase):
+    """The pre-built logo must give exactly what plain drawImage() gives."""
+
+    def render(self, ticket, template):
+        output = io.BytesIO()
+        render_ticket_pdf(ticket, output, template=template)
+        return output.getvalue()
+
+    def test_prebuilt_logo_matches_drawimage(self):
+        invariant = rl_config.invariant
+        rl_config.invariant = 1  # no timestamps or random ids in the output
+        self.addCleanup(setattr, rl_config, "invariant", invariant)
+
+        template = TicketTemplate()
+        self.assertIsNotNone(template._logo, "reportlab internals moved; logo is no longer pre-built")
+        plain = TicketTemplate()
+        plain._logo = None
+        for ticket in sample_tickets():
+            # Twice through the cached template: each canvas gets its own copy
+            first = self.render(ticket, template)
+            self.assertTrue(first.startswith(b"%PDF"))
+            self.assertEqual(self.render(ticket, template), first)
+            self.assertEqual(self.render(ticket, plain), first)
+
+
+@override_settings(TICKET_PDF_CACHE_DIR=os.path.join(TEST_FILES, "tickets"), SENDFILE_BACKEND=None)
+class TicketDownloadTests(BookingFixtures, TransactionTestCase):
+    """ticket_pdf_view: ETags and single byte ranges over the PDF cache, which evicts LRU."""
+
+    def setUp(self):
+        super().setUp()
+        fresh_dir(self, settings.TICKET_PDF_CACHE_DIR)
+        get_ticket_pdf_cache.cache_clear()
+        self.addCleanup(get_ticket_pdf_cache.cache_clear)
+
+        booking = self.book(datetime.date(2030, 1, 2), datetime.date(2030, 1, 4))
+        ticket = Ticket.objects.create(user=self.user, booking_type="room", room_booking=booking)
+        self.url = reverse("ticket_pdf", args=[ticket.pk])
+        self.client.force_login(self.user)
+        self.pdf = b"".join(self.client.get(self.url).streaming_content)
+
+    def get(self, **headers):
+        return self.client.get(self.url, headers=headers)
+
+    def test_byte_ranges(self):
+        size = len(self.pdf)
+        response = self.get(Range="bytes=0-99")
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response["Content-Range"], f"bytes 0-99/{size}")
+        self.assertEqual(b"".join(response.streaming_content), self.pdf[:100])
+
+        response = self.get(Range="bytes=-100")
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response["Content-Range"], f"bytes {size - 100}-{size - 1}/{size}")
+        self.assertEqual(b"".join(response.streaming_content), self.pdf[-100:])
+
+        for unsatisfiable in ("bytes=-0", f"bytes={size}-"):
+            response = self.get(Range=unsatisfiable)
+            self.assertEqual(response.status_code, 416, unsatisfiable)
+            self.assertEqual(response["Content-Range"], f"bytes */{size}")
+
+    def test_matching_etag_is_not_modified(self):
+        etag = self.get()["ETag"]
+        self.assertTrue(etag)
+        self.assertEqual(self.get(If_None_Match=etag).status_code, 304)
+        self.assertEqual(self.get(If_None_Match='"stale"').status_code, 200)
+
+    def test_eviction_removes_least_recently_used(self):
+        directory = os.path.join(settings.TICKET_PDF_CACHE_DIR, "lru")
+        cache = TicketPDFCache(directory, max_bytes=10 ** 9)
+        oldest, older, newest = sample_tickets()
+        paths = [cache.get_or_render(ticket)[0] for ticket in (oldest, older)]
+        for age, path in zip((300, 200), paths):
+            os.utime(path, (time.time() - age, time.time() - age))
+
+        # Room for `older` and `newest` only
+        size = os.path.getsize(TicketPDFCache(os.path.join(directory, "sizing"), 10 ** 9).get_or_render(newest)[0])
+        cache.max_bytes = os.path.getsize(paths[1]) + size
+        newest_path, _ = cache.get_or_render(newest)
+
+        self.assertFalse(os.path.exists(paths[0]))
+        self.assertTrue(os.path.exists(paths[1]))
+        self.assertTrue(os.path.exists(newest_path))
+
+
+class TicketNumberTests(TransactionTestCase):
+    """Ticket numbers: a keyed permutation of a counter reserved in blocks."""
+
+    def test_permutation_is_a_bijection(self):
+        # Same network over 6 x 6 values instead of 36^4 x 36^4
+        with mock.patch.object(ticket_numbers, "_HALF", 6):
+            self.assertEqual(sorted(ticket_numbers.permute(n, b"key") for n in range(36)), list(range(36)))
+
+    def test_unique_across_block_refills(self):
+        allocator = TicketNumberAllocator(name="test", block_size=3)
+        numbers = [allocator.allocate() for _ in range(7)]
+        with transaction.atomic():
+            # No block is reserved in here; the refill waits for the commit
+            numbers.append(allocator.allocate())
+        numbers += [allocator.allocate() for _ in range(4)]
+        self.assertEqual(len(set(numbers)), 12)
+        self.assertTrue(all(len(n) == ticket_numbers.CODE_LENGTH for n in numbers))
+
+    def test_rolled_back_reservation_is_returned(self):
+        allocator = TicketNumberAllocator(name="test", block_size=2)
+        issued = [allocator.allocate(), allocator.allocate()]  # uses up the block
+
+        with self.assertRaises(ZeroDivisionError), transaction.atomic():
+            lost = allocator.allocate()
+            1 / 0
+        self.assertEqual(TicketSequence.objects.get(name="test").next_value, 2)
+
+        # Nothing kept the rolled-back number, so it is handed out again
+        after = [allocator.allocate(), allocator.allocate()]
+        self.assertEqual(after[0], lost)
+        self.assertEqual(len(set(issued + after)), 4)
+
+
+class TicketScanTests(BookingFixtures, TransactionTestCase):
+    """ticket_scan clears each ticket once and answers scanners in JSON, refusals included."""
+
+    def scan(self, payload):
+        response = self.client.post(reverse("ticket_scan"), json.dumps(payload), content_type="application/json")
+        return response.status_code, response.json()
+
+    def login_staff(self):
+        User.objects.create_user("staff", password="pw", is_staff=True)
+        self.client.login(username="staff", password="pw")
+
+    def ticket(self, check_in):
+        booking = self.book(check_in, check_in + datetime.timedelta(days=1))
+        return Ticket.objects.create(user=self.user, booking_type="room", room_booking=booking).ticket_number
+
+    def test_anonymous_gets_401(self):
+        status, body = self.scan({"ticket_number": "NOPE"})
+        self.assertEqual(status, 401)
+        self.assertIn("error", body)
+
+    def test_guest_gets_403(self):
+        self.client.login(username="guest", password="pw")
+        self.assertEqual(self.scan({"ticket_number": "NOPE"})[0], 403)
+
+    def test_ticket_clears_once(self):
+        code = self.ticket(datetime.date(2030, 1, 1))
+        self.login_staff()
+        # Scanners may send lower case and stray whitespace
+        status, body = self.scan({"ticket_number": f" {code.lower()} "})
+        self.assertEqual((status, body["status"], body["ticket_number"]), (200, "cleared", code))
+        self.assertEqual(self.scan({"ticket_number": code})[1]["status"], "already_used")
+        self.assertEqual(self.scan({"ticket_number": "NOPE"})[1]["status"], "not_found")
+
+    def test_batch_with_a_duplicate(self):
+        code = self.ticket(datetime.date(2030, 1, 1))
+        self.login_staff()
+        status, body = self.scan({"ticket_numbers": [code, code.lower(), "NOPE"]})
+        self.assertEqual(status, 200)
+        self.assertEqual([r["status"] for r in body["results"]], ["cleared", "already_used", "not_found"])
+
+
+class KeysetPaginationTests(TransactionTestCase):
+    """keyset_paginate: cursors walk every row once; bad cursors mean page one."""
+
+    def setUp(self):
+        self.user = User.objects.create_user("staff", password="pw", is_staff=True)
+        for i in range(5):
+            Reservation.objects.create(user=self.user, reserved_name=f"Guest {i}", phone="1", email="g@example.com",
+                                       people=1, date=datetime.date(2030, 1, 1 + i % 2), time=datetime.time(12, i))
+
+    def test_pages_cover_every_row(self):
+        seen, cursor = [], None
+        while True:
+            page = keyset_paginate(Reservation.objects.all(), ["-date", "-time", "-id"], cursor, per_page=2)
+            seen.extend(r.pk for r in page)
+            if not page.has_next:
+                break
+            cursor = page.next_cursor
+        self.assertEqual(sorted(seen), sorted(Reservation.objects.values_list("pk", flat=True)))
+
+    def test_bad_cursor_is_page_one(self):
+        self.client.login(username="staff", password="pw")
+        for cursor in (encode_cursor(["notadate", "x", 1]), encode_cursor([None, None, None]),
+                       encode_cursor([[1], {}, "y"]), "!!!"):
+            response = self.client.get(reverse("admin_dashboard"), {
+                "reservations_after": cursor, "bookings_after": cursor, "events_after": cursor,
+            })
+            self.assertEqual(response.status_code, 200)
+            self.assertTrue(response.context["table_reservations"].is_first)
+
+
+class RoomBookingTests(BookingFixtures, TransactionTestCase):
+    """Room nights never oversell, even under concurrent writes; the admin reports clashes as form errors."""
+
+    def test_overlapping_bookings_race(self):
+        day = datetime.date(2030, 1, 1)
+        # Every attempt overlaps every other on the 3rd
+        claimed, refused = run_concurrently(
+            lambda worker, n: self.book(day + datetime.timedelta(days=n), day + datetime.timedelta(days=3 + n)),
+            RoomUnavailable,
+        )
+        self.assertEqual((claimed, refused), (1, 17))
+        self.assertEqual(RoomBooking.objects.count(), 1)
+        self.assertEqual(RoomNight.objects.count(), 3)
+
+    def booking_form(self, check_in, check_out):
+        return {"user": self.user.pk, "room": self.room.pk, "customer_name": "Guest", "email": "g@example.com",
+                "phone": "1", "age": 30, "id_number": "1", "people": 2, "check_in": check_in,
+                "check_out": check_out, "message": ""}
+
+    def test_admin_reports_taken_nights(self):
+        User.objects.create_superuser("admin", "admin@example.com", "pw")
+        self.client.login(username="admin", password="pw")
+        booking = self.book(datetime.date(2030, 1, 2), datetime.date(2030, 1, 4))
+
+        url = reverse("admin:acaciaapp_roombooking_add")
+        self.assertContains(self.client.post(url, self.booking_form("2030-01-03", "2030-01-05")), "already booked")
+        self.assertContains(self.client.post(url, self.booking_form("2030-01-05", "2030-01-05")),
+                            "Check-out must be after check-in.")
+        self.assertEqual(self.client.post(url, self.booking_form("2030-01-04", "2030-01-06")).status_code, 302)
+
+        # Editing a booking doesn't clash with its own nights
+        url = reverse("admin:acaciaapp_roombooking_change", args=[booking.pk])
+        self.assertEqual(self.client.post(url, self.booking_form("2030-01-01", "2030-01-04")).status_code, 302)
+        self.assertEqual(RoomNight.objects.count(), 5)
+
+
+class OccupancyTests(BookingFixtures, TransactionTestCase):
+    """Room.is_occupied follows the room's uncleared bookings."""
+
+    def test_clearing_one_of_two_bookings_keeps_the_room_occupied(self):
+        # Back to back: both hold the room on the 3rd, the changeover day
+        first = self.book(datetime.date(2030, 1, 1), datetime.date(2030, 1, 3))
+        second = self.book(datetime.date(2030, 1, 3), datetime.date(2030, 1, 5))
+        for booking, occupied in ((first, True), (second, False)):
+            booking.is_cleared = True
+            booking.save(update_fields=["is_cleared"])
+            self.room.refresh_from_db()
+            self.assertEqual(self.room.is_occupied, occupied)
+        self.assertEqual(Room.objects.refresh_occupancy(), 0)
+
+
+@override_settings(CACHES=TEST_CACHES)
+class TimelineCacheTests(TransactionTestCase):
+    """get_timeline: cached in the shared cache, invalidated once writes commit."""
+
+    def setUp(self):
+        caches["bookings"].clear()
+        self.user = User.objects.create_user("guest", password="pw")
+
+    def reserve(self):
+        return Reservation.objects.create(user=self.user, reserved_name="Guest", phone="1",
+                                          email="g@example.com", people=2, date="2030-01-01", time="19:00")
+
+    def test_new_booking_shows_after_commit(self):
+        self.assertEqual(get_timeline(self.user)["active_reservations"], [])
+        self.reserve()
+        self.assertEqual(len(get_timeline(self.user)["active_reservations"]), 1)
+
+    def test_version_moves_only_on_commit(self):
+        get_timeline(self.user)
+        with transaction.atomic():
+            self.reserve()
+            # A reader during the transaction still gets the committed view
+            self.assertEqual(get_timeline(self.user)["active_reservations"], [])
+        self.assertEqual(len(get_timeline(self.user)["active_reservations"]), 1)
+
+
+class PageCacheTests(TransactionTestCase):
+    """cached_page: one cached copy per auth variant, revalidated with ETags."""
+
+    def setUp(self):
+        caches[settings.PAGE_CACHE_ALIAS].clear()
+
+    def test_anonymous_and_signed_in_pages_are_kept_apart(self):
+        anonymous = self.client.get("/")
+        User.objects.create_user("guest", password="pw")
+        self.client.login(username="guest", password="pw")
+        signed_in = self.client.get("/")
+
+        self.assertEqual((anonymous.status_code, signed_in.status_code), (200, 200))
+        self.assertNotEqual(anonymous.content, signed_in.content)
+        self.assertNotEqual(anonymous["ETag"], signed_in["ETag"])
+        self.assertIn("public", anonymous["Cache-Control"])
+        self.assertIn("private", signed_in["Cache-Control"])
+
+        revalidated = self.client.get("/", headers={"If-None-Match": signed_in["ETag"]})
+        self.assertEqual(revalidated.status_code, 304)
+        self.assertEqual(self.client.get("/", headers={"If-None-Match": anonymous["ETag"]}).status_code, 200)
+
+
+@override_settings(MEDIA_ROOT=os.path.join(TEST_FILES, "media"))
+class RoomPictureTests(BookingFixtures, TransactionTestCase):
+    """room_picture: real derivative widths, generation only on a miss."""
+
+    def setUp(self):
+        fresh_dir(self, os.path.join(settings.MEDIA_ROOT, "rooms"))
+        room_images._widths.clear()
+        Image.new("RGB", (300, 200), "white").save(os.path.join(settings.MEDIA_ROOT, "rooms", "small.jpg"))
+        super().setUp()
+        self.room.image = "rooms/small.jpg"
+        self.room.save()
+
+    def test_srcset_uses_real_widths(self):
+        html = room_picture(self.room.image, "hero")
+        self.assertIn("160w", html)
+        self.assertIn("300w", html)
+        self.assertNotIn("480w", html)
+        self.assertNotIn("1200w", html)
+        self.assertEqual(html.count("300w"), 2)  # once per format
+
+    def test_generates_only_on_a_miss(self):
+        room_picture(self.room.image)
+        with mock.patch.object(room_images, "generate_derivatives") as generate:
+            room_picture(self.room.image)
+            room_images._widths.clear()  # a fresh process reads the manifest
+            room_picture(self.room.image)
+        generate.assert_not_called()
+
+
+@override_settings(MEDIA_ROOT=os.path.join(TEST_FILES, "media"), SENDFILE_BACKEND=None)
+class MediaAccessTests(TransactionTestCase):
+    """media_view: room images are public, ticket PDFs only reach their owner."""
+
+    def setUp(self):
+        fresh_dir(self, settings.MEDIA_ROOT)
+        for name in ("rooms/room.jpg", "tickets/Ticket_A.pdf", "other/secret.txt"):
+            os.makedirs(os.path.join(settings.MEDIA_ROOT, os.path.dirname(name)), exist_ok=True)
+            with open(os.path.join(settings.MEDIA_ROOT, name), "wb") as f:
+                f.write(b"data")
+
+        self.owner = User.objects.create_user("owner", password="pw")
+        self.other = User.objects.create_user("other", password="pw")
+        Ticket.objects.create(user=self.owner, booking_type="room", pdf_file="tickets/Ticket_A.pdf")
+
+    def test_room_images_are_public(self):
+        response = self.client.get("/media/rooms/room.jpg")
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("public", response["Cache-Control"])
+
+    def test_ticket_needs_its_owner(self):
+        self.assertEqual(self.client.get("/media/tickets/Ticket_A.pdf").status_code, 302)
+        self.client.force_login(self.other)
+        self.assertEqual(self.client.get("/media/tickets/Ticket_A.pdf").status_code, 404)
+        self.client.force_login(self.owner)
+        response = self.client.get("/media/tickets/Ticket_A.pdf")
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("private", response["Cache-Control"])
+
+    def test_traversal_through_public_prefix_is_not_public(self):
+        for url in ("/media/rooms/../tickets/Ticket_A.pdf", "/media/rooms/%2e%2e/tickets/Ticket_A.pdf"):
+            response = self.client.get(url)
+            self.assertNotEqual(response.status_code, 200, url)
+            self.assertNotIn("public", response.get("Cache-Control", ""), url)
+
+    def test_other_media_and_escapes_are_hidden(self):
+        self.assertEqual(self.client.get("/media/other/secret.txt").status_code, 404)
+        self.assertEqual(self.client.get("/media/rooms/../../manage.py").status_code, 404)
+
+
+class ExportImportTests(BookingFixtures, TransactionTestCase):
+    """export_bookings then import_bookings gives back the same rows."""
+
+    def snapshot(self):
+        rows = [list(model.objects.order_by("pk").values_list(*export_fields(model))) for model in (RoomBooking, Ticket)]
+        return rows + [list(RoomNight.objects.order_by("night").values_list("room_id", "night", "booking_id"))]
+
+    def test_round_trip_keeps_ticket_numbers_and_keys(self):
+        for check_in in (datetime.date(2030, 1, 2), datetime.date(2030, 1, 6)):
+            booking = self.book(check_in, check_in + datetime.timedelta(days=3))
+            Ticket.objects.create(user=self.user, booking_type="room", room_booking=booking)
+        before = self.snapshot()
+
+        directory = os.path.join(TEST_FILES, "exports")
+        fresh_dir(self, directory)
+        files = {"roombookings": os.path.join(directory, "bookings.csv"),
+                 "tickets": os.path.join(directory, "tickets.jsonl")}
+        for model, path in files.items():
+            call_command("export_bookings", model, output=path, stdout=io.StringIO(), stderr=io.StringIO())
+        Ticket.objects.all().delete()
+        RoomBooking.objects.all().delete()
+        self.assertFalse(RoomNight.objects.exists())
+
+        for model, path in files.items():
+            call_command("import_bookings", model, path, stdout=io.StringIO(), stderr=io.StringIO())
+        self.assertEqual(self.snapshot(), before)
+
+
+@override_settings(METRICS_EXPORT_DIR=os.path.join(TEST_FILES, "metrics"), METRICS_ALLOWED_IPS=["127.0.0.1"])
+class MetricsTests(TransactionTestCase):
+    """/metrics: the web process's registry plus what background commands export."""
+
+    def setUp(self):
+        fresh_dir(self, settings.METRICS_EXPORT_DIR)
+
+    def scrape(self):
+        response = self.client.get("/metrics")
+        self.assertEqual(response.status_code, 200)
+        return response.content.decode()
+
+    def test_worker_metrics_are_merged_in(self):
+        PDF_SECONDS.observe(0.3, view=BACKGROUND)
+        export("process_ticket_jobs")
+        body = self.scrape()
+        self.assertIn('acacia_ticket_pdf_seconds_count{view="<background>",source="process_ticket_jobs"}', body)
+        self.assertEqual(body.count("# TYPE acacia_ticket_pdf_seconds histogram"), 1)
+
+    def test_unknown_methods_are_one_label(self):
+        self.client.generic("BREW", "/about/")
+        body = self.scrape()
+        self.assertIn('method="other"', body)
+        self.assertNotIn('method="BREW"', body)
+
+
+class FailingEmailBackend(BaseEmailBackend):
+    """Refuses every message, like an SMTP server that is up but rejecting."""
+
+    def send_messages(self, email_messages):
+        raise SMTPException("451 try again later")
+
+
+@override_settings(
+    TICKET_PDF_CACHE_DIR=os.path.join(TEST_FILES, "tickets"),
+    EMAIL_BACKEND="django.core.mail.backends.locmem.EmailBackend",
+)
+class OutboxTests(BookingFixtures, TransactionTestCase):
+    """OutboxSender: sends with the ticket attached, retries with backoff, then gives up."""
+
+    def setUp(self):
+        super().setUp()
+        fresh_dir(self, settings.TICKET_PDF_CACHE_DIR)
+        get_ticket_pdf_cache.cache_clear()
+        self.addCleanup(get_ticket_pdf_cache.cache_clear)
+
+        booking = self.book(datetime.date(2030, 1, 2), datetime.date(2030, 1, 4))
+        self.ticket = Ticket.objects.create(user=self.user, booking_type="room", room_booking=booking,
+                                            fulfilment_status=Ticket.STATUS_QUEUED)
+        self.email = queue_ticket_email(self.ticket)
+
+    def test_sends_with_the_ticket_attached(self):
+        self.assertEqual(OutboxSender().send_batch(), (1, 0))
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].to, ["guest@example.com"])
+        self.assertEqual(mail.outbox[0].attachments[0][0], f"Ticket_{self.ticket.ticket_number}.pdf")
+        self.email.refresh_from_db()
+        self.assertIsNotNone(self.email.sent_at)
+        self.ticket.refresh_from_db()
+        self.assertEqual(self.ticket.fulfilment_status, Ticket.STATUS_EMAILED)
+
+    @override_settings(EMAIL_BACKEND="acaciaapp.tests.FailingEmailBackend")
+    def test_retries_with_backoff_then_fails(self):
+        OutboxEmail.objects.filter(pk=self.email.pk).update(max_attempts=2)
+        sender = OutboxSender(backoff=60)
+        started = timezone.now()
+        self.assertEqual(sender.send_batch(), (0, 1))
+        self.email.refresh_from_db()
+        self.assertEqual(self.email.attempts, 1)
+        self.assertEqual(self.email.last_error, "SMTPException: 451 try again later")
+        self.assertGreaterEqual(self.email.run_after, started + datetime.timedelta(seconds=60))
+        self.assertIsNone(self.email.failed_at)
+
+        # Not due yet
+        self.assertEqual(sender.send_batch(), (0, 0))
+
+        OutboxEmail.objects.filter(pk=self.email.pk).update(run_after=timezone.now())
+        self.assertEqual(sender.send_batch(), (0, 1))
+        self.email.refresh_from_db()
+        self.assertEqual(self.email.attempts, 2)
+        self.assertIsNotNone(self.email.failed_at)
+        self.assertIsNone(self.email.sent_at)
+        self.ticket.refresh_from_db()
+        self.assertEqual(self.ticket.fulfilment_status, Ticket.STATUS_FAILED)
+        self.assertEqual(sender.send_batch(), (0, 0))
+        self.assertEqual(mail.outbox, [])
+
+
+@override_settings(TICKET_PDF_CACHE_DIR=os.path.join(TEST_FILES, "tickets"))
+class RegenerateTicketsTests(BookingFixtures, TransactionTestCase):
+    """regenerate_tickets fills the download cache, not media/tickets."""
+
+    def setUp(self):
+        super().setUp()
+        fresh_dir(self, settings.TICKET_PDF_CACHE_DIR)
+        get_ticket_pdf_cache.cache_clear()
+        self.addCleanup(get_ticket_pdf_cache.cache_clear)
+
+        booking = self.book(datetime.date(2030, 1, 2), datetime.date(2030, 1, 4))
+        self.ticket = Ticket.objects.create(user=self.user, booking_type="room", room_booking=booking)
+
+    def regenerate(self, **options):
+        call_command("regenerate_tickets", workers=1, stdout=io.StringIO(), **options)
+
+    def test_downloads_find_regenerated_pdfs(self):
+        self.regenerate()
+        cache = get_ticket_pdf_cache()
+        path = cache.path_for(cache.key_for(Ticket.objects.get(pk=self.ticket.pk)))
+        self.assertTrue(os.path.exists(path))
+        self.assertEqual(Ticket.objects.get(pk=self.ticket.pk).pdf_file.name or "", "")
+
+        # A re-render swaps in a new file; a cache hit leaves it in place
+        inode = os.stat(path).st_ino
+        self.regenerate()
+        self.assertEqual(os.stat(path).st_ino, inode)
+        self.regenerate(force=True)
+        self.assertNotEqual(os.stat(path).st_ino, inode)
+
+
+class SummaryTests(BookingFixtures, TransactionTestCase):
+    """Incremental summary counters agree with rebuild_summaries."""
+
+    def snapshot(self):
+        return (
+            sorted(DailySummary.objects.filter(nights_sold__gt=0).values_list('day', 'nights_sold', 'revenue')),
+            sorted(MonthlyRoomSummary.objects.filter(nights_sold__gt=0).values_list(
+                'room_id', 'month', 'nights_sold', 'revenue')),
+        )
+
+    def test_increments_match_rebuild(self):
+        rooms = [self.make_room(str(200 + i), price=1000 * (i + 1)) for i in range(3)]
+        day = datetime.date(2030, 1, 28)
+
+        def book(room, first, nights):
+            return self.book(day + datetime.timedelta(days=first),
+                             day + datetime.timedelta(days=first + nights), room=room)
+
+        moved = book(rooms[0], 0, 5)
+        cleared = book(rooms[1], 0, 6)
+        deleted = book(rooms[2], 0, 2)
+        book(rooms[2], 3, 4)
+
+        moved.room = rooms[1]
+        moved.check_in = day + datetime.timedelta(days=10)
+        moved.check_out = day + datetime.timedelta(days=12)
+        moved.save()
+        cleared.is_cleared = True
+        cleared.save()
+        deleted.delete()
+
+        # Repricing a room leaves what was already sold alone
+        rooms[2].price = 9999
+        rooms[2].save()
+
+        incremental = self.snapshot()
+        self.assertTrue(incremental[0])
+        call_command("rebuild_summaries", stdout=io.StringIO())
+        self.assertEqual(self.snapshot(), incremental)
+        self.assertEqual(sum(row[3] for row in incremental[1] if row[0] == rooms[2].pk), 4 * 3000)
+
+    def test_report_month_out_of_range_is_rejected(self):
+        User.objects.create_user("staff", password="pw", is_staff=True)
+        self.client.login(username="staff", password="pw")
+        self.assertEqual(self.client.get("/dashboard/reports/", {"month": "0001-01"}).status_code, 400)
+        self.assertEqual(self.client.get("/dashboard/reports/", {"month": "9999-12"}).status_code, 400)
+        self.assertEqual(self.client.get("/dashboard/reports/", {"month": "2030-01"}).status_code, 200)
+
+
+@override_settings(CACHES=TEST_CACHES)
+class RoomAvailabilityTests(BookingFixtures, TransactionTestCase):
+    """room_availability: shared cache, bumped on commit, bounded start."""
+
+    def setUp(self):
+        caches["bookings"].clear()
+        super().setUp()
+
+    def calendar(self, start="2030-01-01", days=31):
+        return self.client.get("/rooms/availability/", {"start": start, "days": days})
+
+    def test_booking_shows_once_committed(self):
+        self.assertEqual(int(self.calendar().json()["rooms"][0]["booked"], 16), 0)
+        with transaction.atomic():
+            self.book(datetime.date(2030, 1, 2), datetime.date(2030, 1, 4))
+            self.assertEqual(int(self.calendar().json()["rooms"][0]["booked"], 16), 0)
+        self.assertEqual(int(self.calendar().json()["rooms"][0]["booked"], 16), 0b110)
+
+    def test_start_out_of_range_is_rejected(self):
+        self.assertEqual(self.calendar(start="9999-12-20").status_code, 400)
+        self.assertEqual(self.calendar(start="0001-01-01").status_code, 400)
+
+
+class SeatingTests(TransactionTestCase):
+    """Table seats never oversell, even under concurrent writes; the admin reports full slots as form errors."""
+
+    def setUp(self):
+        self.admin = User.objects.create_superuser("admin", "admin@example.com", "pw")
+
+    def reserve(self, people, time=datetime.time(19), **extra):
+        return Reservation.objects.create(user=self.admin, reserved_name="Guest", phone="1", email="g@example.com",
+                                          people=people, date=datetime.date(2030, 1, 1), time=time, **extra)
+
+    def test_seats_race(self):
+        SeatingCapacity.objects.create(start=datetime.time(18), end=datetime.time(22), seats=10)
+        claimed, refused = run_concurrently(lambda worker, n: self.reserve(3, datetime.time(19, 10 + n)), SlotFull)
+        self.assertEqual((claimed, refused), (3, 15))
+        self.assertEqual(SeatingSlot.objects.get().booked, 9)
+        self.assertEqual(Reservation.objects.count(), 3)
+
+    def test_freed_capacity_can_be_claimed_again(self):
+        SeatingCapacity.objects.create(start=datetime.time(18), end=datetime.time(22), seats=4)
+        reservation = self.reserve(4)
+        reservation.people = 2
+        reservation.save()
+        self.reserve(2, datetime.time(19, 15))
+        self.assertEqual(SeatingSlot.objects.get().booked, 4)
+
+    def reservation_form(self, people, time="19:00"):
+        return {"user": self.admin.pk, "reserved_name": "Guest", "phone": "1", "email": "g@example.com",
+                "people": people, "date": "2030-01-01", "time": time, "message": ""}
+
+    def test_full_slot_is_a_form_error(self):
+        SeatingCapacity.objects.create(start=datetime.time(18), end=datetime.time(22), seats=4)
+        self.client.login(username="admin", password="pw")
+        url = reverse("admin:acaciaapp_reservation_add")
+        self.assertEqual(self.client.post(url, self.reservation_form(3)).status_code, 302)
+        response = self.client.post(url, self.reservation_form(2, "19:15"))
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, "Only 1 seat(s) left at 19:00.")
+        self.assertEqual(SeatingSlot.objects.get().booked, 3)
+
+    def test_editing_keeps_its_own_seats(self):
+        SeatingCapacity.objects.create(start=datetime.time(18), end=datetime.time(22), seats=4)
+        self.client.login(username="admin", password="pw")
+        reservation = self.reserve(3)
+        url = reverse("admin:acaciaapp_reservation_change", args=[reservation.pk])
+        self.assertEqual(self.client.post(url, self.reservation_form(4)).status_code, 302)
+        self.assertEqual(SeatingSlot.objects.get().booked, 4)
+
+
+class EventVenueTests(TransactionTestCase):
+    """events view and EventBooking: every booking must hold venue capacity."""
+
+    def setUp(self):
+        Venue.objects.all().delete()
+        self.hall = Venue.objects.create(name="Hall", capacity=100)
+
+    def post(self, **extra):
+        data = {"customer_name": "A", "email": "a@example.com", "phone": "1",
+                "date": "2030-06-01", "attendees": "100", "event_name": "Wedding"}
+        data.update(extra)
+        return self.client.post("/events/", data)
+
+    def test_unknown_venue_is_rejected(self):
+        for _ in range(3):
+            self.post(venue="99999")
+        self.assertFalse(EventBooking.objects.exists())
+
+    def test_no_active_venue_is_rejected(self):
+        self.hall.is_active = False
+        self.hall.save()
+        self.post()
+        self.assertFalse(EventBooking.objects.exists())
+
+    def test_exclusive_events_cannot_share_a_date(self):
+        self.post()
+        self.post()
+        self.assertEqual(EventBooking.objects.count(), 1)
+
+    def test_model_refuses_a_null_venue(self):
+        with self.assertRaises(ValidationError):
+            EventBooking.objects.create(customer_name="A", email="a@example.com", phone="1",
+                                        date="2030-06-01", attendees=10)
+
+    def book(self, attendees, exclusive=False, customer="Guest"):
+        return EventBooking.objects.create(customer_name=customer, email="g@example.com", phone="1",
+                                           date=datetime.date(2030, 1, 1), attendees=attendees, venue=self.hall,
+                                           exclusive=exclusive)
+
+    def test_venue_race(self):
+        claimed, refused = run_concurrently(lambda worker, n: self.book(30), VenueFull)
+        self.assertEqual((claimed, refused), (3, 15))
+        self.assertEqual(VenueDay.objects.get().booked, 90)
+
+    def test_exclusive_event_holds_the_day(self):
+        self.book(10, exclusive=True, customer="A")
+        with self.assertRaises(VenueFull):
+            self.book(10, customer="B")
+
+    def event_form(self, attendees, venue="", exclusive=False):
+        form = {"event_name": "Wedding", "customer_name": "Guest", "email": "g@example.com", "phone": "1",
+                "date": "2030-01-01", "attendees": attendees, "message": "", "venue": venue}
+        if exclusive:
+            form["exclusive"] = "on"
+        return form
+
+    def login_admin(self):
+        User.objects.create_superuser("admin", "admin@example.com", "pw")
+        self.client.login(username="admin", password="pw")
+
+    def test_full_venue_is_a_form_error(self):
+        self.login_admin()
+        garden = Venue.objects.create(name="Garden", capacity=50)
+        url = reverse("admin:acaciaapp_eventbooking_add")
+        self.assertEqual(self.client.post(url, self.event_form(40, garden.pk)).status_code, 302)
+        self.assertContains(self.client.post(url, self.event_form(20, garden.pk)), "Garden has room for only 10")
+        self.assertContains(self.client.post(url, self.event_form(5, garden.pk, exclusive=True)), "fully booked")
+        self.assertContains(self.client.post(url, self.event_form(5)), "Event bookings need a venue.")
+        self.assertEqual(VenueDay.objects.get().booked, 40)
+
+    def test_editing_keeps_its_own_hold(self):
+        self.login_admin()
+        garden = Venue.objects.create(name="Garden", capacity=50)
+        booking = EventBooking.objects.create(**{**self.event_form(40), "venue": garden, "exclusive": True})
+        url = reverse("admin:acaciaapp_eventbooking_change", args=[booking.pk])
+        self.assertEqual(self.client.post(url, self.event_form(50, garden.pk, exclusive=True)).status_code, 302)
+        self.assertEqual(VenueDay.objects.values_list("booked", "exclusive").get(), (50, True))
@@ -0,0 +1,113 @@
+import hashlib
+import os
+import tempfile
+import threading
+from functools import lru_cache
+
+from django.conf import settings
+
+from .utils import get_ticket_template, render_ticket_pdf, ticket_lines
+
+
+class TicketPDFCache:
+    """
+    Size-capped, content-addressed disk cache of rendered ticket PDFs.
+
+    Files are named after a hash of everything printed on the ticket, so an
+    edited booking gets a new file and old ones simply age out. Recency is
+    tracked with the file mtime (touched on every hit); once the directory
+    grows past `max_bytes` the least recently used files are removed.
+    """
+
+    def __init__(self, directory, max_bytes):
+        self.directory = str(directory)
+        self.max_bytes = max_bytes
+        self._evict_lock = threading.Lock()
+        # Running estimate of the directory size, so a full scan is only
+        # needed once the cap may have been crossed. None until first scan.
+        self._approx_bytes = None
+
+    def key_for(self, ticket):
+        digest = hashlib.sha256()
+        digest.update(f"v{get_ticket_template().VERSION}\n{ticket.ticket_number}\n".encode("utf-8"))
+        for text in ticket_lines(ticket):
+            digest.update(text.encode("utf-8") + b"\n")
+        return digest.hexdigest()
+
+    def path_for(self, key):
+        return os.path.join(self.directory, key[:2], f"{key}.pdf")
+
+    def get_or_render(self, ticket):
+        """Return (path, key) for the ticket's PDF, rendering it on a miss."""
+        key = self.key_for(ticket)
+        path = self.path_for(key)
+
+        try:
+            os.utime(path)  # hit: mark as recently used
+            return path, key
+        except FileNotFoundError:
+            pass
+        return self.render(ticket, key), key
+
+    def render(self, ticket, key=None):
+        """Render the ticket's PDF into the cache, replacing any cached copy. Returns its path."""
+        path = self.path_for(key or self.key_for(ticket))
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                render_ticket_pdf(ticket, f)
+            os.chmod(tmp_path, 0o644)  # readable by the front server (SENDFILE_BACKEND)
+            os.replace(tmp_path, path)  # atomic: readers never see a partial file
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+        self._added(os.path.getsize(path))
+        return path
+
+    def _added(self, size):
+        if self._approx_bytes is not None:
+            self._approx_bytes += size
+        if self._approx_bytes is None or self._approx_bytes > self.max_bytes:
+            self.evict()
+
+    def evict(self):
+        """Delete least recently used PDFs until the cache fits in max_bytes."""
+        if not os.path.isdir(self.directory):
+            return
+
+        with self._evict_lock:
+            entries = []
+            total = 0
+            for shard in os.scandir(self.directory):
+                if not shard.is_dir():
+                    continue
+                for entry in os.scandir(shard.path):
+                    if not entry.name.endswith(".pdf"):
+                        continue
+                    try:
+                        stat = entry.stat()
+                    except FileNotFoundError:
+                        continue
+                    entries.append((stat.st_mtime, stat.st_size, entry.path))
+                    total += stat.st_size
+
+            if total > self.max_bytes:
+                entries.sort()
+                for _, size, path in entries:
+                    try:
+                        os.remove(path)
+                    except FileNotFoundError:
+                        pass
+                    total -= size
+                    if total <= self.max_bytes:
+                        break
+
+            self._approx_bytes = total
+
+
+@lru_cache(maxsize=1)
+def get_ticket_pdf_cache():
+    return TicketPDFCache(settings.TICKET_PDF_CACHE_DIR, settings.TICKET_PDF_CACHE_MAX_BYTES)
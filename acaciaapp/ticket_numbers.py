@@ -0,0 +1,103 @@
+import hashlib
+import hmac
+import string
+import threading
+
+from django.db import connection, transaction
+from django.db.models import F
+
+# Same alphabet and length the random codes always used.
+ALPHABET = string.ascii_uppercase + string.digits
+CODE_LENGTH = 8
+
+_HALF = len(ALPHABET) ** (CODE_LENGTH // 2)   # 36^4
+_SPACE = _HALF * _HALF                        # 36^8 possible codes
+_ROUNDS = 4
+
+
+def _round(key, round_no, value):
+    mac = hmac.new(key, f"{round_no}:{value}".encode("ascii"), hashlib.sha256).digest()
+    return int.from_bytes(mac[:8], "big") % _HALF
+
+
+def permute(n, key):
+    """
+    Keyed bijection on [0, 36^8): a balanced Feistel network over the two
+    base-36 halves. Distinct sequence numbers always give distinct codes,
+    while consecutive numbers look unrelated.
+    """
+    left, right = divmod(n, _HALF)
+    for i in range(_ROUNDS):
+        left, right = right, (left + _round(key, i, right)) % _HALF
+    return left * _HALF + right
+
+
+def encode(n):
+    chars = []
+    for _ in range(CODE_LENGTH):
+        n, digit = divmod(n, len(ALPHABET))
+        chars.append(ALPHABET[digit])
+    return "".join(reversed(chars))
+
+
+class TicketNumberAllocator:
+    """
+    Hands out ticket numbers as permute(sequence value), so uniqueness comes
+    from the counter rather than from querying the ticket table.
+
+    Sequence values are reserved in blocks with one committed UPDATE and then
+    served from memory. A block is never reserved inside a caller's
+    transaction, because a rollback would return it to the counter while this
+    process kept using it; there a single value is reserved instead and the
+    block refill is deferred until the transaction commits.
+    """
+
+    def __init__(self, name="ticket", block_size=100):
+        self.name = name
+        self.block_size = block_size
+        self._lock = threading.Lock()
+        self._next = 0
+        self._end = 0
+        self._key = None
+        self._seq = None
+
+    def _reserve(self, size):
+        from .models import TicketSequence
+
+        with transaction.atomic():
+            updated = 0
+            if self._seq is not None:
+                updated = TicketSequence.objects.filter(pk=self._seq.pk).update(next_value=F("next_value") + size)
+            if not updated:
+                # First use, or the row was recreated (e.g. test database flush)
+                self._seq, _ = TicketSequence.objects.get_or_create(name=self.name)
+                TicketSequence.objects.filter(pk=self._seq.pk).update(next_value=F("next_value") + size)
+            end = TicketSequence.objects.values_list("next_value", flat=True).get(pk=self._seq.pk)
+
+        if end > _SPACE:
+            raise RuntimeError("Ticket number space exhausted.")
+        return self._seq.key.encode("ascii"), end - size, end
+
+    def refill(self):
+        """Reserve a new block if the current one is used up (autocommit only)."""
+        with self._lock:
+            if self._next >= self._end and not connection.in_atomic_block:
+                self._key, self._next, self._end = self._reserve(self.block_size)
+
+    def allocate(self):
+        if not connection.in_atomic_block:
+            self.refill()
+
+        with self._lock:
+            if self._next < self._end:
+                value = self._next
+                self._next += 1
+                return encode(permute(value, self._key))
+
+            key, value, _ = self._reserve(1)
+
+        transaction.on_commit(self.refill)
+        return encode(permute(value, key))
+
+
+allocator = TicketNumberAllocator()
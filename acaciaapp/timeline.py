@@ -0,0 +1,149 @@
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.db.models import BooleanField, Case, CharField, DateField, F, IntegerField, Q, TimeField, Value, When
+from django.utils import timezone
+
+from .models import EventBooking, Reservation, RoomBooking
+
+TIMELINE_PAGE_SIZE = 50
+TIMELINE_CACHE_TIMEOUT = 60 * 60
+
+
+def _columns(qs, kind, active, day, end_day=None, at=None, guests="people", room_number=None, event_name=None):
+    """
+    Shape one booking table into the shared timeline columns. Every part of
+    the UNION annotates the same names in the same order.
+    """
+    return qs.annotate(
+        t_kind=Value(kind, output_field=CharField()),
+        t_id=F("id"),
+        t_active=Case(When(active, then=Value(True)), default=Value(False), output_field=BooleanField()),
+        t_day=F(day),
+        t_end_day=F(end_day) if end_day else Value(None, output_field=DateField()),
+        t_at=F(at) if at else Value(None, output_field=TimeField()),
+        t_guests=F(guests) if guests else Value(None, output_field=IntegerField()),
+        t_room=F(room_number) if room_number else Value("", output_field=CharField()),
+        t_event=F(event_name) if event_name else Value("", output_field=CharField()),
+    ).values("t_kind", "t_id", "t_active", "t_day", "t_end_day", "t_at", "t_guests", "t_room", "t_event")
+
+
+def timeline_query(user, today):
+    """Active and past room, table and event bookings as one UNION ALL query."""
+    rooms = _columns(
+        RoomBooking.objects.filter(user=user), "room",
+        active=Q(is_cleared=False), day="check_in", end_day="check_out",
+        room_number="room__room_number",
+    )
+    reservations = _columns(
+        Reservation.objects.filter(user=user), "reservation",
+        active=Q(date__gte=today), day="date", at="time",
+    )
+    # Cancelled events drop out of the active list and only reappear once past
+    events = _columns(
+        EventBooking.objects.filter(user=user).exclude(date__gte=today, is_canceled=True), "event",
+        active=Q(date__gte=today), day="date", guests="attendees", event_name="event_name",
+    )
+    return rooms.union(reservations, events, all=True).order_by("-t_active", "-t_day", "-t_kind", "-t_id")
+
+
+def _entry(row):
+    """A timeline row with the field names the profile template already uses."""
+    kind = row["t_kind"]
+    if kind == "room":
+        return kind, {
+            "id": row["t_id"],
+            "room": {"room_number": row["t_room"]},
+            "check_in": row["t_day"],
+            "check_out": row["t_end_day"],
+            "people": row["t_guests"],
+        }
+    if kind == "reservation":
+        return kind, {"id": row["t_id"], "date": row["t_day"], "time": row["t_at"], "people": row["t_guests"]}
+    return kind, {"id": row["t_id"], "event_name": row["t_event"], "date": row["t_day"], "attendees": row["t_guests"]}
+
+
+def build_timeline(user, page=1, per_page=TIMELINE_PAGE_SIZE, today=None):
+    today = today or timezone.now().date()
+    offset = (page - 1) * per_page
+    rows = list(timeline_query(user, today)[offset:offset + per_page + 1])
+    has_next = len(rows) > per_page
+    rows = rows[:per_page]
+
+    active = {"room": [], "reservation": [], "event": []}
+    history = {"room": {}, "reservation": {}, "event": {}}
+    for row in rows:
+        kind, entry = _entry(row)
+        if row["t_active"]:
+            active[kind].append(entry)
+        else:
+            month = row["t_day"].strftime("%B %Y")
+            history[kind].setdefault(month, []).append(entry)
+
+    # The query lists newest first; upcoming bookings read better soonest first
+    for entries in active.values():
+        entries.reverse()
+
+    return {
+        "active_room_bookings": active["room"],
+        "active_reservations": active["reservation"],
+        "active_event_bookings": active["event"],
+        "room_history": history["room"],
+        "reservation_history": history["reservation"],
+        "event_history": history["event"],
+        "page": page,
+        "has_next": has_next,
+        "has_previous": page > 1,
+    }
+
+
+def _version_key(user_id):
+    return f"timeline:version:{user_id}"
+
+
+def _cache():
+    return caches[settings.BOOKING_CACHE_ALIAS]
+
+
+def new_version():
+    # Start from the clock, not 1: if a version key is evicted, entries cached
+    # under the old numbers must not come back into use
+    return time.time_ns() // 1000
+
+
+def get_timeline(user, page=1, per_page=TIMELINE_PAGE_SIZE):
+    """
+    Cached build_timeline(). Entries are keyed by the user's timeline version
+    (bumped whenever one of their bookings changes) and by today's date,
+    since bookings move from active to history as days pass.
+    """
+    cache = _cache()
+    today = timezone.now().date()
+    version = cache.get_or_set(_version_key(user.pk), new_version, None)
+    key = f"timeline:{user.pk}:{version}:{today.isoformat()}:{page}:{per_page}"
+
+    timeline = cache.get(key)
+    if timeline is None:
+        timeline = build_timeline(user, page, per_page, today)
+        cache.set(key, timeline, TIMELINE_CACHE_TIMEOUT)
+    return timeline
+
+
+def invalidate_timeline(user_id):
+    """
+    Bump the user's version once the current transaction commits, so no
+    request can cache a pre-commit view under the new version.
+    """
+    if user_id is None:
+        return
+    transaction.on_commit(lambda: _bump(user_id))
+
+
+def _bump(user_id):
+    try:
+        _cache().incr(_version_key(user_id))
+    except ValueError:
+        # No version yet, so nothing cached for this user
+        pass
@@ -7,7 +7,9 @@ urlpatterns = [
     path('terms/', views.terms, name="terms"),
     path('privacy/', views.privacy, name="privacy"),
     path('reservation/', views.reservations_view, name="reservation"),
+    path('reservation/seats/', views.reservation_seats, name="reservation_seats"),
     path('events/', views.events, name="events"),
+    path('events/availability/', views.event_availability, name="event_availability"),
 
     path('menu/', views.menu, name="menu"),
     path('about/', views.about, name="about"),
@@ -17,14 +19,20 @@ urlpatterns = [
     path("logout/", views.logout_view, name="logout"),
     path('profile/', views.profile_view, name='profile'),
     path('rooms/', views.rooms_view, name='rooms'),
+    path('rooms/availability/', views.room_availability, name='room_availability'),
     path('rooms/book/<int:room_id>/', views.book_room_view, name='book_room'),
     path('dashboard/', views.admin_dashboard, name='admin_dashboard'),
+    path('dashboard/reports/', views.admin_reports, name='admin_reports'),
     path('admin/reservations/', views.admin_reservations, name='admin_reservations'),
     path('admin/rooms/', views.admin_rooms, name='admin_rooms'),
     path('admin/rooms/toggle/<int:room_id>/', views.toggle_room_status, name='toggle_room_status'),
     path('admin/customers/', views.admin_customers, name='admin_customers'),
     path('admin/customers/clear/<int:booking_id>/', views.clear_customer, name='clear_customer'),
     path("ticket/<int:ticket_id>/", views.ticket_view, name="ticket_download"),
+    path("ticket/<int:ticket_id>/pdf/", views.ticket_pdf_view, name="ticket_pdf"),
+    path("tickets/scan/", views.ticket_scan, name="ticket_scan"),
+    path("media/<path:name>", views.media_view, name="media"),
+    path("metrics", views.metrics_view, name="metrics"),
     path("admin/rooms/edit/<int:room_id>/", views.admin_edit_room, name="admin_edit_room"),
 
 
@@ -1,153 +1,221 @@
 from reportlab.pdfgen import canvas
+from reportlab.pdfbase import pdfdoc
+from reportlab.pdfbase.pdfmetrics import stringWidth
 from reportlab.lib.pagesizes import A5, landscape
 from reportlab.lib.units import mm
 from reportlab.lib import colors
+try:
+    # Private: only used to pre-build the logo, with drawImage() as fallback
+    from reportlab.lib.utils import _digester
+except ImportError:
+    _digester = None
 from django.conf import settings
-from django.core.mail import EmailMessage
+from django.http import FileResponse, HttpResponse, HttpResponseNotModified, StreamingHttpResponse
+from django.db import transaction
+from django.utils import timezone
+from django.utils.http import content_disposition_header
+from functools import lru_cache
+from urllib.parse import quote
+import copy
 import os
 
-def generate_ticket_pdf(ticket):
+from .metrics import PDF_SECONDS, timed_function
+from .models import OutboxEmail, Ticket, TicketJob
 
-    # ===============================
-    # 1. FILE SETUP (unchanged)
-    # ===============================
-    filename = f"Ticket_{ticket.ticket_number}.pdf"
-    filepath = os.path.join(settings.MEDIA_ROOT, "tickets", filename)
-    os.makedirs(os.path.dirname(filepath), exist_ok=True)
-
-    c = canvas.Canvas(filepath, pagesize=landscape(A5))
-    width, height = landscape(A5)
-
-    BLUE = colors.HexColor("#1E4CCF")
 
-    # ===============================
-    # 2. LOGO — Moved higher (0.25cm from top)
-    # ===============================
-    # Change: shift logo UP by reducing the top offset
-    logo_path = os.path.join(settings.BASE_DIR, "static", "assets", "img", "img.png")
-
-    logo_w = 35 * mm
-    logo_h = 35 * mm
-
-    # Position: 3mm below top edge
-    c.drawImage(
-        str(logo_path),
-        (width - logo_w) / 2,
-        height - logo_h - 3 * mm,   # <-- updated
-        width=logo_w,
-        height=logo_h,
-        preserveAspectRatio=True,
-        mask="auto"
-    )
+class TicketTemplate:
+    """
+    The parts of a ticket that never change: logo, title, subtitle,
+    content box and footer. Layout maths and the encoded logo are prepared
+    once, so each ticket only pays for drawing its own booking details.
+    """
 
-    # ===============================
-    # 3. TITLE — “Acacia Resort” styled
-    # ===============================
-    c.setFont("Helvetica-Bold", 26)
+    # Bump whenever the artwork changes so cached ticket PDFs are re-rendered.
+    VERSION = 1
 
-    # ---- ACACIA RESORT (same line with different colors) ----
-    c.setFont("Helvetica-Bold", 26)
-
-    text1 = "ACACIA"
-    text2 = " RESORT"  # add leading space for nice separation
-
-    # Measure widths
-    w1 = c.stringWidth(text1, "Helvetica-Bold", 26)
-    w2 = c.stringWidth(text2, "Helvetica-Bold", 26)
+    BLUE = colors.HexColor("#1E4CCF")
 
-    total_width = w1 + w2
-    start_x = (width - total_width) / 2  # center the combined text
+    def __init__(self, logo_path=None):
+        self.pagesize = landscape(A5)
+        self.width, self.height = self.pagesize
+
+        # ===============================
+        # LOGO — decoded and encoded once
+        # ===============================
+        self.logo_path = str(logo_path or os.path.join(settings.BASE_DIR, "static", "assets", "img", "img.png"))
+        self.logo_w = 35 * mm
+        self.logo_h = 35 * mm
+
+        # Same name canvas.drawImage() derives for (path, mask="auto"), so it
+        # finds the pre-built image instead of decoding the PNG again. This
+        # leans on reportlab internals (tested against 5.0 in
+        # TicketRenderTests); if they change, every canvas just decodes the
+        # logo itself through the public drawImage() path.
+        self._logo = self._logo_mask = None
+        if _digester is not None:
+            try:
+                self._logo_name = _digester(f"{self.logo_path}auto".encode("utf-8"))
+                self._logo = pdfdoc.PDFImageXObject(self._logo_name, self.logo_path, mask="auto")
+                self._logo.name = self._logo_name
+                self._logo_mask = getattr(self._logo, "_smask", None)
+                if self._logo_mask is not None:
+                    del self._logo._smask
+            except (AttributeError, TypeError):
+                self._logo = self._logo_mask = None
+
+        # ===============================
+        # TITLE — “ACACIA RESORT” centred as one line
+        # ===============================
+        self.title1 = "ACACIA"
+        self.title2 = " RESORT"
+        w1 = stringWidth(self.title1, "Helvetica-Bold", 26)
+        w2 = stringWidth(self.title2, "Helvetica-Bold", 26)
+        self.title_x1 = (self.width - (w1 + w2)) / 2
+        self.title_x2 = self.title_x1 + w1
+
+        # ===============================
+        # CONTENT BOX
+        # ===============================
+        self.box_left = 18 * mm
+        self.box_right = self.width - 18 * mm
+        self.box_top = self.height - 75 * mm
+        self.box_bottom = 25 * mm
+
+    def _register_logo(self, c):
+        """Give this canvas its own copy of the pre-encoded logo (and its alpha mask)."""
+        if self._logo is None:
+            return
+        doc = getattr(c, "_doc", None)
+        if doc is None or not hasattr(doc, "getXObjectName"):
+            return
+        logo = copy.copy(self._logo)
+        doc.Reference(logo, doc.getXObjectName(self._logo_name))
+        if self._logo_mask is not None:
+            mask = copy.copy(self._logo_mask)
+            logo.smask = doc.Reference(mask, doc.getXObjectName(mask.name))
+
+    def draw(self, c):
+        width, height = self.width, self.height
+
+        # Logo, 3mm below top edge
+        self._register_logo(c)
+        c.drawImage(
+            self.logo_path,
+            (width - self.logo_w) / 2,
+            height - self.logo_h - 3 * mm,
+            width=self.logo_w,
+            height=self.logo_h,
+            preserveAspectRatio=True,
+            mask="auto"
+        )
+
+        # ACACIA (black) RESORT (blue)
+        c.setFont("Helvetica-Bold", 26)
+        y = height - 45 * mm
+        c.setFillColor(colors.black)
+        c.drawString(self.title_x1, y, self.title1)
+        c.setFillColor(self.BLUE)
+        c.drawString(self.title_x2, y, self.title2)
+
+        # Subtitle
+        c.setFont("Helvetica-Bold", 15)
+        c.drawCentredString(width / 2, height - 65 * mm, "BOOKING TICKET")
+
+        # Content box
+        c.roundRect(
+            self.box_left, self.box_bottom,
+            self.box_right - self.box_left, self.box_top - self.box_bottom,
+            10, stroke=1, fill=0
+        )
+
+        # Footer
+        c.setFont("Helvetica-Oblique", 10)
+        c.setFillColor(colors.black)
+        c.drawCentredString(width / 2, self.box_bottom - 6 * mm,
+                            "Please present this ticket during check-in or event entry.")
+        c.drawCentredString(width / 2, self.box_bottom - 11 * mm,
+                            "Thank you for choosing Acacia Resort.")
+
+
+@lru_cache(maxsize=1)
+def get_ticket_template():
+    """Per-process TicketTemplate, built on first use."""
+    return TicketTemplate()
+
+
+def ticket_lines(ticket):
+    """The booking details printed in the ticket's content box."""
+    if ticket.booking_type == "room":
+        b = ticket.room_booking
+        return [
+            "ROOM BOOKING",
+            f"Customer: {b.customer_name}",
+            f"Room Number: {b.room.room_number}",
+            f"Check-in: {b.check_in}",
+            f"Check-out: {b.check_out}",
+            f"Guests: {b.people}",
+        ]
+
+    if ticket.booking_type == "reservation":
+        r = ticket.reservation_booking
+        return [
+            "TABLE RESERVATION",
+            f"Reserved By: {r.reserved_name}",
+            f"Guests: {r.people}",
+            f"Date: {r.date}",
+            f"Time: {r.time}",
+        ]
+
+    if ticket.booking_type == "event":
+        e = ticket.event_booking
+        return [
+            "EVENT BOOKING",
+            f"Customer: {e.customer_name}",
+            f"Event Type: {e.event_name}",
+            f"Attendees: {e.attendees}",
+            f"Date: {e.date}",
+        ]
 
-    y = height - 45 * mm  # vertical position
+    return []
 
-    # Draw ACACIA (black)
-    c.setFillColor(colors.black)
-    c.drawString(start_x, y, text1)
 
-    # Draw RESORT (blue)
-    c.setFillColor(BLUE)
-    c.drawString(start_x + w1, y, text2)
+@timed_function(PDF_SECONDS)
+def render_ticket_pdf(ticket, output, template=None):
+    """
+    Draw a ticket onto the cached template and write it to `output`
+    (a file path or a binary file object).
+    """
+    template = template or get_ticket_template()
+    width, height = template.width, template.height
 
-    # Subtitle
-    c.setFont("Helvetica-Bold", 15)
-    c.drawCentredString(width / 2, height - 65 * mm, "BOOKING TICKET")
+    c = canvas.Canvas(output, pagesize=template.pagesize)
+    template.draw(c)
 
     # ===============================
-    # 4. TICKET NUMBER (top-right)
+    # TICKET NUMBER (top-right)
     # ===============================
     c.setFont("Helvetica-Bold", 12)
     c.setFillColor(colors.black)
     c.drawRightString(width - 10 * mm, height - 8 * mm, f"Ticket No: {ticket.ticket_number}")
 
     # ===============================
-    # 5. CONTENT BOX — cleaner margins
+    # BOOKING CONTENT
     # ===============================
-    box_left = 18 * mm
-    box_right = width - 18 * mm
-    box_top = height - 75 * mm
-    box_bottom = 25 * mm
-
-    box_w = box_right - box_left
-    box_h = box_top - box_bottom
-
-    c.roundRect(box_left, box_bottom, box_w, box_h, 10, stroke=1, fill=0)
-
-    # Text start point, shifted down slightly for better layout
-    y = box_top - 12 * mm
-
+    y = template.box_top - 12 * mm
     c.setFont("Helvetica", 12)
 
-    def line(text):
-        nonlocal y
+    for text in ticket_lines(ticket):
         c.drawCentredString(width / 2, y, text)
         y -= 7 * mm     # reduced spacing so content fits and looks tight
 
-    # ===============================
-    # 6. BOOKING CONTENT (unchanged logic)
-    # ===============================
-    if ticket.booking_type == "room":
-        b = ticket.room_booking
-        line("ROOM BOOKING")
-        line(f"Customer: {b.customer_name}")
-        line(f"Room Number: {b.room.room_number}")
-        line(f"Check-in: {b.check_in}")
-        line(f"Check-out: {b.check_out}")
-        line(f"Guests: {b.people}")
-
-    elif ticket.booking_type == "reservation":
-        r = ticket.reservation_booking
-        line("TABLE RESERVATION")
-        line(f"Reserved By: {r.reserved_name}")
-        line(f"Guests: {r.people}")
-        line(f"Date: {r.date}")
-        line(f"Time: {r.time}")
-
-    elif ticket.booking_type == "event":
-        e = ticket.event_booking
-        line("EVENT BOOKING")
-        line(f"Customer: {e.customer_name}")
-        line(f"Event Type: {e.event_name}")
-        line(f"Attendees: {e.attendees}")
-        line(f"Date: {e.date}")
-
-    # ===============================
-    # 7. FOOTER — repositioned & aligned
-    # ===============================
-    c.setFont("Helvetica-Oblique", 10)
-    c.setFillColor(colors.black)
-
-    c.drawCentredString(width / 2, box_bottom - 6 * mm,
-                        "Please present this ticket during check-in or event entry.")
-    c.drawCentredString(width / 2, box_bottom - 11 * mm,
-                        "Thank you for choosing Acacia Resort.")
-
-    # Save PDF
     c.save()
-    return filepath
 
 
+TICKET_FROM_EMAIL = "Acacia Resort <no-reply@acaciaresort.co.ke>"
+
 
-def email_ticket(ticket, pdf_path):
+def ticket_email(ticket):
+    """Subject and body of the email that carries a ticket's PDF."""
     subject = f"Your Ticket ({ticket.ticket_number}) - Acacia Resort"
     body = f"""
 Hello {ticket.user.username},
@@ -158,14 +226,223 @@ Ticket Number: {ticket.ticket_number}
 
 Thank you for booking with Acacia Resort.
 """
-
-    email = EmailMessage(
-        subject,
-        body,
-        "Acacia Resort <no-reply@acaciaresort.co.ke>",
-        [ticket.user.email]
+    return subject, body
+
+
+def queue_ticket_email(ticket):
+    """Add the ticket email to the outbox; the PDF is attached when it is sent."""
+    subject, body = ticket_email(ticket)
+    return OutboxEmail.objects.create(
+        ticket=ticket,
+        to=ticket.user.email,
+        from_email=TICKET_FROM_EMAIL,
+        subject=subject,
+        body=body,
     )
 
-    email.attach_file(pdf_path)
-    email.send()
 
+def _parse_range(header, size):
+    """
+    Parse a single `bytes=` range into (start, end) inclusive.
+    Returns None for anything we don't serve partially (multiple ranges,
+    other units), or False when the range can't be satisfied.
+    """
+    unit, _, spec = header.partition("=")
+    if unit.strip().lower() != "bytes" or "," in spec:
+        return None
+
+    first, _, last = spec.strip().partition("-")
+    try:
+        if first:
+            start = int(first)
+            end = int(last) if last else size - 1
+        else:
+            # Suffix range: the last N bytes
+            start = max(size - int(last), 0)
+            end = size - 1
+    except ValueError:
+        return None
+
+    if start >= size or start > end:
+        return False
+    return start, min(end, size - 1)
+
+
+def _read_range(path, start, length, chunk_size=64 * 1024):
+    with open(path, "rb") as f:
+        f.seek(start)
+        while length > 0:
+            chunk = f.read(min(chunk_size, length))
+            if not chunk:
+                break
+            length -= len(chunk)
+            yield chunk
+
+
+def ranged_file_response(request, path, content_type, filename=None, etag=None, as_attachment=False):
+    """
+    Stream a file with ETag/If-None-Match and single-range (206) support.
+    `etag` must already be quoted, e.g. '"abc123"'.
+    """
+    if etag:
+        if_none_match = request.headers.get("If-None-Match", "")
+        if if_none_match.strip() == "*" or etag in [t.strip() for t in if_none_match.split(",")]:
+            response = HttpResponseNotModified()
+            response["ETag"] = etag
+            return response
+
+    size = os.path.getsize(path)
+    byte_range = None
+    range_header = request.headers.get("Range")
+    if_range = request.headers.get("If-Range")
+    if range_header and (not if_range or if_range == etag):
+        byte_range = _parse_range(range_header, size)
+
+    if byte_range is False:
+        response = HttpResponse(status=416)
+        response["Content-Range"] = f"bytes */{size}"
+    elif byte_range:
+        start, end = byte_range
+        length = end - start + 1
+        response = StreamingHttpResponse(_read_range(path, start, length), status=206, content_type=content_type)
+        response["Content-Range"] = f"bytes {start}-{end}/{size}"
+        response["Content-Length"] = str(length)
+        if filename:
+            response["Content-Disposition"] = content_disposition_header(as_attachment, filename)
+    else:
+        response = FileResponse(
+            open(path, "rb"),
+            content_type=content_type,
+            as_attachment=as_attachment,
+            filename=filename or ""
+        )
+
+    response["Accept-Ranges"] = "bytes"
+    if etag:
+        response["ETag"] = etag
+    return response
+
+
+def _sendfile_location(path):
+    """Internal URL the front server maps to `path`, from settings.SENDFILE_ROOTS."""
+    path = os.path.realpath(path)
+    for root, prefix in getattr(settings, "SENDFILE_ROOTS", {}).items():
+        root = os.path.realpath(root)
+        if path.startswith(root + os.sep):
+            relative = os.path.relpath(path, root).replace(os.sep, "/")
+            return prefix.rstrip("/") + "/" + quote(relative)
+    return None
+
+
+def sendfile_response(request, path, content_type, filename=None, etag=None, as_attachment=False):
+    """
+    Hand a file to the front server instead of streaming it from a worker.
+    SENDFILE_BACKEND 'nginx' sets X-Accel-Redirect, 'apache' sets X-Sendfile
+    (both then handle Range and conditional requests themselves). Anything
+    else, or a path outside SENDFILE_ROOTS, falls back to ranged_file_response().
+    """
+    backend = getattr(settings, "SENDFILE_BACKEND", None)
+    header = None
+    if backend == "nginx":
+        location = _sendfile_location(path)
+        if location:
+            header = ("X-Accel-Redirect", location)
+    elif backend == "apache":
+        header = ("X-Sendfile", os.path.realpath(path))
+
+    if header is None:
+        return ranged_file_response(request, path, content_type, filename, etag, as_attachment)
+
+    response = HttpResponse(content_type=content_type)
+    response[header[0]] = header[1]
+    if filename:
+        response["Content-Disposition"] = content_disposition_header(as_attachment, filename)
+    if etag:
+        response["ETag"] = etag
+    return response
+
+
+def ticket_details(ticket):
+    """Customer name and stay dates for a ticket, read from its booking."""
+    booking = ticket.belongs_to()
+    if ticket.booking_type == "room":
+        return booking.customer_name, booking.check_in, booking.check_out
+    if ticket.booking_type == "reservation":
+        return booking.reserved_name, None, None
+    if ticket.booking_type == "event":
+        return booking.customer_name, None, None
+    return None, None, None
+
+
+def scan_tickets(codes):
+    """
+    Gate check-in: resolve every code with its booking in one query, then
+    clear each active ticket with a conditional UPDATE. A ticket that was
+    already cleared (by an earlier scan, another gate, or a duplicate in the
+    same batch) matches no row and is reported as "already_used".
+    """
+    codes = [code.strip().upper() for code in codes]
+    tickets = {
+        t.ticket_number: t
+        for t in Ticket.objects.select_related(
+            "room_booking__room",
+            "reservation_booking",
+            "event_booking",
+        ).filter(ticket_number__in=set(codes))
+    }
+
+    results = []
+    now = timezone.now()
+    with transaction.atomic():
+        for code in codes:
+            ticket = tickets.get(code)
+            if ticket is None:
+                results.append({"ticket_number": code, "status": "not_found"})
+                continue
+
+            cleared = Ticket.objects.filter(pk=ticket.pk, is_active=True).update(
+                is_active=False,
+                cleared_at=now
+            )
+            if cleared:
+                ticket.is_active = False
+                ticket.cleared_at = now
+
+            customer, check_in, check_out = ticket_details(ticket)
+            results.append({
+                "ticket_number": code,
+                "status": "cleared" if cleared else "already_used",
+                "booking_type": ticket.booking_type,
+                "customer": customer,
+                "check_in": check_in,
+                "check_out": check_out,
+                "cleared_at": ticket.cleared_at,
+            })
+
+    return results
+
+
+def enqueue_ticket(ticket):
+    """Queue background fulfilment for a freshly created ticket."""
+    return TicketJob.objects.create(ticket=ticket)
+
+
+def fulfil_ticket(ticket):
+    """
+    Render a ticket and queue its email, recording progress on
+    fulfilment_status (the outbox sender moves it on to emailed/failed).
+    Safe to re-run after a failure: rendering comes from the PDF cache.
+    """
+    from .ticket_cache import get_ticket_pdf_cache
+
+    get_ticket_pdf_cache().get_or_render(ticket)
+    if ticket.fulfilment_status in (Ticket.STATUS_PENDING, Ticket.STATUS_FAILED):
+        ticket.fulfilment_status = Ticket.STATUS_RENDERED
+        ticket.save(update_fields=["fulfilment_status"])
+
+    # Anonymous event bookings have nobody to email
+    if ticket.fulfilment_status == Ticket.STATUS_RENDERED and ticket.user and ticket.user.email:
+        with transaction.atomic():
+            queue_ticket_email(ticket)
+            ticket.fulfilment_status = Ticket.STATUS_QUEUED
+            ticket.save(update_fields=["fulfilment_status"])
@@ -0,0 +1,129 @@
+"""
+Venue capacity for event bookings.
+
+Each venue/date has a VenueDay counter of booked guests. Claiming is one
+conditional UPDATE: shared events fit while guests stay within capacity and
+no private event holds the day; a private (exclusive) event needs the day
+empty. Concurrent bookings can never oversell a venue, and no EventBooking
+rows are scanned.
+"""
+from django.db import transaction
+from django.db.models import F, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+from .models import EventBooking, Venue, VenueDay
+
+
+class VenueFull(Exception):
+    """The venue cannot take this booking on that date."""
+
+    def __init__(self, venue, day, remaining):
+        self.venue = venue
+        self.day = day
+        self.remaining = remaining
+        if remaining:
+            message = f"{venue} has room for only {remaining} more guest(s) on {day:%d %b %Y}."
+        else:
+            message = f"{venue} is fully booked on {day:%d %b %Y}."
+        super().__init__(message)
+
+
+def claim_venue(venue_id, day, attendees, exclusive=False):
+    """Book `attendees` guests into the venue on `day`, or raise VenueFull."""
+    venue = Venue.objects.filter(pk=venue_id, is_active=True).first()
+    if venue is None:
+        raise VenueFull(Venue.objects.get(pk=venue_id), day, 0)
+
+    with transaction.atomic():
+        VenueDay.objects.bulk_create([VenueDay(venue_id=venue_id, date=day)], ignore_conflicts=True)
+        has_room = VenueDay.objects.filter(
+            venue_id=venue_id, date=day, exclusive=False, booked__lte=venue.capacity - attendees
+        )
+        if exclusive:
+            claimed = has_room.filter(booked=0).update(booked=F('booked') + attendees, exclusive=True)
+        else:
+            claimed = has_room.update(booked=F('booked') + attendees)
+    if not claimed:
+        raise VenueFull(venue, day, 0 if exclusive else remaining_capacity(venue, day))
+
+
+def release_venue(venue_id, day, attendees, exclusive=False):
+    changes = {'booked': F('booked') - attendees}
+    if exclusive:
+        changes['exclusive'] = False
+    VenueDay.objects.filter(venue_id=venue_id, date=day, booked__gte=attendees).update(**changes)
+
+
+def remaining_capacity(venue, day):
+    """Guests the venue can still take for a shared event on `day`."""
+    booked, exclusive = VenueDay.objects.filter(venue=venue, date=day).values_list(
+        'booked', 'exclusive'
+    ).first() or (0, False)
+    return 0 if exclusive else max(venue.capacity - booked, 0)
+
+
+def check_venue(venue, day, attendees, exclusive=False, held=None):
+    """
+    Raise VenueFull unless `venue` can take this booking on `day`. `held` is
+    the venue_hold() an edited booking already has, which it gives back.
+    Only a pre-check for forms: claim_venue() is what enforces capacity.
+    """
+    booked, day_exclusive = VenueDay.objects.filter(venue=venue, date=day).values_list(
+        'booked', 'exclusive'
+    ).first() or (0, False)
+    if held and held[0] == venue.pk and held[1] == day:
+        booked -= held[2]
+        day_exclusive = day_exclusive and not held[3]
+    remaining = 0 if day_exclusive or not venue.is_active else max(venue.capacity - booked, 0)
+    if (exclusive and (booked or not remaining)) or attendees > remaining:
+        raise VenueFull(venue, day, 0 if exclusive else remaining)
+
+
+def venue_availability(day):
+    """Every active venue with what is left on `day`, in one query."""
+    days = VenueDay.objects.filter(venue=OuterRef('pk'), date=day)
+    venues = Venue.objects.filter(is_active=True).annotate(
+        day_booked=Coalesce(Subquery(days.values('booked')[:1]), Value(0)),
+        day_exclusive=Coalesce(Subquery(days.values('exclusive')[:1]), Value(False)),
+    ).order_by('name')
+    return [
+        {
+            'id': venue.pk,
+            'name': venue.name,
+            'capacity': venue.capacity,
+            'remaining': 0 if venue.day_exclusive else max(venue.capacity - venue.day_booked, 0),
+            'exclusive_available': not venue.day_booked,
+        }
+        for venue in venues
+    ]
+
+
+def recount(days=None):
+    """
+    Rebuild the counters from EventBooking, for the given dates or all of
+    them. For data written without EventBooking.save(), e.g. bulk imports.
+    Returns the number of venue-days written.
+    """
+    bookings = EventBooking.objects.filter(is_canceled=False, venue__isnull=False)
+    counters = VenueDay.objects.all()
+    if days is not None:
+        bookings = bookings.filter(date__in=days)
+        counters = counters.filter(date__in=days)
+
+    # Read and write in one transaction, so a booking saved meanwhile is
+    # either counted here or claims against the rebuilt rows
+    with transaction.atomic():
+        totals = {}
+        for venue_id, day, attendees, exclusive in bookings.values_list(
+            'venue_id', 'date', 'attendees', 'exclusive'
+        ).iterator():
+            booked, held = totals.get((venue_id, day), (0, False))
+            totals[(venue_id, day)] = (booked + attendees, held or exclusive)
+
+        counters.delete()
+        VenueDay.objects.bulk_create(
+            [VenueDay(venue_id=venue_id, date=day, booked=booked, exclusive=exclusive)
+             for (venue_id, day), (booked, exclusive) in totals.items()],
+            batch_size=1000
+        )
+    return len(totals)
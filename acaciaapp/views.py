@@ -1,17 +1,35 @@
 from django.shortcuts import render, redirect, get_object_or_404
 from acaciaapp.models import *
 from django.contrib.admin.views.decorators import staff_member_required
-from django.http import HttpResponseRedirect
+from django.http import Http404, HttpResponse, HttpResponseBadRequest, HttpResponseRedirect, JsonResponse
 from django.urls import reverse
 from django.contrib import messages
 from django.contrib.auth import login, logout, authenticate
 from django.contrib.auth.decorators import login_required
+from django.contrib.auth.views import redirect_to_login
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.utils._os import safe_join
 from django.utils import timezone
-from datetime import datetime
+from datetime import datetime, timedelta
+import json
+import mimetypes
+import os
 from django.contrib.auth.models import User
+from django.db import transaction
 from django.db.models import Q
+from django.views.decorators.http import require_POST
 from .forms import RegisterForm
-from .utils import generate_ticket_pdf, email_ticket
+from .utils import enqueue_ticket, scan_tickets, sendfile_response, ticket_details
+from .ticket_cache import get_ticket_pdf_cache
+from .pagination import keyset_paginate
+from .timeline import get_timeline
+from .availability import AVAILABILITY_DEFAULT_DAYS, AVAILABILITY_HORIZON_DAYS, AVAILABILITY_MAX_DAYS, get_calendar
+from .page_cache import cached_page
+from .seating import SlotFull, remaining_seats, slot_start
+from .venues import VenueFull, venue_availability
+from .metrics import exported_samples, registry
+from . import reports
 
 
 # Registration
@@ -69,29 +87,39 @@ def reservations_view(request):
         message = request.POST.get("message")
         phone = request.POST.get("phone")
 
-        booking = Reservation.objects.create(
-            user=request.user,
-            reserved_name=request.user.get_full_name() or request.user.username,
-            email=request.user.email,
-            phone=phone,
-            people=people,
-            date=date,
-            time=time,
-            message=message
-        )
-
-        # Create Ticket
-        ticket = Ticket.objects.create(
-            user=request.user,
-            booking_type="reservation",
-            reservation_booking=booking
-        )
-
-        pdf_path = generate_ticket_pdf(ticket)
-        ticket.pdf_file.name = f"tickets/Ticket_{ticket.ticket_number}.pdf"
-        ticket.save()
+        try:
+            date = datetime.strptime(date or "", "%Y-%m-%d").date()
+            time = datetime.strptime(time or "", "%H:%M").time()
+            people = int(people)
+            if people < 1:
+                raise ValueError(people)
+        except (TypeError, ValueError):
+            messages.error(request, "Please choose a valid date, time and number of guests.")
+            return render(request, 'reservation.html')
+
+        try:
+            with transaction.atomic():
+                booking = Reservation.objects.create(
+                    user=request.user,
+                    reserved_name=request.user.get_full_name() or request.user.username,
+                    email=request.user.email,
+                    phone=phone,
+                    people=people,
+                    date=date,
+                    time=time,
+                    message=message
+                )
 
-        email_ticket(ticket, pdf_path)
+                # Create Ticket; PDF + email are handled by the ticket worker
+                ticket = Ticket.objects.create(
+                    user=request.user,
+                    booking_type="reservation",
+                    reservation_booking=booking
+                )
+                enqueue_ticket(ticket)
+        except SlotFull as exc:
+            messages.error(request, f"{exc} Please pick another time.")
+            return render(request, 'reservation.html')
 
         return render(request, "reservation.html", {
             "redirect_to_ticket": True,
@@ -100,77 +128,32 @@ def reservations_view(request):
 
     return render(request, 'reservation.html')
 
-@login_required(login_url='login')
-def profile_view(request):
+# Seats left in the slot a date/time falls in, for the reservation form
+def reservation_seats(request):
+    try:
+        day = datetime.strptime(request.GET.get('date', ''), "%Y-%m-%d").date()
+        time = datetime.strptime(request.GET.get('time', ''), "%H:%M").time()
+    except ValueError:
+        return JsonResponse({"error": "date (YYYY-MM-DD) and time (HH:MM) are required."}, status=400)
 
-    user = request.user
-
-    # ------------------------------
-    # 1. ACTIVE BOOKINGS
-    # ------------------------------
-
-    active_room_bookings = RoomBooking.objects.filter(
-        user=user,
-        is_cleared=False
-    ).order_by('check_in')
-
-    active_reservations = Reservation.objects.filter(
-        user=user,
-        date__gte=timezone.now().date()
-    ).order_by('date', 'time')
-
-    active_event_bookings = EventBooking.objects.filter(
-        user=user,
-        date__gte=timezone.now().date(),
-        is_canceled=False
-    ).order_by('date')
-
-
-    # ------------------------------
-    # 2. HISTORY (GROUPED BY MONTH)
-    # ------------------------------
-
-    from django.db.models.functions import TruncMonth
-
-    # Room history = cleared bookings
-    room_history = RoomBooking.objects.filter(
-        user=user,
-        is_cleared=True
-    ).annotate(month=TruncMonth('check_in')).order_by('-check_in')
-
-    # Reservations history = past dates
-    reservation_history = Reservation.objects.filter(
-        user=user,
-        date__lt=timezone.now().date()
-    ).annotate(month=TruncMonth('date')).order_by('-date')
-
-    # Event history = past or canceled
-    event_history = EventBooking.objects.filter(
-        user=user,
-        date__lt=timezone.now().date()
-    ).annotate(month=TruncMonth('date')).order_by('-date')
-
-    # ------------------------------
-    # GROUP BY MONTH
-    # ------------------------------
-    def group_by_month(qs):
-        grouped = {}
-        for item in qs:
-            month = item.month.strftime("%B %Y")
-            if month not in grouped:
-                grouped[month] = []
-            grouped[month].append(item)
-        return grouped
+    slot = slot_start(time)
+    return JsonResponse({
+        "date": day.isoformat(),
+        "slot": slot.strftime("%H:%M"),
+        "remaining": remaining_seats(day, time),
+    })
 
-    context = {
-        "active_room_bookings": active_room_bookings,
-        "active_reservations": active_reservations,
-        "active_event_bookings": active_event_bookings,
 
-        "room_history": group_by_month(room_history),
-        "reservation_history": group_by_month(reservation_history),
-        "event_history": group_by_month(event_history),
-    }
+@login_required(login_url='login')
+def profile_view(request):
+    try:
+        page = max(1, int(request.GET.get('page', 1)))
+    except ValueError:
+        page = 1
+
+    # Active bookings and month-grouped history come from one UNION query,
+    # cached per user until one of their bookings changes
+    context = get_timeline(request.user, page)
 
     return render(request, 'profile.html', context)
 
@@ -200,21 +183,35 @@ def rooms_view(request):
         messages.error(request, "Invalid date format.")
         return redirect("rooms")
 
-    available_rooms = []
-    for room in rooms:
-        conflict = RoomBooking.objects.filter(
-            room=room,
-            check_in__lte=check_out_date,
-            check_out__gte=check_in_date
-        ).exists()
+    if check_out_date <= check_in_date:
+        messages.error(request, "Check-out must be after check-in.")
+        return redirect("rooms")
+
+    # Optional filters (ignored when blank or not a number)
+    def int_param(name):
+        value = request.GET.get(name, "")
+        return int(value) if value.isdigit() else None
+
+    capacity = int_param("capacity")
+    min_price = int_param("min_price")
+    max_price = int_param("max_price")
 
-        if not conflict:
-            available_rooms.append(room)
+    # One set-based query instead of one conflict lookup per room
+    available_rooms = rooms.available_between(
+        check_in_date,
+        check_out_date,
+        capacity=capacity,
+        min_price=min_price,
+        max_price=max_price
+    )
 
     context = {
         "rooms": available_rooms,
         "check_in": check_in,
         "check_out": check_out,
+        "capacity": capacity or "",
+        "min_price": "" if min_price is None else min_price,
+        "max_price": "" if max_price is None else max_price,
         "search_mode": True
     }
     return render(request, "rooms.html", context)
@@ -230,6 +227,25 @@ def is_available(self):
     ).exists()
 
 
+def room_availability(request):
+    """Booked-night bitmasks for every room, ?start=YYYY-MM-DD&days=N."""
+    try:
+        start = datetime.strptime(request.GET['start'], "%Y-%m-%d").date()
+    except KeyError:
+        start = timezone.localdate()
+    except ValueError:
+        return JsonResponse({"error": "start must be YYYY-MM-DD."}, status=400)
+    # Also keeps start + days clear of date.max
+    if abs((start - timezone.localdate()).days) > AVAILABILITY_HORIZON_DAYS:
+        return JsonResponse({"error": "start is too far from today."}, status=400)
+
+    days = request.GET.get('days', str(AVAILABILITY_DEFAULT_DAYS))
+    if not days.isdigit() or not 1 <= int(days) <= AVAILABILITY_MAX_DAYS:
+        return JsonResponse({"error": f"days must be between 1 and {AVAILABILITY_MAX_DAYS}."}, status=400)
+
+    return JsonResponse(get_calendar(start, int(days)))
+
+
 @login_required(login_url='login')
 def book_room_view(request, room_id):
     room = get_object_or_404(Room, id=room_id)
@@ -245,47 +261,46 @@ def book_room_view(request, room_id):
         check_out = request.POST.get('check_out')
         message = request.POST.get('message')
 
-        # Check availability
-        conflicting = RoomBooking.objects.filter(
-            room=room,
-            check_in__lte=check_out,
-            check_out__gte=check_in
-        )
-        if conflicting.exists():
-            messages.error(request, "Room already booked for the selected dates.")
+        try:
+            check_in_date = datetime.strptime(check_in or "", "%Y-%m-%d").date()
+            check_out_date = datetime.strptime(check_out or "", "%Y-%m-%d").date()
+        except ValueError:
+            messages.error(request, "Invalid date format.")
             return redirect('rooms')
 
-        # Create booking
-        booking = RoomBooking.objects.create(
-            user=request.user,
-            room=room,
-            customer_name=customer_name,
-            email=email,
-            phone=phone,
-            age=age,
-            id_number=id_number,
-            people=people,
-            check_in=check_in,
-            check_out=check_out,
-            message=message
-        )
-
-        # Create Ticket
-        from .models import Ticket
-        from .utils import generate_ticket_pdf, email_ticket
-
-        ticket = Ticket.objects.create(
-            user=request.user,
-            booking_type="room",
-            room_booking=booking
-        )
+        if check_out_date <= check_in_date:
+            messages.error(request, "Check-out must be after check-in.")
+            return redirect('rooms')
 
-        pdf_path = generate_ticket_pdf(ticket)
-        ticket.pdf_file.name = f"tickets/Ticket_{ticket.ticket_number}.pdf"
-        ticket.save()
+        # Availability is enforced by the room-night inventory: a clash
+        # aborts the whole transaction, even under concurrent requests.
+        try:
+            with transaction.atomic():
+                # Create booking
+                booking = RoomBooking.objects.create(
+                    user=request.user,
+                    room=room,
+                    customer_name=customer_name,
+                    email=email,
+                    phone=phone,
+                    age=age,
+                    id_number=id_number,
+                    people=people,
+                    check_in=check_in_date,
+                    check_out=check_out_date,
+                    message=message
+                )
 
-        # Email suppressed for now due to console backend
-        email_ticket(ticket, pdf_path)
+                # Create Ticket; PDF + email are handled by the ticket worker
+                ticket = Ticket.objects.create(
+                    user=request.user,
+                    booking_type="room",
+                    room_booking=booking
+                )
+                enqueue_ticket(ticket)
+        except RoomUnavailable:
+            messages.error(request, "Room already booked for the selected dates.")
+            return redirect('rooms')
 
         return render(request, "book_room.html", {
             "room": room,
@@ -295,13 +310,28 @@ def book_room_view(request, room_id):
 
     return render(request, 'book_room.html', {'room': room})
 
+# Rows per page on the staff lists (keyset/cursor paginated)
+ADMIN_PAGE_SIZE = 50
+
 # Admin Dashboard
 @staff_member_required(login_url='login')
 def admin_dashboard(request):
-    rooms = Room.objects.all().order_by('room_number')
-    room_bookings = RoomBooking.objects.filter(is_cleared=False).order_by('-check_in')
-    table_reservations = Reservation.objects.all().order_by('-date', '-time')
-    event_bookings = EventBooking.objects.all().order_by('-date', '-created_at')
+    rooms = keyset_paginate(
+        Room.objects.all(), ['room_number'],
+        request.GET.get('rooms_after'), ADMIN_PAGE_SIZE
+    )
+    room_bookings = keyset_paginate(
+        RoomBooking.objects.select_related('room').filter(is_cleared=False), ['-check_in', '-id'],
+        request.GET.get('bookings_after'), ADMIN_PAGE_SIZE
+    )
+    table_reservations = keyset_paginate(
+        Reservation.objects.all(), ['-date', '-time', '-id'],
+        request.GET.get('reservations_after'), ADMIN_PAGE_SIZE
+    )
+    event_bookings = keyset_paginate(
+        EventBooking.objects.all(), ['-date', '-created_at', '-id'],
+        request.GET.get('events_after'), ADMIN_PAGE_SIZE
+    )
 
     validation_result = None  # <<< IMPORTANT
 
@@ -336,7 +366,7 @@ def admin_dashboard(request):
         elif 'clear_booking' in request.POST:
             booking = RoomBooking.objects.get(id=request.POST.get('booking_id'))
             booking.is_cleared = True
-            booking.save()
+            booking.save(update_fields=['is_cleared'])
             messages.success(request, f"Booking for {booking.customer_name} cleared successfully.")
 
         # --- VALIDATE TICKET ---
@@ -344,23 +374,14 @@ def admin_dashboard(request):
             code = request.POST.get('ticket_number').strip().upper()
 
             try:
-                ticket = Ticket.objects.get(ticket_number=code)
+                ticket = Ticket.objects.select_related(
+                    "room_booking__room",
+                    "reservation_booking",
+                    "event_booking",
+                ).get(ticket_number=code)
 
                 # Get customer name from booking type
-                if ticket.booking_type == "room":
-                    customer = ticket.room_booking.customer_name
-                    check_in = ticket.room_booking.check_in
-                    check_out = ticket.room_booking.check_out
-
-                elif ticket.booking_type == "reservation":
-                    customer = ticket.reservation_booking.reserved_name
-                    check_in = None
-                    check_out = None
-
-                elif ticket.booking_type == "event":
-                    customer = ticket.event_booking.customer_name
-                    check_in = None
-                    check_out = None
+                customer, check_in, check_out = ticket_details(ticket)
 
                 validation_result = {
                     "status": "inactive" if not ticket.is_active else "active",
@@ -379,11 +400,14 @@ def admin_dashboard(request):
 
         # --- CLEAR TICKET ---
         elif "clear_ticket" in request.POST:
-            ticket = Ticket.objects.get(id=request.POST.get("clear_ticket"))
-            ticket.is_active = False
-            ticket.cleared_at = timezone.now()
-            ticket.save()
-            messages.success(request, "Ticket successfully cleared.")
+            cleared = Ticket.objects.filter(
+                id=request.POST.get("clear_ticket"),
+                is_active=True
+            ).update(is_active=False, cleared_at=timezone.now())
+            if cleared:
+                messages.success(request, "Ticket successfully cleared.")
+            else:
+                messages.error(request, "Ticket was already cleared.")
             return redirect("admin_dashboard")
 
     context = {
@@ -392,11 +416,45 @@ def admin_dashboard(request):
         "table_reservations": table_reservations,
         "event_bookings": event_bookings,
         "validation_result": validation_result,   # <<< CRUCIAL
+        "active_tab": request.GET.get("tab", ""),
     }
 
     return render(request, 'admindashboard.html', context)
 
 
+# Gate scanner: JSON scan-and-clear, single ticket or a synced batch
+MAX_SCAN_BATCH = 500
+
+@require_POST
+def ticket_scan(request):
+    # Scanners are API clients: answer in JSON rather than redirecting to login
+    if not request.user.is_authenticated:
+        return JsonResponse({"error": "Authentication required."}, status=401)
+    if not (request.user.is_active and request.user.is_staff):
+        return JsonResponse({"error": "Staff only."}, status=403)
+
+    try:
+        payload = json.loads(request.body or b"{}")
+    except ValueError:
+        return JsonResponse({"error": "Invalid JSON."}, status=400)
+
+    if not isinstance(payload, dict):
+        return JsonResponse({"error": "Expected a JSON object."}, status=400)
+
+    if "ticket_numbers" in payload:
+        codes = payload["ticket_numbers"]
+        if not isinstance(codes, list) or not all(isinstance(c, str) for c in codes):
+            return JsonResponse({"error": "ticket_numbers must be a list of strings."}, status=400)
+        if len(codes) > MAX_SCAN_BATCH:
+            return JsonResponse({"error": f"At most {MAX_SCAN_BATCH} tickets per batch."}, status=400)
+        return JsonResponse({"results": scan_tickets(codes)})
+
+    code = payload.get("ticket_number")
+    if not isinstance(code, str) or not code.strip():
+        return JsonResponse({"error": "ticket_number is required."}, status=400)
+    return JsonResponse(scan_tickets([code])[0])
+
+
 @staff_member_required(login_url='login')
 def admin_edit_room(request, room_id):
     room = get_object_or_404(Room, id=room_id)
@@ -419,10 +477,41 @@ def admin_edit_room(request, room_id):
 # Reservations
 @staff_member_required(login_url='login')
 def admin_reservations(request):
-    reservations = Reservation.objects.all().order_by('-date', '-time')
+    reservations = keyset_paginate(
+        Reservation.objects.select_related('user'), ['-date', '-time', '-id'],
+        request.GET.get('after'), ADMIN_PAGE_SIZE
+    )
     return render(request, 'admin_reservations.html', {'reservations': reservations})
 
 
+# Occupancy and revenue, read from the summary tables only
+@staff_member_required(login_url='login')
+def admin_reports(request):
+    today = timezone.localdate()
+    try:
+        month = datetime.strptime(request.GET.get('month', ''), "%Y-%m").date()
+    except ValueError:
+        month = reports.month_start(today)
+    # The page also shows the month before and the twelve before it
+    if not reports.REPORT_FIRST_YEAR <= month.year <= reports.REPORT_LAST_YEAR:
+        return HttpResponseBadRequest(
+            f"month must fall between {reports.REPORT_FIRST_YEAR} and {reports.REPORT_LAST_YEAR}."
+        )
+
+    previous_month = reports.month_start(month - timedelta(days=1))
+    next_month = month + timedelta(days=reports.days_in_month(month))
+    first_month = month.replace(year=month.year - 1) + timedelta(days=31)
+
+    context = reports.month_report(month, Room.objects.count())
+    context.update({
+        'month': month,
+        'previous_month': previous_month,
+        'next_month': next_month,
+        'trend': reports.monthly_totals(reports.month_start(first_month), month),
+    })
+    return render(request, 'admin_reports.html', context)
+
+
 # Rooms
 @staff_member_required(login_url='login')
 def admin_rooms(request):
@@ -443,8 +532,14 @@ def toggle_room_status(request, room_id):
 # Customers (Booked Rooms/Reservations)
 @staff_member_required(login_url='login')
 def admin_customers(request):
-    room_bookings = RoomBooking.objects.all().order_by('-check_in')
-    table_reservations = Reservation.objects.all().order_by('-date', '-time')
+    room_bookings = keyset_paginate(
+        RoomBooking.objects.select_related('room', 'user'), ['-check_in', '-id'],
+        request.GET.get('bookings_after'), ADMIN_PAGE_SIZE
+    )
+    table_reservations = keyset_paginate(
+        Reservation.objects.select_related('user'), ['-date', '-time', '-id'],
+        request.GET.get('reservations_after'), ADMIN_PAGE_SIZE
+    )
     context = {
         'room_bookings': room_bookings,
         'table_reservations': table_reservations
@@ -458,7 +553,7 @@ def clear_customer(request, booking_id):
     booking = RoomBooking.objects.get(id=booking_id)
 
     booking.is_cleared = True
-    booking.save()  # auto frees room & updates related logic
+    booking.save(update_fields=['is_cleared'])  # auto frees room & updates related logic
 
     messages.success(request, f"Booking for {booking.customer_name} cleared successfully.")
     return redirect('admin_customers')
@@ -472,12 +567,89 @@ def ticket_view(request, ticket_id):
         "ticket": ticket
     })
 
+
+@login_required
+def ticket_pdf_view(request, ticket_id):
+    ticket = get_object_or_404(
+        Ticket.objects.select_related(
+            "room_booking__room",
+            "reservation_booking",
+            "event_booking",
+        ),
+        id=ticket_id,
+        user=request.user
+    )
+
+    # Rendered on first download, then served from the PDF cache
+    pdf_path, key = get_ticket_pdf_cache().get_or_render(ticket)
+
+    return sendfile_response(
+        request,
+        pdf_path,
+        content_type="application/pdf",
+        filename=f"Ticket_{ticket.ticket_number}.pdf",
+        etag=f'"{key}"',
+        as_attachment=True
+    )
+
+def metrics_view(request):
+    # Scraped by Prometheus from inside the network; staff can look too
+    allowed = request.META.get('REMOTE_ADDR') in settings.METRICS_ALLOWED_IPS
+    if not (allowed or request.user.is_staff):
+        raise Http404
+    # Plus whatever the background commands last exported
+    body = registry.render(exported=exported_samples())
+    return HttpResponse(body, content_type="text/plain; version=0.0.4; charset=utf-8")
+
+
+# Public media prefixes; everything else under MEDIA_ROOT needs an owner check
+PUBLIC_MEDIA_PREFIXES = ("rooms/",)
+MEDIA_MAX_AGE = 24 * 60 * 60
+
+
+def media_view(request, name):
+    try:
+        path = safe_join(settings.MEDIA_ROOT, name)
+    except SuspiciousFileOperation:
+        raise Http404
+    if not os.path.isfile(path):
+        raise Http404
+
+    # Classify the resolved file, not the URL: rooms/../tickets/x.pdf is a ticket
+    name = os.path.relpath(path, os.path.abspath(settings.MEDIA_ROOT)).replace(os.sep, "/")
+    if name.startswith(PUBLIC_MEDIA_PREFIXES):
+        cache_control = f"public, max-age={MEDIA_MAX_AGE}"
+    elif name.startswith("tickets/"):
+        # Same rule as ticket_view: only the ticket's owner may fetch its PDF
+        if not request.user.is_authenticated:
+            return redirect_to_login(request.get_full_path(), login_url='login')
+        if not Ticket.objects.filter(pdf_file=name, user=request.user).exists():
+            raise Http404
+        cache_control = "private, max-age=0"
+    else:
+        raise Http404
+
+    stat = os.stat(path)
+    content_type, _ = mimetypes.guess_type(path)
+    response = sendfile_response(
+        request,
+        path,
+        content_type=content_type or "application/octet-stream",
+        filename=os.path.basename(path),
+        etag='"%x-%x"' % (int(stat.st_mtime), stat.st_size),
+    )
+    response["Cache-Control"] = cache_control
+    return response
+
+@cached_page('index')
 def index(request):
     return render(request, 'index.html')
 
+@cached_page('terms')
 def terms(request):
     return render(request, 'terms.html')
 
+@cached_page('privacy')
 def privacy(request):
     return render(request, 'privacy.html')
 
@@ -496,43 +668,74 @@ def events(request):
             messages.error(request, "Please fill in all required fields.")
             return redirect("events")
 
-        date_obj = datetime.strptime(date_str, "%Y-%m-%d").date()
-
-        booking = EventBooking.objects.create(
-            user=request.user if request.user.is_authenticated else None,
-            customer_name=customer_name,
-            email=email,
-            phone=phone,
-            date=date_obj,
-            attendees=int(attendees) if attendees.isdigit() else 1,
-            message=message,
-            event_name=event_name
-        )
+        try:
+            date_obj = datetime.strptime(date_str, "%Y-%m-%d").date()
+        except ValueError:
+            messages.error(request, "Invalid date format.")
+            return redirect("events")
 
-        # Create ticket
-        ticket = Ticket.objects.create(
-            user=request.user if request.user.is_authenticated else None,
-            booking_type="event",
-            event_booking=booking
-        )
+        # The chosen venue, or the only one when the form offers no choice
+        venues = list(Venue.objects.filter(is_active=True).order_by('name'))
+        venue_id = request.POST.get("venue", "")
+        if venue_id:
+            venue = next((v for v in venues if str(v.pk) == venue_id), None)
+        else:
+            venue = venues[0] if len(venues) == 1 else None
+        if venue is None:
+            messages.error(request, "Please choose one of our venues.")
+            return redirect("events")
 
-        pdf_path = generate_ticket_pdf(ticket)
-        ticket.pdf_file.name = f"tickets/Ticket_{ticket.ticket_number}.pdf"
-        ticket.save()
+        try:
+            with transaction.atomic():
+                booking = EventBooking.objects.create(
+                    user=request.user if request.user.is_authenticated else None,
+                    customer_name=customer_name,
+                    email=email,
+                    phone=phone,
+                    date=date_obj,
+                    attendees=int(attendees) if attendees.isdigit() else 1,
+                    message=message,
+                    event_name=event_name,
+                    venue=venue,
+                    exclusive=event_name in settings.EXCLUSIVE_EVENT_TYPES
+                )
 
-        email_ticket(ticket, pdf_path)
+                # Create ticket; PDF + email are handled by the ticket worker
+                ticket = Ticket.objects.create(
+                    user=request.user if request.user.is_authenticated else None,
+                    booking_type="event",
+                    event_booking=booking
+                )
+                enqueue_ticket(ticket)
+        except VenueFull as exc:
+            messages.error(request, f"{exc} Please choose another date.")
+            return redirect("events")
 
         return render(request, "events.html", {
             "redirect_to_ticket": True,
             "ticket_id": ticket.id
         })
 
-    return render(request, "events.html")
+    return render(request, "events.html", {
+        "venues": Venue.objects.filter(is_active=True).order_by('name')
+    })
+
+
+# Guests each venue can still take on a date, for the events form
+def event_availability(request):
+    try:
+        day = datetime.strptime(request.GET.get('date', ''), "%Y-%m-%d").date()
+    except ValueError:
+        return JsonResponse({"error": "date (YYYY-MM-DD) is required."}, status=400)
+    return JsonResponse({"date": day.isoformat(), "venues": venue_availability(day)})
 
+@cached_page('menu')
 def menu(request):
     return render(request, 'menu.html')
 
+@cached_page('about')
 def about(request):
     return render(request, 'about.html')
+@cached_page('error')
 def error(request):
     return render(request, '404.html')